@@ -4,7 +4,7 @@ from os import environ
 bind = "localhost:5001"
 worker_class = "h.streamer.Worker"
 graceful_timeout = 0
-workers = 2
+workers = int(environ.get("WEBSOCKET_NUM_WORKERS", 2))
 worker_connections = 8
 
 
@@ -1,3 +1,5 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from collections import namedtuple
 
 import newrelic.agent
@@ -16,9 +18,17 @@ from h.search import (
 )
 from h.services.annotation_read import AnnotationReadService
 
+# The directions of the pages that cursor tokens point to
+CURSOR_BEFORE = "before"
+CURSOR_AFTER = "after"
+
 
 class ActivityResults(
-    namedtuple("ActivityResults", ["total", "aggregations", "timeframes"])
+    namedtuple(
+        "ActivityResults",
+        ["total", "aggregations", "timeframes", "cursors"],
+        defaults=[None],
+    )
 ):
     pass
 
@@ -108,6 +118,7 @@ def execute(request, query, page_size):
         total=search_result.total,
         aggregations=search_result.aggregations,
         timeframes=[],
+        cursors={},
     )
 
     if not result.total:
@@ -118,6 +129,19 @@ def execute(request, query, page_size):
     anns = _fetch_annotations(request, search_result.annotation_ids)
     result.timeframes.extend(bucketing.bucket(anns))
 
+    # Add cursors for the pages either side of this one, so they can be
+    # fetched with `search_after` rather than a (slow and limited) offset.
+    # The first page is always fetched without one, so it's never stale.
+    if search_result.cursors:
+        page = _current_page(request)
+        if page > 2:
+            result.cursors[page - 1] = _encode_cursor(
+                CURSOR_BEFORE, search_result.cursors[0]
+            )
+        result.cursors[page + 1] = _encode_cursor(
+            CURSOR_AFTER, search_result.cursors[-1]
+        )
+
     # Fetch all groups
     group_pubids = {
         a.groupid
@@ -172,6 +196,28 @@ def _execute_search(request, query, page_size):
         search.append_aggregation(agg)
 
     query = query.copy()
+    query["limit"] = page_size
+
+    cursor = _decode_cursor(request.params.get("cursor"))
+    if cursor is None:
+        query["offset"] = (_current_page(request) - 1) * page_size
+        return search.run(query)
+
+    direction, query["search_after"] = cursor
+
+    if direction == CURSOR_AFTER:
+        return search.run(query)
+
+    # Get the page before by searching backwards from its first annotation
+    query["order"] = "asc"
+    search_result = search.run(query)
+    return search_result._replace(
+        annotation_ids=list(reversed(search_result.annotation_ids)),
+        cursors=list(reversed(search_result.cursors)),
+    )
+
+
+def _current_page(request):
     page = request.params.get("page", 1)
 
     try:
@@ -180,13 +226,40 @@ def _execute_search(request, query, page_size):
         page = 1
 
     # Don't allow negative page numbers.
-    page = max(page, 1)
+    return max(page, 1)
 
-    query["limit"] = page_size
-    query["offset"] = (page - 1) * page_size
 
-    search_result = search.run(query)
-    return search_result
+def _encode_cursor(direction, search_after):
+    """
+    Return an opaque token for the page before or after an annotation.
+
+    :param search_after: the annotation's cursor from `SearchResult.cursors`
+    """
+    return (
+        urlsafe_b64encode(json.dumps([direction, search_after]).encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def _decode_cursor(token):
+    """Return the `(direction, search_after)` from a cursor token, or None."""
+    if not token:
+        return None
+
+    try:
+        direction, search_after = json.loads(
+            urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        )
+    except (TypeError, ValueError):
+        return None
+
+    if direction not in (CURSOR_BEFORE, CURSOR_AFTER) or not isinstance(
+        search_after, str
+    ):
+        return None
+
+    return direction, search_after
 
 
 @newrelic.agent.function_trace()
@@ -17,6 +17,7 @@ SUBCOMMANDS = (
     "h.cli.commands.move_uri.move_uri",
     "h.cli.commands.normalize_uris.normalize_uris",
     "h.cli.commands.search.search",
+    "h.cli.commands.streamer_benchmark.streamer_benchmark",
     "h.cli.commands.user.user",
     "h.cli.commands.create_annotations.create_annotations",
 )
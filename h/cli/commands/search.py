@@ -1,6 +1,13 @@
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
 import click
 
-from h.search import config
+from h.search import config, reindex
+from h.search.index import PG_WINDOW_SIZE
+
+# The state of each reindex worker process, set up by `_init_worker()`
+_WORKER = SimpleNamespace(request=None)
 
 
 @click.group()
@@ -24,3 +31,80 @@ def update_settings(ctx):
         config.update_index_settings(request.es)
     except RuntimeError as exc:
         raise click.ClickException(str(exc))
+
+
+@search.command("reindex")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of processes to index annotations with.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=PG_WINDOW_SIZE,
+    show_default=True,
+    help="The number of annotations to index between checkpoints.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of concurrent bulk requests each worker sends to Elasticsearch.",
+)
+@click.pass_context
+def reindex_(ctx, workers, chunk_size, concurrency):
+    """
+    Reindex all annotations into a new index.
+
+    Creates a new index, indexes every annotation into it and then switches
+    the index alias over to it. Changes to annotations made while this is
+    running are written to both indexes.
+
+    Progress is saved as it goes, so if this fails or is interrupted running
+    it again will resume the same reindex.
+    """
+    bootstrap = ctx.obj["bootstrap"]
+    request = bootstrap()
+
+    new_index = reindex.start(request)
+    click.echo(f"Reindexing into {new_index}")
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(bootstrap,)
+    ) as executor:
+        errored = set().union(
+            *executor.map(
+                _index_partition,
+                [new_index] * reindex.PARTITIONS,
+                range(reindex.PARTITIONS),
+                [chunk_size] * reindex.PARTITIONS,
+                [concurrency] * reindex.PARTITIONS,
+            )
+        )
+
+    if errored:
+        raise click.ClickException(
+            f"{len(errored)} annotations failed to index. "
+            "Run this command again to resume the reindex."
+        )
+
+    try:
+        reindex.finish(request)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+
+    click.echo(f"Reindexed into {new_index}")
+
+
+def _init_worker(bootstrap):
+    _WORKER.request = bootstrap()
+
+
+def _index_partition(new_index, partition, chunk_size, concurrency):
+    return reindex.index_partition(
+        _WORKER.request, new_index, partition, chunk_size, concurrency
+    )
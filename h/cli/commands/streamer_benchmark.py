@@ -0,0 +1,480 @@
+"""
+A CLI command for benchmarking the websocket streamer.
+
+Usage:
+
+    bin/hypothesis --dev streamer-benchmark --clients 5000 --events 2000
+
+This connects many simulated websocket clients, with realistic `/uri` and
+`/group` filters, to a streamer work queue running in this process. It then
+sends annotation and user events through it and reports how long the
+notifications took to be delivered to the clients.
+
+Everything apart from the database is in memory. The clients are
+:py:class:`h.streamer.websocket.WebSocket` instances with fake sockets which
+record when each frame was written to them, and events are put on the work
+queue by an in-memory stand-in for :py:mod:`h.realtime`. The results reflect
+the streamer's own work (filtering, permission checks, presenting and sending)
+plus the database queries it makes, but not the network or RabbitMQ.
+
+The annotations which the events are about are created in the database before
+the run and deleted afterwards. Any left behind by an earlier run which didn't
+get to delete them are deleted first. Runs with the same options and `--seed` use
+the same clients, filters and events, so they can be compared before and
+after a change.
+"""
+
+import json
+import random
+from bisect import bisect_right
+from collections import defaultdict
+from statistics import quantiles
+from time import perf_counter
+
+import click
+import gevent
+from gevent.queue import Queue
+from sqlalchemy import delete, exists, select
+from ws4py.messaging import TextMessage
+
+from h import models
+from h.security import Identity
+from h.streamer import messages, metrics, streamer, websocket
+
+URI_PREFIX = "https://example.com/streamer-benchmark/"
+
+
+class FakeSocket:
+    """An in-memory client connection which records the frames sent to it."""
+
+    def __init__(self):
+        self.frames = []
+        """The frames sent to the client, with when they were sent."""
+
+    def sendall(self, data):
+        self.frames.append((perf_counter(), data))
+
+    def close(self):
+        pass
+
+    def shutdown(self, _how):
+        pass
+
+
+class MemoryRealtime:
+    """
+    An in-memory stand-in for :py:mod:`h.realtime`.
+
+    Messages are published with the same methods as
+    :py:class:`h.realtime.Publisher`, and put on the work queue in the same way
+    as by the consumers in :py:func:`h.streamer.messages.process_messages`.
+    """
+
+    def __init__(self, work_queue):
+        self._work_queue = work_queue
+
+    def publish_annotation(self, payload):
+        self._publish(streamer.ANNOTATION_TOPIC, payload)
+
+    def publish_user(self, payload):
+        self._publish(streamer.USER_TOPIC, payload)
+
+    def _publish(self, routing_key, payload):
+        # Messages go through the broker as JSON
+        payload = json.loads(json.dumps(payload))
+
+        # Unlike the real consumers we wait for space on the queue rather than
+        # dropping the message, so a backlog shows up as latency
+        self._work_queue.put(
+            messages.Message(
+                topic=routing_key, payload=payload, queued_at=perf_counter()
+            )
+        )
+
+
+class StreamerBenchmark:  # pylint:disable=too-many-instance-attributes
+    """A simulated streamer workload, and the results of running it."""
+
+    def __init__(self, request, seed):
+        self._request = request
+        self._rng = random.Random(seed)
+        self._work_queue = Queue(maxsize=streamer.WORK_QUEUE.maxsize)
+        self._realtime = MemoryRealtime(self._work_queue)
+
+        self._userid = f"acct:streamer-benchmark@{request.default_authority}"
+        self._annotation_ids = []
+        self._users = []
+        self._clients = []
+        self._sockets = []
+
+        # When each event about an annotation was sent, by annotation ID
+        self._sent_at = defaultdict(list)
+        self._started_at = None
+
+    def create_annotations(self, count, uri_count):
+        """
+        Create the annotations which events will be sent about.
+
+        The annotations are spread across the pages with a Zipf distribution,
+        so a few popular pages get much more activity than the rest.
+        """
+        document = models.Document()
+        annotations = [
+            models.Annotation(
+                userid=self._userid,
+                groupid="__world__",
+                shared=True,
+                target_uri=uri,
+                text="Streamer benchmark annotation",
+                document=document,
+            )
+            for uri in self._rng.choices(
+                self._uris(uri_count), self._weights(uri_count), k=count
+            )
+        ]
+        self._request.db.add_all(annotations)
+        self._request.db.flush()
+
+        self._annotation_ids = [annotation.id for annotation in annotations]
+        self._request.tm.commit()
+
+    def delete_annotations(self):
+        """
+        Delete the annotations created by `create_annotations()`.
+
+        This also deletes annotations left behind by earlier runs, which can
+        be told apart from other annotations by their user and URIs.
+        """
+        document_ids = self._request.db.execute(
+            delete(models.Annotation)
+            .where(
+                models.Annotation.userid == self._userid,
+                models.Annotation.__table__.c.target_uri.startswith(URI_PREFIX),
+            )
+            .returning(models.Annotation.document_id)
+        ).scalars()
+        self._request.db.execute(
+            delete(models.Document).where(
+                models.Document.id.in_(set(document_ids)),
+                ~exists().where(models.Annotation.document_id == models.Document.id),
+            )
+        )
+        self._request.tm.commit()
+
+    def connect_clients(
+        self, count, uri_count, group_filter_ratio, authenticated_ratio
+    ):
+        """
+        Connect simulated clients and send them their filters.
+
+        Most clients are on a single page, again chosen with a Zipf
+        distribution. Some follow the whole public group instead, like the
+        stream page does. Some are logged in as existing users, if there are
+        any.
+        """
+        settings = self._request.registry.settings
+        self._users = self._request.db.scalars(
+            select(models.User)
+            .where(models.User.authority == self._request.default_authority)
+            .limit(100)
+        ).all()
+
+        uris, weights = self._uris(uri_count), self._weights(uri_count)
+
+        for i in range(count):
+            identity = None
+            if self._users and self._rng.random() < authenticated_ratio:
+                identity = Identity.from_models(user=self._rng.choice(self._users))
+
+            sock = FakeSocket()
+            client = websocket.WebSocket(
+                sock,
+                environ={
+                    "h.ws.debug": False,
+                    "h.ws.streamer_work_queue": self._work_queue,
+                    "h.ws.identity": identity,
+                    "h.ws.send_buffer_size": settings.get(
+                        "h.streamer.send_buffer_size", 0
+                    ),
+                    "h.ws.slow_consumer_policy": settings.get(
+                        "h.streamer.slow_consumer_policy",
+                        websocket.SLOW_CONSUMER_DROP_OLDEST,
+                    ),
+                },
+            )
+
+            if self._rng.random() < group_filter_ratio:
+                clause = {"field": "/group", "operator": "equals", "value": "__world__"}
+            else:
+                clause = {
+                    "field": "/uri",
+                    "operator": "one_of",
+                    "value": self._rng.choices(uris, weights),
+                }
+
+            self._send_from_client(client, {"type": "client_id", "value": f"c{i}"})
+            self._send_from_client(
+                client,
+                {
+                    "type": "filter",
+                    "filter": {
+                        "match_policy": "include_any",
+                        "clauses": [dict(clause, case_sensitive=False)],
+                        "actions": {"create": True, "update": True, "delete": True},
+                    },
+                },
+            )
+
+            self._clients.append(client)
+            self._sockets.append(sock)
+
+            # Give the work queue time to catch up, as messages from clients
+            # are dropped if it's full
+            if self._work_queue.qsize() > self._work_queue.maxsize // 2:
+                self.wait_until_idle()
+
+        self.wait_until_idle()
+
+    def send_events(self, count, rate, user_event_ratio):
+        """
+        Send annotation and user events.
+
+        :param rate: Events to send per second, or 0 to send them as fast as
+            the work queue will take them
+        """
+        # Cycle through the annotations so we can tell which event a
+        # notification was for, unless the streamer falls behind by more than
+        # the number of annotations
+        annotation_ids = self._rng.sample(
+            self._annotation_ids, len(self._annotation_ids)
+        )
+
+        self._started_at = perf_counter()
+
+        for i in range(count):
+            if rate:
+                gevent.sleep(max(0, self._started_at + i / rate - perf_counter()))
+
+            if self._users and self._rng.random() < user_event_ratio:
+                self._realtime.publish_user(
+                    {
+                        "type": self._rng.choice(["group-join", "group-leave"]),
+                        "session_model": {},
+                        "userid": self._rng.choice(self._users).userid,
+                        "group": "__world__",
+                    }
+                )
+                continue
+
+            annotation_id = annotation_ids[i % len(annotation_ids)]
+            self._sent_at[annotation_id].append(perf_counter())
+            self._realtime.publish_annotation(
+                {
+                    "action": self._rng.choices(
+                        ["create", "update", "delete"], [4, 5, 1]
+                    )[0],
+                    "annotation_id": annotation_id,
+                    "src_client_id": self._rng.choice(self._clients).client_id,
+                }
+            )
+
+        self.wait_until_idle()
+
+    def wait_until_idle(self):
+        """Wait for the work queue and any send buffers to be emptied."""
+        # `process_work_queue` doesn't yield while handling a message, so
+        # once the queue is empty here it has finished with the last one
+        while self._work_queue.qsize() or any(
+            client.send_buffer_length for client in self._clients
+        ):
+            gevent.sleep(0.001)
+
+    def run(self, connect_kwargs, send_kwargs):
+        """Run the benchmark, with a streamer processing the work queue."""
+        worker = gevent.spawn(
+            streamer.process_work_queue, self._request.registry, self._work_queue
+        )
+        try:
+            self.connect_clients(**connect_kwargs)
+            # Only report on the events, not on connecting the clients
+            metrics.HISTOGRAMS.clear()
+            for sock in self._sockets:
+                sock.frames.clear()
+
+            self.send_events(**send_kwargs)
+        finally:
+            worker.kill()
+
+    def report(self):
+        """Get a summary of the results as lines of text."""
+        frame_count, last_sent_at, latencies = self._deliveries()
+        elapsed = last_sent_at - self._started_at
+        event_count = sum(len(times) for times in self._sent_at.values())
+
+        lines = [
+            f"Clients: {len(self._clients)}",
+            f"Annotation events: {event_count}",
+            f"Messages delivered: {frame_count}",
+            f"Elapsed: {elapsed:.3f}s",
+        ]
+        if elapsed:
+            lines.append(f"Messages/sec: {frame_count / elapsed:.1f}")
+
+        if len(latencies) > 1:
+            percentiles = quantiles(latencies, n=100)
+            lines.extend(
+                [
+                    f"Delivery latency p50: {percentiles[49] * 1000:.2f}ms",
+                    f"Delivery latency p99: {percentiles[98] * 1000:.2f}ms",
+                    f"Delivery latency max: {max(latencies) * 1000:.2f}ms",
+                ]
+            )
+
+        # Histograms are only created when a value is observed, so none of
+        # them are empty
+        for name, histogram in sorted(metrics.HISTOGRAMS.items()):
+            lines.append(
+                f"{name}: count={histogram.count} "
+                f"mean={histogram.sum / histogram.count:.6f}"
+            )
+
+        return lines
+
+    def _deliveries(self):
+        """
+        Get what was delivered to the clients.
+
+        :return: the number of frames delivered, when the last one was sent,
+            and the latencies of the annotation notifications
+        """
+        latencies = []
+        frame_count = 0
+        last_sent_at = self._started_at
+        # Every client is sent the same frame for an event, so decode each
+        # one only once
+        decoded = {}
+
+        for sock in self._sockets:
+            for sent_at, frame in sock.frames:
+                frame_count += 1
+                last_sent_at = max(last_sent_at, sent_at)
+
+                if frame not in decoded:
+                    decoded[frame] = json.loads(_frame_payload(frame))
+                message = decoded[frame]
+
+                if message.get("type") != "annotation-notification":
+                    continue
+
+                # Measure from the last time an event about the annotation was
+                # sent before this notification
+                event_times = self._sent_at[message["payload"][0]["id"]]
+                event_sent_at = event_times[bisect_right(event_times, sent_at) - 1]
+                latencies.append(sent_at - event_sent_at)
+
+        return frame_count, last_sent_at, latencies
+
+    @staticmethod
+    def _send_from_client(client, payload):
+        client.received_message(TextMessage(json.dumps(payload)))
+
+    @staticmethod
+    def _uris(count):
+        return [f"{URI_PREFIX}{i}" for i in range(count)]
+
+    @staticmethod
+    def _weights(count):
+        return [1 / rank for rank in range(1, count + 1)]
+
+
+def _frame_payload(frame):
+    """Get the payload of an unmasked WebSocket frame, as sent by a server."""
+    length = frame[1] & 0x7F
+    if length == 126:
+        return frame[4:]
+    if length == 127:
+        return frame[10:]
+    return frame[2:]
+
+
+@click.command()
+@click.option("--clients", default=1000, help="Number of clients to connect")
+@click.option("--events", default=1000, help="Number of events to send")
+@click.option(
+    "--rate", default=100.0, help="Events per second, or 0 for as fast as possible"
+)
+@click.option("--uris", default=200, help="Number of pages the clients are on")
+@click.option(
+    "--annotations", default=500, help="Number of annotations to send events about"
+)
+@click.option(
+    "--group-filter-ratio",
+    default=0.01,
+    help="Proportion of clients following the whole public group",
+)
+@click.option(
+    "--authenticated-ratio",
+    default=0.2,
+    help="Proportion of clients logged in as existing users",
+)
+@click.option(
+    "--user-event-ratio", default=0.1, help="Proportion of events which are user events"
+)
+@click.option("--batch-size", type=int, help="Override h.streamer.batch_size")
+@click.option(
+    "--send-buffer-size", type=int, help="Override h.streamer.send_buffer_size"
+)
+@click.option("--seed", default=0, help="Seed for the random workload")
+@click.pass_context
+def streamer_benchmark(  # pylint:disable=too-many-arguments
+    ctx,
+    clients,
+    events,
+    rate,
+    uris,
+    annotations,
+    group_filter_ratio,
+    authenticated_ratio,
+    user_event_ratio,
+    batch_size,
+    send_buffer_size,
+    seed,
+):
+    """Measure how quickly the streamer delivers notifications to clients."""
+    request = ctx.obj["bootstrap"]()
+    _override_settings(
+        request.registry.settings,
+        {
+            "h.streamer.batch_size": batch_size,
+            "h.streamer.send_buffer_size": send_buffer_size,
+        },
+    )
+
+    benchmark = StreamerBenchmark(request, seed)
+    benchmark.delete_annotations()
+    benchmark.create_annotations(annotations, uris)
+    try:
+        benchmark.run(
+            connect_kwargs={
+                "count": clients,
+                "uri_count": uris,
+                "group_filter_ratio": group_filter_ratio,
+                "authenticated_ratio": authenticated_ratio,
+            },
+            send_kwargs={
+                "count": events,
+                "rate": rate,
+                "user_event_ratio": user_event_ratio,
+            },
+        )
+    finally:
+        benchmark.delete_annotations()
+
+    click.echo("\n".join(benchmark.report()))
+
+
+def _override_settings(settings, overrides):
+    """Override `settings` with the values in `overrides` which aren't None."""
+    settings.update(
+        {name: value for name, value in overrides.items() if value is not None}
+    )
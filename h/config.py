@@ -53,6 +53,9 @@ def configure(environ=None, settings=None):  # pylint: disable=too-many-statemen
         type_=asbool,
         default=True,
     )
+    settings_manager.set(
+        "es.debug_metrics", "ELASTICSEARCH_DEBUG_METRICS", type_=asbool
+    )
     settings_manager.set("mail.default_sender", "MAIL_DEFAULT_SENDER")
     settings_manager.set("mail.host", "MAIL_HOST")
     settings_manager.set("mail.port", "MAIL_PORT", type_=int)
@@ -117,6 +120,20 @@ def configure(environ=None, settings=None):  # pylint: disable=too-many-statemen
     )
 
     settings_manager.set("h.websocket_url", "WEBSOCKET_URL")
+    settings_manager.set(
+        "h.streamer.batch_size", "STREAMER_BATCH_SIZE", type_=int, default=1
+    )
+    settings_manager.set(
+        "h.streamer.send_buffer_size", "STREAMER_SEND_BUFFER_SIZE", type_=int
+    )
+    settings_manager.set(
+        "h.streamer.debug_metrics", "STREAMER_DEBUG_METRICS", type_=asbool
+    )
+    settings_manager.set(
+        "h.streamer.slow_consumer_policy",
+        "STREAMER_SLOW_CONSUMER_POLICY",
+        default="drop_oldest",
+    )
 
     # Reporting settings
     settings_manager.set("h.report.fdw_users", "REPORT_FDW_USERS", type_=aslist)
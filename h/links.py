@@ -1,5 +1,6 @@
 """Provides links to different representations of annotations."""
 
+from functools import lru_cache
 from urllib.parse import unquote, urljoin, urlparse
 
 
@@ -35,7 +36,7 @@ def incontext_link(request, annotation):
     if not bouncer_url:
         return None
 
-    link = urljoin(bouncer_url, annotation.thread_root_id)
+    link = _incontext_link_prefix(bouncer_url) + annotation.thread_root_id
     uri = annotation.target_uri
     if uri.startswith(("http://", "https://")):
         # We can't use urljoin here, because if it detects the second argument
@@ -51,6 +52,14 @@ def incontext_link(request, annotation):
     return link
 
 
+@lru_cache(maxsize=16)
+def _incontext_link_prefix(bouncer_url):
+    # Annotation IDs are plain path segments, so joining one onto the bouncer
+    # URL is the same as appending it to this, which saves an `urljoin()` per
+    # annotation.
+    return urljoin(bouncer_url, "_")[:-1]
+
+
 def json_link(request, annotation):
     return request.route_url("api.annotation", id=annotation.id)
 
@@ -0,0 +1,20 @@
+"""Add the memberships_version column to the user table."""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "3d5b2a7c9e41"
+down_revision = "146179fa8d5e"
+
+
+def upgrade():
+    op.add_column(
+        "user",
+        sa.Column(
+            "memberships_version", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("user", "memberships_version")
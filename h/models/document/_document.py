@@ -159,12 +159,16 @@ def merge_documents(session, documents, updated=None):
         # In the meantime we are doing this import here to avoid a circular dependency.
         # pylint:disable=import-outside-toplevel,cyclic-import
         from h.services.annotation_write import AnnotationWriteService
+        from h.storage import EXPAND_URI_CACHE
 
         AnnotationWriteService.change_document(session, duplicate_ids, master)
         session.query(Document).filter(Document.id.in_(duplicate_ids)).delete(
             synchronize_session="fetch"
         )
 
+        # All the URIs of the merged documents now refer to the master
+        EXPAND_URI_CACHE.invalidate_tags(master.id, *duplicate_ids)
+
     except sa.exc.IntegrityError as err:
         raise ConcurrentUpdateError("concurrent document merges") from err
 
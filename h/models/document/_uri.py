@@ -129,6 +129,14 @@ def create_or_update_document_uri(  # pylint: disable=redefined-builtin,too-many
             updated=updated,
         )
         session.add(docuri)
+
+        # The new URI refers to the document, as do any URIs it already had.
+        # Imported here to avoid a circular dependency.
+        # pylint:disable=import-outside-toplevel,cyclic-import
+        from h.storage import EXPAND_URI_CACHE
+
+        EXPAND_URI_CACHE.invalidate(docuri.uri_normalized)
+        EXPAND_URI_CACHE.invalidate_tags(document.id)
     elif not docuri.document == document:
         log.warning(
             "Found DocumentURI (id: %s)'s document_id (%s) doesn't match "
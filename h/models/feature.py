@@ -16,6 +16,10 @@ FEATURES = {
     "styled_highlight_clusters": "Style different clusters of highlights in the client",
     "client_user_profile": "Enable client-side user profile and preferences management",
     "group_type": "Allow users to choose group type in group creation form",
+    "search_combined_replies": (
+        "Search for annotations on a page and their replies in a single "
+        "Elasticsearch request"
+    ),
 }
 
 
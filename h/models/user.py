@@ -213,6 +213,12 @@ class User(Base):
     # Has the user opted-in for news etc.
     comms_opt_in = sa.Column(sa.Boolean, nullable=True)
 
+    #: Incremented whenever the user joins or leaves a group, so that caches of
+    #: the groups the user can read can be keyed on it
+    memberships_version = sa.Column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
+
     identities = sa.orm.relationship(
         "UserIdentity", backref="user", cascade="all, delete-orphan"
     )
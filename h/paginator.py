@@ -4,7 +4,16 @@ import math
 PAGE_SIZE = 20
 
 
-def paginate(request, total, page_size=PAGE_SIZE):  # pylint:disable=too-complex
+def paginate(
+    request, total, page_size=PAGE_SIZE, cursors=None
+):  # pylint:disable=too-complex
+    """
+    Return the template data for a paginator.
+
+    :param cursors: a dict of page numbers to opaque cursor tokens. Links to
+        these pages include the token in a ``cursor`` param, which lets the
+        view fetch the page without an offset.
+    """
     first = 1
     page_max = int(math.ceil(total / page_size))
     page_max = max(1, page_max)  # There's always at least one page.
@@ -69,6 +78,9 @@ def paginate(request, total, page_size=PAGE_SIZE):  # pylint:disable=too-complex
     def url_for(page):
         query = request.params.dict_of_lists()
         query["page"] = page
+        query.pop("cursor", None)
+        if cursors and page in cursors:
+            query["cursor"] = cursors[page]
         return request.current_route_path(_query=query)
 
     return {
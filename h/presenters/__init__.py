@@ -1,6 +1,9 @@
 from h.presenters.annotation_html import AnnotationHTMLPresenter
 from h.presenters.annotation_jsonld import AnnotationJSONLDPresenter
-from h.presenters.annotation_searchindex import AnnotationSearchIndexPresenter
+from h.presenters.annotation_searchindex import (
+    AnnotationSearchIndexPresenter,
+    AnnotationsSearchIndexPresenter,
+)
 from h.presenters.document_html import DocumentHTMLPresenter
 from h.presenters.document_json import DocumentJSONPresenter
 from h.presenters.document_searchindex import DocumentSearchIndexPresenter
@@ -11,6 +14,7 @@ __all__ = (
     "AnnotationHTMLPresenter",
     "AnnotationJSONLDPresenter",
     "AnnotationSearchIndexPresenter",
+    "AnnotationsSearchIndexPresenter",
     "DocumentHTMLPresenter",
     "DocumentJSONPresenter",
     "DocumentSearchIndexPresenter",
@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+from h.models import Annotation
 from h.presenters.document_searchindex import DocumentSearchIndexPresenter
 from h.util.datetime import utc_iso8601
 from h.util.user import split_user
@@ -11,52 +14,115 @@ class AnnotationSearchIndexPresenter:
         self.request = request
 
     def asdict(self):
-        docpresenter = DocumentSearchIndexPresenter(self.annotation.document)
-        userid_parts = split_user(self.annotation.userid)
-
-        tags = self.annotation.tags or []
-
-        result = {
-            "authority": userid_parts["domain"],
-            "id": self.annotation.id,
-            "created": utc_iso8601(self.annotation.created),
-            "updated": utc_iso8601(self.annotation.updated),
-            "user": self.annotation.userid,
-            "user_raw": self.annotation.userid,
-            "uri": self.annotation.target_uri,
-            "text": self.annotation.text or "",
-            "tags": tags,
-            "tags_raw": tags,
-            "group": self.annotation.groupid,
-            "shared": self.annotation.shared,
-            "target": self.annotation.target,
-            "document": docpresenter.asdict(),
-            "thread_ids": self.annotation.thread_ids,
-        }
-
-        result["target"][0]["scope"] = [self.annotation.target_uri_normalized]
-
-        if self.annotation.references:
-            result["references"] = self.annotation.references
-
-        self._add_hidden(result)
-        self._add_nipsa(result, self.annotation.userid)
-
-        return result
-
-    def _add_hidden(self, result):
+        thread_ids = self.annotation.thread_ids
+
         # Mark an annotation as hidden if it and all of it's children have been
         # moderated and hidden.
-        parents_and_replies = [self.annotation.id] + self.annotation.thread_ids
-
+        parents_and_replies = [self.annotation.id] + thread_ids
         ann_mod_svc = self.request.find_service(name="annotation_moderation")
-        is_hidden = len(ann_mod_svc.all_hidden(parents_and_replies)) == len(
+        hidden = len(ann_mod_svc.all_hidden(parents_and_replies)) == len(
             parents_and_replies
         )
 
-        result["hidden"] = is_hidden
-
-    def _add_nipsa(self, result, user_id):
         nipsa_service = self.request.find_service(name="nipsa")
-        if nipsa_service.is_flagged(user_id):
-            result["nipsa"] = True
+
+        return _present(
+            self.annotation,
+            thread_ids=thread_ids,
+            hidden=hidden,
+            nipsa=nipsa_service.is_flagged(self.annotation.userid),
+        )
+
+
+class AnnotationsSearchIndexPresenter:
+    """
+    Present a batch of annotations in the JSON format used in the search index.
+
+    This gives the same results as `AnnotationSearchIndexPresenter`, but looks
+    up the thread IDs, hidden status and NIPSA status of all the annotations
+    with a few queries for the whole batch, rather than several per annotation.
+    """
+
+    def __init__(self, annotations, request):
+        self.annotations = list(annotations)
+        self.request = request
+
+    def asdicts(self):
+        thread_ids = self._thread_ids()
+
+        ann_mod_svc = self.request.find_service(name="annotation_moderation")
+        hidden_ids = set(
+            ann_mod_svc.all_hidden(
+                [annotation.id for annotation in self.annotations]
+                + [id_ for ids in thread_ids.values() for id_ in ids]
+            )
+        )
+
+        flagged_userids = self.request.find_service(
+            name="nipsa"
+        ).fetch_all_flagged_userids()
+
+        return [
+            _present(
+                annotation,
+                thread_ids=thread_ids[annotation.id],
+                hidden=hidden_ids.issuperset(
+                    [annotation.id] + thread_ids[annotation.id]
+                ),
+                nipsa=annotation.userid in flagged_userids,
+            )
+            for annotation in self.annotations
+        ]
+
+    def _thread_ids(self):
+        """Return a dict of the IDs of the replies in each annotation's thread."""
+        thread_ids = defaultdict(list)
+
+        if not self.annotations:
+            return thread_ids
+
+        # This is the same join as `Annotation.thread` for all the annotations
+        thread_root_id = Annotation.references[0]
+        query = self.request.db.query(thread_root_id, Annotation.id).filter(
+            thread_root_id.in_([annotation.id for annotation in self.annotations])
+        )
+        for root_id, reply_id in query:
+            thread_ids[root_id].append(reply_id)
+
+        return thread_ids
+
+
+def _present(annotation, thread_ids, hidden, nipsa):
+    docpresenter = DocumentSearchIndexPresenter(annotation.document)
+    userid_parts = split_user(annotation.userid)
+
+    tags = annotation.tags or []
+
+    result = {
+        "authority": userid_parts["domain"],
+        "id": annotation.id,
+        "created": utc_iso8601(annotation.created),
+        "updated": utc_iso8601(annotation.updated),
+        "user": annotation.userid,
+        "user_raw": annotation.userid,
+        "uri": annotation.target_uri,
+        "text": annotation.text or "",
+        "tags": tags,
+        "tags_raw": tags,
+        "group": annotation.groupid,
+        "shared": annotation.shared,
+        "target": annotation.target,
+        "document": docpresenter.asdict(),
+        "thread_ids": thread_ids,
+        "hidden": hidden,
+    }
+
+    result["target"][0]["scope"] = [annotation.target_uri_normalized]
+
+    if annotation.references:
+        result["references"] = annotation.references
+
+    if nipsa:
+        result["nipsa"] = True
+
+    return result
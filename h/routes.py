@@ -236,6 +236,7 @@ def includeme(config):  # pylint: disable=too-many-statements
 
     # Health check
     config.add_route("status", "/_status")
+    config.add_route("elasticsearch_metrics", "/_metrics/elasticsearch")
 
     # Static
     config.add_route("about", "/about/", static=True)
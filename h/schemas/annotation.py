@@ -326,6 +326,23 @@ class SearchParamsSchema(colander.Schema):
         missing=False,
         description="Return a separate set of annotations and their replies.",
     )
+    _replies_limit = colander.SchemaNode(
+        colander.Integer(),
+        validator=colander.Range(min=0, max=LIMIT_MAX),
+        missing=LIMIT_MAX,
+        description="""The maximum number of replies to return when
+                       _separate_replies is set.""",
+    )
+    _replies_search_after = colander.SchemaNode(
+        colander.String(),
+        missing=colander.drop,
+        description="""Returns the replies that come after this cursor when
+                       _separate_replies is set. This should be the
+                       replies_search_after value from the previous page of
+                       replies and is used to page through large threads. An
+                       updated value on its own returns the replies that were
+                       updated before it.""",
+    )
     sort = colander.SchemaNode(
         colander.String(),
         validator=colander.OneOf(["created", "updated", "group", "id", "user"]),
@@ -474,6 +491,17 @@ class SearchParamsSchema(colander.Schema):
             # offset must be set to 0 if search_after is specified.
             cstruct["offset"] = 0
 
+        # Either an `updated` value or an "<updated>,<id>" cursor
+        replies_search_after = cstruct.get("_replies_search_after", "")
+        replies_updated, _, _ = replies_search_after.partition(",")
+        if replies_search_after and not self._date_is_parsable(replies_updated):
+            raise colander.Invalid(
+                node,
+                """_replies_search_after must be a replies_search_after cursor,
+                a parsable date in the form yyyy-MM-dd'T'HH:mm:ss.SSX
+                or time in miliseconds since the epoch.""",
+            )
+
     @staticmethod
     def _date_is_parsable(value):
         """Return True if date is parsable and False otherwise."""
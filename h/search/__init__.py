@@ -1,6 +1,6 @@
 from h.search.client import get_client
 from h.search.config import init
-from h.search.core import Search
+from h.search.core import Count, Search
 from h.search.query import (
     AuthorityFilter,
     DeletedFilter,
@@ -13,6 +13,7 @@ from h.search.query import (
 )
 
 __all__ = (
+    "Count",
     "Search",
     "TopLevelAnnotationsFilter",
     "DeletedFilter",
@@ -0,0 +1,84 @@
+"""
+Short-lived caches of search results and annotation counts.
+
+Anonymous searches for the annotations on popular pages run the same query
+over and over again. The results of these searches are cached for a few
+seconds, keyed on the Elasticsearch query the search parameters were turned
+into. The query includes the normalized URIs and the groups the user can read,
+so equivalent searches share an entry. The counts used by the badge are cached
+the same way.
+
+Entries are invalidated when an annotation on one of their URIs changes in this
+process. Changes only reach searches when the search index is next refreshed,
+so results aren't cached if their URIs were invalidated shortly before the
+search (see `INDEX_REFRESH_INTERVAL`). The cache is per process, so changes
+made in other processes are only seen when the entries expire.
+"""
+
+from time import monotonic
+
+from h.util.cache import TTLCache
+
+# How long (in seconds) search results are cached for, and for how many
+# searches at most
+SEARCH_RESULT_CACHE_TTL = 10
+SEARCH_RESULT_CACHE_SIZE = 1000
+
+# How long (in seconds) the counts of the annotations on URIs from
+# `h.search.Count` are cached for, and how many of them at most
+COUNT_CACHE_TTL = 30
+COUNT_CACHE_SIZE = 10000
+
+# How long (in seconds) it can take for changes to the search index to be
+# seen by searches (Elasticsearch's default `refresh_interval`)
+INDEX_REFRESH_INTERVAL = 1
+
+# Search results and counts cached by Elasticsearch query, tagged with the
+# normalized URIs the query is restricted to
+SEARCH_RESULT_CACHE = TTLCache(
+    maxsize=SEARCH_RESULT_CACHE_SIZE, ttl=SEARCH_RESULT_CACHE_TTL
+)
+COUNT_CACHE = TTLCache(maxsize=COUNT_CACHE_SIZE, ttl=COUNT_CACHE_TTL)
+
+
+def index_as_of():
+    """
+    Return how up to date a search started now is, for `TTLCache.set()`.
+
+    Searches don't see changes from the last `INDEX_REFRESH_INTERVAL` seconds.
+    """
+    return monotonic() - INDEX_REFRESH_INTERVAL
+
+
+def scope_uris(query):
+    """
+    Return the normalized URIs which an Elasticsearch query is restricted to.
+
+    :param query: a query as returned by `elasticsearch_dsl.Search.to_dict()`
+    :returns: a list of normalized URIs, or None if the query isn't restricted
+        to exact URIs (because it has no URI or has a wildcard URI)
+    """
+    uris = []
+    wildcards = False
+
+    def walk(value):
+        nonlocal wildcards
+
+        if isinstance(value, dict):
+            for key, child in value.items():
+                if key == "terms" and "target.scope" in child:
+                    uris.extend(child["target.scope"])
+                elif key == "wildcard" and "target.scope" in child:
+                    wildcards = True
+                else:
+                    walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+
+    walk(query)
+
+    if wildcards or not uris:
+        return None
+
+    return uris
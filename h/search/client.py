@@ -4,6 +4,8 @@ from functools import cached_property
 import elasticsearch
 from packaging.version import Version
 
+from h.search.instrumentation import InstrumentedConnection, InstrumentedTransport
+
 
 @dataclass(frozen=True)
 class Client:
@@ -57,5 +59,10 @@ def get_client(settings):
     # ES, the cluster lives inside a VPC.
     return Client(
         index=settings["es.index"],
-        conn=elasticsearch.Elasticsearch([settings["es.url"]], **extra_settings),
+        conn=elasticsearch.Elasticsearch(
+            [settings["es.url"]],
+            transport_class=InstrumentedTransport,
+            connection_class=InstrumentedConnection,
+            **extra_settings,
+        ),
     )
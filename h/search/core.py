@@ -1,18 +1,32 @@
-import logging
+import json
 from collections import namedtuple
+from functools import partial
 
 import elasticsearch_dsl
 from webob.multidict import MultiDict
 
-from h.search import query
+from h.search import cache, instrumentation, query
 from h.util import metrics
 
-log = logging.getLogger(__name__)
-
 SearchResult = namedtuple(
-    "SearchResult", ["total", "annotation_ids", "reply_ids", "aggregations"]
+    "SearchResult",
+    [
+        "total",
+        "annotation_ids",
+        "reply_ids",
+        "aggregations",
+        "reply_total",
+        # The `search_after` cursors (see `query.cursor()`) of the annotations
+        # and replies, in the same order as their IDs
+        "cursors",
+        "reply_cursors",
+    ],
+    defaults=[0, (), ()],
 )
 
+# The options for the search for the replies to the annotations found
+_RepliesOptions = namedtuple("_RepliesOptions", ["limit", "search_after", "combine"])
+
 
 class Search:
     """
@@ -31,34 +45,60 @@ class Search:
         If False, uri/url parameters are expected to contain both wildcard and exact
         matches.
     :type separate_wildcard_uri_keys: bool
+
+    :param combine_replies_search: If True and `separate_replies` is True,
+        searches for annotations on particular URIs also search for the
+        replies on those URIs in the same Elasticsearch request, rather than
+        making a second request for the replies once the annotations are known.
+    :type combine_replies_search: bool
+
+    :param replies_limit: The maximum number of replies to return when
+        `separate_replies` is True.
+    :type replies_limit: int
+
+    :param replies_search_after: If given, only return the replies which sort
+        after this `updated` value, or after this cursor from
+        `SearchResult.reply_cursors`. Together with `replies_limit` this
+        allows paging through the replies to very large threads.
+    :type replies_search_after: str
+
+    :param caller: The caller to tag this search's Elasticsearch requests with
+        in `h.search.instrumentation`.
+    :type caller: str
+
+    :param cache_results: If True, the results of anonymous searches on
+        particular URIs are cached for a few seconds in
+        `h.search.cache.SEARCH_RESULT_CACHE`.
+    :type cache_results: bool
     """
 
-    def __init__(
+    # The search parameters which restrict a search to particular URIs
+    URI_PARAMS = ("uri", "url", "wildcard_uri")
+
+    def __init__(  # pylint:disable=too-many-arguments
         self,
         request,
         separate_replies=False,
         separate_wildcard_uri_keys=True,
-        _replies_limit=200,
+        combine_replies_search=False,
+        replies_limit=query.LIMIT_MAX,
+        replies_search_after=None,
+        caller="search",
+        cache_results=False,
     ):
         self.es = request.es
         self.separate_replies = separate_replies
-        self._replies_limit = _replies_limit
-        # Order matters! The KeyValueMatcher must be run last,
-        # after all other modifiers have popped off the params.
+        self._replies = _RepliesOptions(
+            limit=replies_limit,
+            search_after=replies_search_after,
+            combine=combine_replies_search,
+        )
+        self._caller = caller
+        self._cache_results = cache_results and request.authenticated_userid is None
         self._modifiers = [
             query.Sorter(),
             query.Limiter(),
-            query.DeletedFilter(),
-            query.AuthFilter(request),
-            query.GroupFilter(request),
-            query.UserFilter(),
-            query.HiddenFilter(request),
-            query.AnyMatcher(),
-            query.TagsMatcher(),
-            query.UriCombinedWildcardFilter(
-                request, separate_keys=separate_wildcard_uri_keys
-            ),
-            query.KeyValueMatcher(),
+            *_filters(request, separate_wildcard_uri_keys),
         ]
         self._aggregations = []
 
@@ -73,10 +113,33 @@ class Search:
         :rtype: SearchResult
         """
         metrics.record_search_query_params(params, self.separate_replies)
-        total, annotation_ids, aggregations = self._search_annotations(params)
-        reply_ids = self._search_replies(annotation_ids)
 
-        return SearchResult(total, annotation_ids, reply_ids, aggregations)
+        with instrumentation.caller(self._caller):
+            combined = (
+                self.separate_replies
+                and self._replies.combine
+                and not self._replies.search_after
+                and any(key in params for key in self.URI_PARAMS)
+            )
+            # The modifiers pop the params they use, so get the URI params for
+            # a combined replies search before the annotations search is built
+            replies_params = MultiDict({"limit": self._replies.limit})
+            for key, value in params.items():
+                if key in self.URI_PARAMS:
+                    replies_params.add(key, value)
+
+            annotations_search = self._build_annotations_search(params)
+
+            if combined:
+                search = partial(
+                    self._search_annotations_and_replies,
+                    annotations_search,
+                    replies_params,
+                )
+            else:
+                search = partial(self._search_annotations, annotations_search)
+
+            return self._cached(annotations_search, search)
 
     def clear(self):
         """Clear search modifiers, aggregators, and matchers."""
@@ -96,6 +159,10 @@ class Search:
 
     def _search(self, modifiers, aggregations, params):
         """Apply the modifiers, aggregations, and executes the search."""
+        return self._build_search(modifiers, aggregations, params).execute()
+
+    def _build_search(self, modifiers, aggregations, params):
+        """Apply the modifiers and aggregations to a new search."""
         # Don't return any fields, just the metadata so set _source=False.
         search = elasticsearch_dsl.Search(
             using=self.es.conn, index=self.es.index
@@ -106,24 +173,161 @@ class Search:
         for qual in modifiers:
             search = qual(search, params)
 
-        return search.execute()
+        return search
 
-    def _search_annotations(self, params):
+    def _build_annotations_search(self, params):
         # If separate_replies is True, don't return any replies to annotations.
         modifiers = self._modifiers
         if self.separate_replies:
             modifiers = [query.TopLevelAnnotationsFilter()] + modifiers
 
-        response = self._search(modifiers, self._aggregations, params)
+        return self._build_search(modifiers, self._aggregations, params)
 
+    def _parse_annotations(self, response):
         total = self._get_total_hits(response)
-        annotation_ids = [hit["_id"] for hit in response["hits"]["hits"]]
+        hits = response["hits"]["hits"]
+        annotation_ids = [hit["_id"] for hit in hits]
         aggregations = self._parse_aggregation_results(response.aggregations)
-        return (total, annotation_ids, aggregations)
+        cursors = [query.cursor(hit) for hit in hits]
+        return (total, annotation_ids, aggregations, cursors)
+
+    def _search_annotations(self, annotations_search):
+        """Search for annotations, and then for the replies to them."""
+        total, annotation_ids, aggregations, cursors = self._parse_annotations(
+            annotations_search.execute()
+        )
+        reply_total, reply_ids, reply_cursors = self._search_replies(annotation_ids)
+        return SearchResult(
+            total,
+            annotation_ids,
+            reply_ids,
+            aggregations,
+            reply_total,
+            cursors,
+            reply_cursors,
+        )
+
+    def _cached(self, annotations_search, search):
+        """
+        Return the cached results of a search, running it if they aren't cached.
+
+        :param annotations_search: the search for annotations
+        :param search: a function which runs the search and returns its
+            `SearchResult`
+        """
+        if not self._cache_results:
+            return search()
+
+        key, uris = self._cache_key(annotations_search)
+        if not key:
+            return search()
+
+        as_of = cache.index_as_of()
+        result = cache.SEARCH_RESULT_CACHE.get(key)
+        if result is None:
+            result = search()
+            cache.SEARCH_RESULT_CACHE.set(key, result, tags=uris, since=as_of)
+
+        return result
+
+    def _cache_key(self, annotations_search):
+        """
+        Return the key and URIs to cache the results of a search under.
+
+        The key is the Elasticsearch query, which includes the normalized URIs
+        and readable groups, plus the options which change the results.
+
+        :returns: a `(key, uris)` tuple, or `(None, None)` if the results of
+            the search can't be cached because it isn't on particular URIs
+        """
+        search_query = annotations_search.to_dict()
+
+        uris = cache.scope_uris(search_query)
+        if not uris:
+            return None, None
+
+        key = json.dumps(
+            [
+                self.es.index,
+                search_query,
+                self.separate_replies,
+                self._replies.limit,
+                self._replies.search_after,
+            ],
+            sort_keys=True,
+        )
+        return key, uris
+
+    def _search_annotations_and_replies(self, annotations_search, replies_params):
+        """
+        Search for annotations and the replies to them in a single request.
+
+        Replies are on the same URI as the annotation they reply to, so
+        alongside the annotations we search for all of the replies on the
+        searched for URIs, and then keep the ones which reply to the
+        annotations found. If there are too many replies on the URIs to get
+        them all at once, we fall back to searching for the replies to the
+        annotations found in a second request, as usual.
+        """
+        # MultiSearch.add() returns a copy, which pylint infers to be a Request
+        multi_search = (
+            elasticsearch_dsl.MultiSearch(  # pylint:disable=no-member
+                using=self.es.conn, index=self.es.index
+            )
+            .add(annotations_search)
+            .add(
+                self._build_search(
+                    [query.RepliesFilter()] + self._modifiers, [], replies_params
+                ).source(["references"])
+            )
+        )
+        annotations_response, replies_response = multi_search.execute()
+
+        total, annotation_ids, aggregations, cursors = self._parse_annotations(
+            annotations_response
+        )
+
+        reply_hits = replies_response["hits"]["hits"]
+        if len(reply_hits) < self._get_total_hits(replies_response):
+            reply_total, reply_ids, reply_cursors = self._search_replies(annotation_ids)
+        else:
+            ids = set(annotation_ids)
+            reply_hits = [
+                hit
+                for hit in reply_hits
+                if ids.intersection(hit["_source"]["references"])
+            ]
+            reply_ids = [hit["_id"] for hit in reply_hits]
+            reply_cursors = [query.cursor(hit) for hit in reply_hits]
+            reply_total = len(reply_ids)
+
+        return SearchResult(
+            total,
+            annotation_ids,
+            reply_ids,
+            aggregations,
+            reply_total,
+            cursors,
+            reply_cursors,
+        )
 
     def _search_replies(self, annotation_ids):
+        """
+        Return the total number of replies and a page of the replies' IDs.
+
+        Replies are sorted newest first, and by ID when they were updated at
+        the same time. If there are more replies than `replies_limit` then
+        the next page can be fetched by searching again with
+        `replies_search_after` set to the cursor of the last reply returned.
+
+        :returns: a `(total, reply_ids, reply_cursors)` tuple
+        """
         if not self.separate_replies:
-            return []
+            return 0, [], []
+
+        params = MultiDict({"limit": self._replies.limit})
+        if self._replies.search_after:
+            params["search_after"] = self._replies.search_after
 
         # The only difference between a search for annotations and a search for
         # replies to annotations is the RepliesMatcher and the params passed to
@@ -131,18 +335,15 @@ class Search:
         response = self._search(
             [query.RepliesMatcher(annotation_ids)] + self._modifiers,
             [],  # Aggregations aren't used in replies.
-            MultiDict({"limit": self._replies_limit}),
+            params,
         )
 
-        if len(response["hits"]["hits"]) < self._get_total_hits(response):
-            log.warning(
-                "The number of reply annotations exceeded the page size "
-                "of the Elasticsearch query. We currently don't handle "
-                "this, our search API doesn't support pagination of the "
-                "reply set."
-            )
-
-        return [hit["_id"] for hit in response["hits"]["hits"]]
+        hits = response["hits"]["hits"]
+        return (
+            self._get_total_hits(response),
+            [hit["_id"] for hit in hits],
+            [query.cursor(hit) for hit in hits],
+        )
 
     def _parse_aggregation_results(self, aggregations):
         if not aggregations:
@@ -162,3 +363,95 @@ class Search:
 
         # ES 7.x
         return total["value"]  # pragma: nocover
+
+
+class Count:
+    """
+    Count the annotations matching some search parameters.
+
+    This applies the same filters as `Search` but only asks Elasticsearch
+    for the number of matching annotations, with its `_count` API. It's for
+    things like the badge and annotation stats, which only need a number.
+
+    Counts for particular URIs are cached for a short time in
+    `h.search.cache.COUNT_CACHE`, keyed on the Elasticsearch query, and are
+    invalidated when an annotation on one of the URIs changes in this process.
+    Other counts (e.g. of a user's or group's annotations) aren't cached.
+
+    :param request: the request object
+    :type request: pyramid.request.Request
+
+    :param caller: The caller to tag the Elasticsearch requests with in
+        `h.search.instrumentation`.
+    :type caller: str
+    """
+
+    def __init__(self, request, caller="search"):
+        self.es = request.es
+        self._caller = caller
+        self._modifiers = _filters(request)
+
+    def run(self, params):
+        """
+        Count the annotations matching the search parameters.
+
+        Unlike `Search.run()` there is no sorting or paging, so `params`
+        shouldn't contain "limit", "offset", "sort" or "order".
+
+        :param params: the search parameters that will be popped by each of the filters.
+        :type params: webob.multidict.MultiDict
+
+        :rtype: int
+        """
+        search = elasticsearch_dsl.Search(using=self.es.conn, index=self.es.index)
+        for modifier in self._modifiers:
+            search = modifier(search, params)
+
+        count_query = search.to_dict(count=True)
+        uris = cache.scope_uris(count_query)
+        if not uris:
+            # There's no way to invalidate counts which aren't for particular
+            # URIs, so they aren't cached
+            with instrumentation.caller(self._caller):
+                return search.count()
+
+        key = json.dumps([self.es.index, count_query], sort_keys=True)
+
+        count = cache.COUNT_CACHE.get(key)
+        if count is None:
+            as_of = cache.index_as_of()
+            with instrumentation.caller(self._caller):
+                count = search.count()
+
+            cache.COUNT_CACHE.set(key, count, tags=uris, since=as_of)
+
+        return count
+
+    def clear(self):
+        """Clear the filters and matchers."""
+        self._modifiers = []
+
+    def append_modifier(self, modifier):
+        """Append a filter, matcher, etc to the count query."""
+        # Like `Search.append_modifier()`, insert new modifiers at the start
+        # so the KeyValueMatcher is still run last.
+        self._modifiers.insert(0, modifier)
+
+
+def _filters(request, separate_wildcard_uri_keys=True):
+    """Return the modifiers which select the annotations to search for."""
+    # Order matters! The KeyValueMatcher must be run last,
+    # after all other modifiers have popped off the params.
+    return [
+        query.DeletedFilter(),
+        query.AuthFilter(request),
+        query.GroupFilter(request),
+        query.UserFilter(),
+        query.HiddenFilter(request),
+        query.AnyMatcher(),
+        query.TagsMatcher(),
+        query.UriCombinedWildcardFilter(
+            request, separate_keys=separate_wildcard_uri_keys
+        ),
+        query.KeyValueMatcher(),
+    ]
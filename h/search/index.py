@@ -2,29 +2,61 @@
 
 import logging
 import time
+from itertools import islice
 
 import sqlalchemy as sa
 from elasticsearch import helpers as es_helpers
 from packaging.version import Version
-from sqlalchemy.orm import subqueryload
+from sqlalchemy.orm import selectinload
 
 from h import models, presenters
+from h.search import instrumentation
 
 log = logging.getLogger(__name__)
 
 PG_WINDOW_SIZE = 2500
 
 
+class _InContextClient:
+    """
+    The parts of an Elasticsearch client used by `parallel_bulk()`.
+
+    Bulk requests are made in the context that this was created in, whichever
+    thread they're made from.
+    """
+
+    def __init__(self, conn):
+        self.transport = conn.transport
+        self.bulk = instrumentation.in_context(conn.bulk)
+
+
 class BatchIndexer:
     """A convenience class for reindexing annotations from the database to the search index."""
 
     def __init__(  # pylint: disable=too-many-arguments
-        self, session, es_client, request, target_index=None, op_type="index"
+        self,
+        session,
+        es_client,
+        request,
+        target_index=None,
+        op_type="index",
+        chunk_size=PG_WINDOW_SIZE,
+        concurrency=1,
     ):
+        """
+        Create a new BatchIndexer.
+
+        :param chunk_size: the number of annotations to load from the DB and
+            to send to Elasticsearch at a time
+        :param concurrency: the number of bulk requests to send to
+            Elasticsearch concurrently
+        """
         self.session = session
         self.es_client = es_client
         self.request = request
         self.op_type = op_type
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
 
         # By default, index into the open index
         if target_index is None:
@@ -42,28 +74,63 @@ class BatchIndexer:
         :returns: a set of errored ids
         :rtype: set
         """
-        annotations = _filtered_annotations(session=self.session, ids=annotation_ids)
+        annotations = _filtered_annotations(
+            session=self.session, ids=annotation_ids, chunk_size=self.chunk_size
+        )
 
         # Report indexing status as we go
         annotations = _log_status(annotations, log_every=windowsize)
 
-        indexing = es_helpers.streaming_bulk(
-            self.es_client.conn,
-            annotations,
-            chunk_size=2500,
-            raise_on_error=False,
-            expand_action_callback=self._prepare,
-        )
-        errored = set()
-        for ok, item in indexing:
-            if not ok:
-                status = item[self.op_type]
+        return self.index_annotations(annotations)
+
+    def index_annotations(self, annotations):
+        """
+        Index already loaded annotations.
 
-                was_doc_exists_err = "document already exists" in status["error"]
-                if self.op_type == "create" and was_doc_exists_err:
-                    continue
+        The annotations should be loaded with `eager_loaded_annotations()`,
+        otherwise presenting them for the index will need several queries per
+        annotation. They are presented for the index a chunk at a time.
 
-                errored.add(status["_id"])
+        :param annotations: an iterable of annotations to index
+
+        :returns: a set of errored ids
+        :rtype: set
+        """
+        annotations = self._presented(annotations)
+
+        errored = set()
+        with instrumentation.caller("indexer"):
+            if self.concurrency > 1:
+                # The annotations are still read and presented in order by
+                # parallel_bulk(), only the requests to Elasticsearch are
+                # concurrent. They're sent from parallel_bulk()'s own threads,
+                # so the client takes the caller to them.
+                indexing = es_helpers.parallel_bulk(
+                    _InContextClient(self.es_client.conn),
+                    annotations,
+                    thread_count=self.concurrency,
+                    chunk_size=self.chunk_size,
+                    raise_on_error=False,
+                    expand_action_callback=self._prepare,
+                )
+            else:
+                indexing = es_helpers.streaming_bulk(
+                    self.es_client.conn,
+                    annotations,
+                    chunk_size=self.chunk_size,
+                    raise_on_error=False,
+                    expand_action_callback=self._prepare,
+                )
+
+            for ok, item in indexing:
+                if not ok:
+                    status = item[self.op_type]
+
+                    was_doc_exists_err = "document already exists" in status["error"]
+                    if self.op_type == "create" and was_doc_exists_err:
+                        continue
+
+                    errored.add(status["_id"])
         return errored
 
     def delete(self, annotation_ids: list[str]) -> None:
@@ -93,18 +160,32 @@ class BatchIndexer:
                 }
                 for annotation_id in annotation_ids
             ],
-            chunk_size=2500,
+            chunk_size=self.chunk_size,
             raise_on_error=False,
         )
 
-        for _ok, _item in results:
-            # We aren't doing anything with the results yet
-            # (but we still need this loop here to consume the `results`
-            # generator, otherwise the requests don't actually get sent to
-            # Elasticsearch).
-            pass
-
-    def _prepare(self, annotation):
+        with instrumentation.caller("indexer"):
+            for _ok, _item in results:
+                # We aren't doing anything with the results yet
+                # (but we still need this loop here to consume the `results`
+                # generator, otherwise the requests don't actually get sent to
+                # Elasticsearch).
+                pass
+
+    def _presented(self, annotations):
+        """Yield `(annotation, data)` tuples, presenting a chunk at a time."""
+        annotations = iter(annotations)
+
+        while chunk := list(islice(annotations, self.chunk_size)):
+            yield from zip(
+                chunk,
+                presenters.AnnotationsSearchIndexPresenter(
+                    chunk, self.request
+                ).asdicts(),
+            )
+
+    def _prepare(self, annotation_and_data):
+        annotation, data = annotation_and_data
         operation = {
             "_index": self._target_index,
             "_id": annotation.id,
@@ -112,39 +193,45 @@ class BatchIndexer:
         if self.es_client.server_version < Version("7.0.0"):  # pragma: no cover
             operation["_type"] = self.es_client.mapping_type
 
-        data = presenters.AnnotationSearchIndexPresenter(
-            annotation, self.request
-        ).asdict()
-
         return {self.op_type: operation}, data
 
 
-def _filtered_annotations(session, ids):
-    annotations = (
-        _eager_loaded_annotations(session)
-        .execution_options(stream_results=True)
-        .filter(_annotation_filter())
-        .filter(models.Annotation.id.in_(ids))
-    )
+def eager_loaded_annotations(session):
+    """
+    Return a query for annotations with everything needed to index them.
 
-    yield from annotations
+    The related objects are loaded with `selectinload()`, which loads each
+    relationship for a whole batch of annotations with a single
+    `WHERE ... IN (<primary keys>)` query. Unlike `subqueryload()` this
+    doesn't re-run the original query for every relationship and works with
+    `yield_per()`.
+
+    The annotations' threads and moderation aren't loaded here, as
+    `AnnotationsSearchIndexPresenter` looks them up for a whole chunk at once.
+    """
+    return session.query(models.Annotation).options(
+        selectinload(models.Annotation.document).selectinload(
+            models.Document.document_uris
+        ),
+        selectinload(models.Annotation.document).selectinload(models.Document.meta),
+    )
 
 
-def _annotation_filter():
+def annotation_filter():
     """Set the default filter for all search indexing operations."""
     return sa.not_(models.Annotation.deleted)
 
 
-def _eager_loaded_annotations(session):
-    return session.query(models.Annotation).options(
-        subqueryload(models.Annotation.document).subqueryload(
-            models.Document.document_uris
-        ),
-        subqueryload(models.Annotation.document).subqueryload(models.Document.meta),
-        subqueryload(models.Annotation.moderation),
-        subqueryload(models.Annotation.thread).load_only(models.Annotation.id),
+def _filtered_annotations(session, ids, chunk_size):
+    annotations = (
+        eager_loaded_annotations(session)
+        .filter(annotation_filter())
+        .filter(models.Annotation.id.in_(ids))
+        .yield_per(chunk_size)
     )
 
+    yield from annotations
+
 
 def _log_status(stream, log_every=1000):
     i = 0
@@ -0,0 +1,203 @@
+"""
+Instrumentation of the requests we make to Elasticsearch.
+
+The Elasticsearch client is created with `InstrumentedTransport` and
+`InstrumentedConnection`, which record how long each request takes, the
+`took` time reported by Elasticsearch, how long we wait to check out a
+connection from the pool, how many times requests are retried and how big the
+request and response bodies are.
+
+The data is tagged with the caller which made the request, which is set with
+the `caller()` context manager (e.g. "search", "badge", "stats", "sync" or
+"indexer"). It's kept in memory per process since it started and can be read
+with `report()`.
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from time import perf_counter
+
+from elasticsearch import Transport, Urllib3HttpConnection
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+
+from h.util.metrics import DURATION_BUCKETS, Histogram
+
+# Upper bounds of the histogram buckets for request and response sizes (bytes)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+# The caller used for requests made outside of a `caller()` block
+DEFAULT_CALLER = "other"
+
+_caller = ContextVar("elasticsearch_caller", default=DEFAULT_CALLER)
+_attempts = ContextVar("elasticsearch_attempts", default=0)
+
+_lock = threading.Lock()
+_counters = Counter()
+_histograms = {}
+
+
+@contextmanager
+def caller(name):
+    """Tag the Elasticsearch requests made in the wrapped block with `name`."""
+    token = _caller.set(name)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def in_context(func):
+    """
+    Return a wrapper which calls `func` in a copy of the current context.
+
+    Threads don't inherit the context they were started from, so this is
+    needed to tag requests made from other threads (e.g. by
+    `elasticsearch.helpers.parallel_bulk()`) with the current caller.
+    """
+    context = copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def report():
+    """
+    Get a JSON serializable report of the data recorded in this process.
+
+    :returns: A dict of callers, each with a dict of counters and histograms
+        by name
+    """
+    with _lock:
+        report_ = {}
+        for (caller_, name), count in sorted(_counters.items()):
+            report_.setdefault(caller_, {})[name] = count
+        for (caller_, name), histogram in sorted(_histograms.items()):
+            report_.setdefault(caller_, {})[name] = histogram.asdict()
+
+        return report_
+
+
+def reset():
+    """Clear all of the recorded data."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _increment(name, value=1):
+    with _lock:
+        _counters[(_caller.get(), name)] += value
+
+
+def _observe(name, value, buckets=DURATION_BUCKETS):
+    key = (_caller.get(), name)
+    with _lock:
+        try:
+            histogram = _histograms[key]
+        except KeyError:
+            histogram = _histograms[key] = Histogram(buckets)
+
+        histogram.observe(value)
+
+
+@contextmanager
+def _recorded_request():
+    """Record the time taken, retries and any error of the wrapped request."""
+    token = _attempts.set(0)
+    start = perf_counter()
+    try:
+        yield
+    except Exception:
+        _increment("errors")
+        raise
+    finally:
+        _observe("latency", perf_counter() - start)
+        _increment("requests")
+        # The transport gets a connection from the pool for each attempt
+        _increment("retries", max(_attempts.get() - 1, 0))
+        _attempts.reset(token)
+
+
+class InstrumentedTransport(Transport):
+    """A transport which records the time taken and retries per request."""
+
+    def perform_request(self, method, url, *args, **kwargs):
+        with _recorded_request():
+            result = super().perform_request(method, url, *args, **kwargs)
+
+        if isinstance(result, dict) and "took" in result:
+            _observe("took", result["took"] / 1000)
+
+        return result
+
+    def get_connection(self):
+        _attempts.set(_attempts.get() + 1)
+        return super().get_connection()
+
+
+class _InstrumentedPoolMixin:
+    """Records how long it takes to check out a connection from the pool."""
+
+    def _get_conn(self, timeout=None):
+        start = perf_counter()
+        try:
+            return super()._get_conn(timeout=timeout)
+        finally:
+            _observe("pool_wait", perf_counter() - start)
+
+
+class InstrumentedHTTPConnectionPool(_InstrumentedPoolMixin, HTTPConnectionPool):
+    """An HTTP connection pool which records pool checkout times."""
+
+
+class InstrumentedHTTPSConnectionPool(_InstrumentedPoolMixin, HTTPSConnectionPool):
+    """An HTTPS connection pool which records pool checkout times."""
+
+
+_INSTRUMENTED_POOLS = {
+    HTTPConnectionPool: InstrumentedHTTPConnectionPool,
+    HTTPSConnectionPool: InstrumentedHTTPSConnectionPool,
+}
+
+
+class InstrumentedConnection(Urllib3HttpConnection):
+    """A connection which records pool checkout times and payload sizes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # `Urllib3HttpConnection` creates its pool itself and doesn't let us
+        # choose the class, so switch it to the instrumented subclass.
+        self.pool.__class__ = _INSTRUMENTED_POOLS[type(self.pool)]
+
+    def perform_request(  # pylint:disable=too-many-arguments
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+    ):
+        _observe("request_bytes", len(body or b""), buckets=SIZE_BUCKETS)
+
+        status, headers, data = super().perform_request(
+            method,
+            url,
+            params=params,
+            body=body,
+            timeout=timeout,
+            ignore=ignore,
+            headers=headers,
+        )
+
+        _observe("response_bytes", len(data or ""), buckets=SIZE_BUCKETS)
+        return status, headers, data
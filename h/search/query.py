@@ -15,6 +15,9 @@ LIMIT_MAX = 200
 OFFSET_MAX = 9800
 DEFAULT_DATE = dt(1970, 1, 1, 0, 0, 0, 0).replace(tzinfo=tz.tzutc())
 
+# A value which sorts after every annotation ID
+_ID_MAX = "\uffff"
+
 
 def popall(multidict, key):
     """Pop and return all values of the key in multidict."""
@@ -88,7 +91,9 @@ class Sorter:
     and the order (the order in which to sort by).
 
     Returns annotations after search_after. search_after
-    must be the value of the annotation's sort field.
+    must be the value of the annotation's sort field, or a cursor from
+    `cursor()` which also says where to continue among the annotations
+    which share that value.
     """
 
     def __call__(self, search, params):
@@ -96,21 +101,20 @@ class Sorter:
         # Sorting must be done on non-analyzed fields.
         if sort_by == "user":
             sort_by = "user_raw"
+        order = params.pop("order", "desc")
 
         # Since search_after depends on the field that the annotations are
         # being sorted by, it is set here rather than in a separate class.
-        search_after = params.pop("search_after", None)
-        if search_after:
+        search_after, tiebreaker = None, None
+        if value := params.pop("search_after", None):
+            search_after, _, tiebreaker = str(value).partition(",")
             if sort_by in ["updated", "created"]:
                 search_after = self._parse_date(search_after)
 
-        if search_after:
-            search = search.extra(search_after=[search_after])
-
-        return search.sort(
+        sort = [
             {
                 sort_by: {
-                    "order": params.pop("order", "desc"),
+                    "order": order,
                     # `unmapped_type` causes unknown fields specified as arguments to
                     # `sort` behave as if all documents contained empty values of the
                     # given type. Without this, specifying eg. `sort=foobar` throws
@@ -121,7 +125,20 @@ class Sorter:
                     "unmapped_type": "boolean",
                 }
             }
-        )
+        ]
+        # Annotations with the same sort value are sorted by ID, so a cursor
+        # can say where to continue among them.
+        if sort_by != "id":
+            sort.append({"id": {"order": order}})
+
+        if search_after:
+            # A plain search_after value skips all of the annotations with that
+            # value, so it continues after the last possible ID
+            if not tiebreaker:
+                tiebreaker = _ID_MAX if order == "asc" else ""
+            search = search.extra(search_after=[search_after, tiebreaker][: len(sort)])
+
+        return search.sort(*sort)
 
     @staticmethod
     def _parse_date(str_value):
@@ -150,6 +167,16 @@ class Sorter:
         return None
 
 
+def cursor(hit):
+    """
+    Return a `search_after` value for the results which come after `hit`.
+
+    This is the hit's sort values, so it's only meaningful for searches with
+    the same sort and order as the one which returned `hit`.
+    """
+    return ",".join(str(value) for value in hit["sort"])
+
+
 class TopLevelAnnotationsFilter:
     """Matches top-level annotations only, filters out replies."""
 
@@ -157,6 +184,13 @@ class TopLevelAnnotationsFilter:
         return search.exclude("exists", field="references")
 
 
+class RepliesFilter:
+    """Matches replies only, filters out top-level annotations."""
+
+    def __call__(self, search, _):
+        return search.filter("exists", field="references")
+
+
 class AuthorityFilter:
     """Match annotations created by users belonging to a specific authority."""
 
@@ -293,9 +327,7 @@ class UriCombinedWildcardFilter:
 
     def _normalize_uris(self, query_uris, normalize_method=uri.normalize):
         uris = set()
-        for query_uri in query_uris:
-            expanded = storage.expand_uri(self.request.db, query_uri)
-
+        for expanded in storage.expand_uris(self.request.db, query_uris).values():
             uris.update([normalize_method(uri) for uri in expanded])
         return list(uris)
 
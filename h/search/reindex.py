@@ -0,0 +1,200 @@
+"""
+Rebuild the search index from the database.
+
+A reindex creates a new index, copies every annotation into it and then
+atomically moves the index alias over to it. While it is running
+`SearchIndexService` writes changes to both the live index and the new one, so
+the new index is up to date when the alias is moved.
+
+The annotations are split into `PARTITIONS` ranges of IDs which can be indexed
+in parallel. Progress through each partition is checkpointed in the `setting`
+table so that a reindex which crashes or is interrupted can be resumed by
+running it again.
+"""
+
+import logging
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from h import models
+from h.db.types import URLSafeUUID
+from h.search import config
+from h.search.index import (
+    PG_WINDOW_SIZE,
+    BatchIndexer,
+    annotation_filter,
+    eager_loaded_annotations,
+)
+from h.services.search_index import SearchIndexService
+
+log = logging.getLogger(__name__)
+
+#: The number of ranges of annotation IDs that a reindex is split into
+PARTITIONS = 64
+
+#: The setting that stores the progress through a partition
+CHECKPOINT_SETTING_KEY = "reindex.checkpoint.{partition}"
+
+#: The checkpoint value of a partition that has been completely indexed
+DONE = "done"
+
+# The annotation ID as the hex UUID stored in the DB, rather than the URL-safe
+# version exposed by the model. Partitions and checkpoints are ranges of these
+# so that they compare in the same order as the primary key index.
+_RAW_ID = sa.type_coerce(models.Annotation.id, postgresql.UUID(as_uuid=False))
+
+
+def partition_range(partition):
+    """
+    Return the range of raw annotation IDs covered by `partition`.
+
+    Annotation IDs are generated by `uuid_generate_v1mc()` and are spread
+    evenly enough across the UUID space that splitting it into equal ranges
+    gives similarly sized partitions.
+
+    :returns: A `(start, end)` tuple of UUIDs where `start` is inclusive and
+        `end` is exclusive, or `None` for the last partition
+    """
+    step = 2**128 // PARTITIONS
+    range_start = str(uuid.UUID(int=partition * step))
+
+    if partition == PARTITIONS - 1:
+        return range_start, None
+
+    return range_start, str(uuid.UUID(int=(partition + 1) * step))
+
+
+def start(request):
+    """
+    Start a reindex, or find the reindex which is already in progress.
+
+    :returns: The name of the index being reindexed into
+    """
+    settings = request.find_service(name="settings")
+
+    new_index = settings.get(SearchIndexService.REINDEX_SETTING_KEY)
+    if new_index:
+        log.info("Resuming reindex into %s", new_index)
+        return new_index
+
+    new_index = config.configure_index(request.es)
+    settings.put(SearchIndexService.REINDEX_SETTING_KEY, new_index)
+    request.tm.commit()
+    request.tm.begin()
+
+    log.info("Started reindex into %s", new_index)
+    return new_index
+
+
+def index_partition(
+    request, new_index, partition, chunk_size=PG_WINDOW_SIZE, concurrency=1
+):
+    """
+    Index all of the annotations in a partition into `new_index`.
+
+    The partition's checkpoint is advanced after each chunk of annotations is
+    indexed. Indexing starts from the checkpoint, so a partition which was
+    interrupted continues where it stopped and a finished one is skipped.
+
+    If any annotations in a chunk fail to index then the partition stops
+    without advancing its checkpoint past that chunk, so they will be retried
+    when the reindex is resumed.
+
+    :returns: The set of IDs of annotations which failed to index
+    """
+    settings = request.find_service(name="settings")
+    checkpoint_key = CHECKPOINT_SETTING_KEY.format(partition=partition)
+    checkpoint = settings.get(checkpoint_key)
+
+    if checkpoint == DONE:
+        return set()
+
+    range_start, range_end = partition_range(partition)
+    indexer = BatchIndexer(
+        request.db,
+        request.es,
+        request,
+        target_index=new_index,
+        op_type="create",
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+    )
+
+    while True:
+        query = (
+            eager_loaded_annotations(request.db)
+            .filter(annotation_filter())
+            .filter(_RAW_ID >= range_start)
+        )
+        if range_end:
+            query = query.filter(_RAW_ID < range_end)
+        if checkpoint:
+            query = query.filter(_RAW_ID > checkpoint)
+
+        annotations = query.order_by(_RAW_ID).limit(chunk_size).all()
+        if not annotations:
+            break
+
+        errored = indexer.index_annotations(annotations)
+        if errored:
+            log.warning(
+                "Failed to index %d annotations in partition %d",
+                len(errored),
+                partition,
+            )
+            return errored
+
+        checkpoint = URLSafeUUID.url_safe_to_hex(annotations[-1].id)
+        _checkpoint(request, checkpoint_key, checkpoint)
+
+    _checkpoint(request, checkpoint_key, DONE)
+    return set()
+
+
+def finish(request):
+    """
+    Point the index alias at the new index and delete the old one.
+
+    Raises `RuntimeError` if there is no reindex in progress or if any of the
+    partitions haven't been completely indexed yet.
+
+    :returns: The name of the new index
+    """
+    settings = request.find_service(name="settings")
+
+    new_index = settings.get(SearchIndexService.REINDEX_SETTING_KEY)
+    if not new_index:
+        raise RuntimeError("There is no reindex in progress.")
+
+    checkpoint_keys = [
+        CHECKPOINT_SETTING_KEY.format(partition=partition)
+        for partition in range(PARTITIONS)
+    ]
+    unfinished = [key for key in checkpoint_keys if settings.get(key) != DONE]
+    if unfinished:
+        raise RuntimeError(
+            f"Cannot finish the reindex into {new_index}: "
+            f"{len(unfinished)} partitions haven't been indexed."
+        )
+
+    old_index = config.get_aliased_index(request.es)
+    config.update_aliased_index(request.es, new_index)
+
+    settings.delete(SearchIndexService.REINDEX_SETTING_KEY)
+    for key in checkpoint_keys:
+        settings.delete(key)
+    request.tm.commit()
+    request.tm.begin()
+
+    config.delete_index(request.es, old_index)
+
+    log.info("Finished reindex into %s, deleted %s", new_index, old_index)
+    return new_index
+
+
+def _checkpoint(request, key, value):
+    request.find_service(name="settings").put(key, value)
+    request.tm.commit()
+    request.tm.begin()
@@ -9,7 +9,7 @@ from h.services.flag import FlagService
 from h.services.links import LinksService
 from h.services.user import UserService
 from h.session import user_info
-from h.traversal import AnnotationContext
+from h.traversal import AnnotationContext, GroupContext
 from h.util.datetime import utc_iso8601
 
 
@@ -47,39 +47,23 @@ class AnnotationJSONService:
         :param annotation: Annotation to present
         :return: A dict suitable for JSON serialisation
         """
-        model = deepcopy(annotation.extra) or {}
-
-        model.update(
-            {
-                "id": annotation.id,
-                "created": utc_iso8601(annotation.created),
-                "updated": utc_iso8601(annotation.updated),
-                "user": annotation.userid,
-                "uri": annotation.target_uri,
-                "text": annotation.text or "",
-                "tags": annotation.tags or [],
-                "group": annotation.groupid,
-                #  Convert our simple internal annotation storage format into the
-                #  legacy complex permissions dict format that is still used in
-                #  some places.
-                "permissions": {
-                    "read": [self._get_read_permission(annotation)],
-                    "admin": [annotation.userid],
-                    "update": [annotation.userid],
-                    "delete": [annotation.userid],
-                },
-                "target": annotation.target,
-                "document": DocumentJSONPresenter(annotation.document).asdict(),
-                "links": self._links_service.get_all(annotation),
-            }
+        # If the annotation's group is the public group, or an unauthorized
+        # person could read the annotation, then the annotation is world
+        # readable.
+        readable_by_world = annotation.shared and (
+            annotation.groupid == "__world__"
+            or identity_permits(
+                identity=None,
+                context=AnnotationContext(annotation),
+                permission=Permission.Annotation.READ,
+            )
         )
 
-        model.update(user_info(self._user_service.fetch(annotation.userid)))
-
-        if annotation.references:
-            model["references"] = annotation.references
-
-        return model
+        return self._present(
+            annotation,
+            model=deepcopy(annotation.extra) or {},
+            readable_by_world=readable_by_world,
+        )
 
     def present_for_user(self, annotation: Annotation, user: User):
         """
@@ -96,32 +80,13 @@ class AnnotationJSONService:
         # Get the basic version which isn't user specific
         model = self.present(annotation)
 
-        # The flagged value depends on whether this particular user has flagged
-        model["flagged"] = self._flag_service.flagged(user=user, annotation=annotation)
-
-        # Only moderators see the full flag count
         user_is_moderator = identity_permits(
             identity=Identity.from_models(user=user),
             context=AnnotationContext(annotation),
             permission=Permission.Annotation.MODERATE,
         )
-        if user_is_moderator:
-            model["moderation"] = {
-                "flagCount": self._flag_service.flag_count(annotation)
-            }
 
-        # The hidden value depends on whether you are the author
-        user_is_author = user and user.userid == annotation.userid
-        if user_is_author or not annotation.is_hidden:
-            model["hidden"] = False
-        else:
-            model["hidden"] = True
-
-            # Non moderators have bad content hidden from them
-            if not user_is_moderator:
-                model.update({"text": "", "tags": []})
-
-        return model
+        return self._present_for_user(model, annotation, user, user_is_moderator)
 
     def present_all_for_user(self, annotation_ids, user: User):
         """
@@ -147,31 +112,134 @@ class AnnotationJSONService:
                 Annotation.document,
                 # Optimise the check used for "hidden" above
                 Annotation.moderation,
-                # Optimise the permissions check for MODERATE permissions,
-                # which ultimately depends on group permissions, causing a
-                # group lookup for every annotation without this
+                # Optimise the permissions checks, which depend on the group
                 Annotation.group,
             ],
         )
 
-        # Optimise the user service `fetch()` call
-        self._user_service.fetch_all([annotation.userid for annotation in annotations])
+        # Optimise the user service `fetch_user_info()` calls
+        self._user_service.fetch_all_user_info(
+            [annotation.userid for annotation in annotations]
+        )
+
+        identity = Identity.from_models(user=user)
+        # Whether the group is readable by world and moderated by the user, by
+        # group ID
+        group_permissions = {}
+
+        models = []
+        for annotation in annotations:
+            # The READ and MODERATE permissions for a live, shared annotation
+            # are those of its group, so we only check them once per group
+            # rather than walking the permission predicates per annotation.
+            try:
+                group_readable_by_world, group_moderator = group_permissions[
+                    annotation.groupid
+                ]
+            except KeyError:
+                context = GroupContext(annotation.group)
+                group_readable_by_world, group_moderator = group_permissions[
+                    annotation.groupid
+                ] = (
+                    identity_permits(
+                        identity=None,
+                        context=context,
+                        permission=Permission.Group.READ,
+                    ),
+                    identity_permits(
+                        identity=identity,
+                        context=context,
+                        permission=Permission.Group.MODERATE,
+                    ),
+                )
+
+            live_and_shared = annotation.shared and not annotation.deleted
+
+            model = self._present(
+                annotation,
+                # The models are serialised straight away, so they can share
+                # the nested values of `extra` rather than deep copying it
+                model=dict(annotation.extra or {}),
+                readable_by_world=annotation.shared
+                and (
+                    annotation.groupid == "__world__"
+                    or (live_and_shared and group_readable_by_world)
+                ),
+            )
+            models.append(
+                self._present_for_user(
+                    model,
+                    annotation,
+                    user,
+                    user_is_moderator=live_and_shared and group_moderator,
+                )
+            )
+
+        return models
+
+    def _present(self, annotation, model, readable_by_world):
+        model.update(
+            {
+                "id": annotation.id,
+                "created": utc_iso8601(annotation.created),
+                "updated": utc_iso8601(annotation.updated),
+                "user": annotation.userid,
+                "uri": annotation.target_uri,
+                "text": annotation.text or "",
+                "tags": annotation.tags or [],
+                "group": annotation.groupid,
+                #  Convert our simple internal annotation storage format into the
+                #  legacy complex permissions dict format that is still used in
+                #  some places.
+                "permissions": {
+                    "read": [self._get_read_permission(annotation, readable_by_world)],
+                    "admin": [annotation.userid],
+                    "update": [annotation.userid],
+                    "delete": [annotation.userid],
+                },
+                "target": annotation.target,
+                "document": DocumentJSONPresenter(annotation.document).asdict(),
+                "links": self._links_service.get_all(annotation),
+            }
+        )
 
-        return [self.present_for_user(annotation, user) for annotation in annotations]
+        model.update(user_info(self._user_service.fetch_user_info(annotation.userid)))
+
+        if annotation.references:
+            model["references"] = annotation.references
 
-    @classmethod
-    def _get_read_permission(cls, annotation):
+        return model
+
+    def _present_for_user(self, model, annotation, user, user_is_moderator):
+        # The flagged value depends on whether this particular user has flagged
+        model["flagged"] = self._flag_service.flagged(user=user, annotation=annotation)
+
+        # Only moderators see the full flag count
+        if user_is_moderator:
+            model["moderation"] = {
+                "flagCount": self._flag_service.flag_count(annotation)
+            }
+
+        # The hidden value depends on whether you are the author
+        user_is_author = user and user.userid == annotation.userid
+        if user_is_author or not annotation.is_hidden:
+            model["hidden"] = False
+        else:
+            model["hidden"] = True
+
+            # Non moderators have bad content hidden from them
+            if not user_is_moderator:
+                model.update({"text": "", "tags": []})
+
+        return model
+
+    @staticmethod
+    def _get_read_permission(annotation, readable_by_world):
         if not annotation.shared:
             # It's not shared so only the owner can read it
             return annotation.userid
 
-        # If the annotation's group is the public group, or an unauthorized person could
-        # read the annotation, then the annotation is world readable.
-        if annotation.groupid == "__world__" or identity_permits(
-            identity=None,
-            context=AnnotationContext(annotation),
-            permission=Permission.Annotation.READ,
-        ):
+        if readable_by_world:
             return "group:__world__"
 
         # Only people in the group can read it
@@ -1,7 +1,7 @@
 from typing import Iterable, List, Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Query, Session, subqueryload
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
 
 from h.db.types import InvalidUUID
 from h.models import Annotation
@@ -30,6 +30,10 @@ class AnnotationReadService:
         """
         Get annotations in the same order as the provided ids.
 
+        Relationships to a single object (like `Annotation.document`) are
+        eager loaded by joining them onto the annotations query and
+        collections with one extra query each.
+
         :param ids: the list of annotation ids
         :param eager_load: A list of annotation relationships to eager load
             like `Annotation.document`
@@ -42,7 +46,7 @@ class AnnotationReadService:
             self._annotation_search_query(ids=ids, eager_load=eager_load)
         ).scalars()
 
-        return sorted(annotations, key=lambda annotation: ids.index(annotation.id))
+        return _in_order(ids, annotations)
 
     @staticmethod
     def _annotation_search_query(
@@ -54,11 +58,25 @@ class AnnotationReadService:
         query = query.where(Annotation.id.in_(ids))
 
         if eager_load:
-            query = query.options(*(subqueryload(prop) for prop in eager_load))
+            query = query.options(
+                *(
+                    selectinload(prop) if prop.property.uselist else joinedload(prop)
+                    for prop in eager_load
+                )
+            )
 
         return query
 
 
+def _in_order(ids, annotations):
+    """Return annotations in the order of `ids`."""
+    positions = {}
+    for position, id_ in enumerate(ids):
+        positions.setdefault(id_, position)
+
+    return sorted(annotations, key=lambda annotation: positions[annotation.id])
+
+
 def service_factory(_context, request) -> AnnotationReadService:
     """Get an annotation service instance."""
 
@@ -1,9 +1,8 @@
 from webob.multidict import MultiDict
 
 from h.search import (
+    Count,
     DeletedFilter,
-    Limiter,
-    Search,
     SharedAnnotationsFilter,
     TopLevelAnnotationsFilter,
     UserFilter,
@@ -23,8 +22,7 @@ class AnnotationStatsService:
         If the logged in user has this userid, private annotations will be
         included in this count, otherwise they will not.
         """
-        params = MultiDict({"limit": 0, "user": userid})
-        return self._search(params)
+        return self._count_top_level(MultiDict({"user": userid}))
 
     def total_user_annotation_count(self, userid):
         """
@@ -33,21 +31,16 @@ class AnnotationStatsService:
         This disregards permissions, private/public, etc and returns the
         total number of annotations the user has made (including replies).
         """
-        params = MultiDict({"limit": 0, "user": userid})
+        count = Count(self.request, caller="stats")
+        count.clear()
+        count.append_modifier(DeletedFilter())
+        count.append_modifier(UserFilter())
 
-        search = Search(self.request)
-        search.clear()
-        search.append_modifier(Limiter())
-        search.append_modifier(DeletedFilter())
-        search.append_modifier(UserFilter())
-
-        search_result = search.run(params)
-        return search_result.total
+        return count.run(MultiDict({"user": userid}))
 
     def group_annotation_count(self, pubid):
         """Return the count of searchable top level annotations for this group."""
-        params = MultiDict({"limit": 0, "group": pubid})
-        return self._search(params)
+        return self._count_top_level(MultiDict({"group": pubid}))
 
     def total_group_annotation_count(self, pubid, unshared=True):
         """
@@ -62,17 +55,16 @@ class AnnotationStatsService:
         If `unshared=False` then no unshared annotations or replies will be
         counted, not even ones from the authenticated user.
         """
-        search = Search(self.request)
+        count = Count(self.request, caller="stats")
         if not unshared:
-            search.append_modifier(SharedAnnotationsFilter())
-        return search.run(MultiDict({"limit": 0, "group": pubid})).total
+            count.append_modifier(SharedAnnotationsFilter())
+        return count.run(MultiDict({"group": pubid}))
 
-    def _search(self, params):
-        search = Search(self.request)
-        search.append_modifier(TopLevelAnnotationsFilter())
+    def _count_top_level(self, params):
+        count = Count(self.request, caller="stats")
+        count.append_modifier(TopLevelAnnotationsFilter())
 
-        search_result = search.run(params)
-        return search_result.total
+        return count.run(params)
 
 
 def annotation_stats_factory(_context, request):
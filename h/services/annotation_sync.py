@@ -4,6 +4,7 @@ from dateutil.parser import isoparse
 
 from h.db.types import URLSafeUUID
 from h.models import Annotation, Job
+from h.search import instrumentation
 from h.search.index import BatchIndexer
 
 
@@ -163,14 +164,15 @@ class ESHelper:
         if not annotation_ids:
             return {}
 
-        hits = self._es.conn.search(
-            body={
-                "_source": ["updated", "user"],
-                "query": {"ids": {"values": list(annotation_ids)}},
-                "size": len(annotation_ids),
-            },
-            index=self._es.index,
-        )["hits"]["hits"]
+        with instrumentation.caller("sync"):
+            hits = self._es.conn.search(
+                body={
+                    "_source": ["updated", "user"],
+                    "query": {"ids": {"values": list(annotation_ids)}},
+                    "size": len(annotation_ids),
+                },
+                index=self._es.index,
+            )["hits"]["hits"]
 
         for hit in hits:
             updated = hit["_source"].get("updated")
@@ -8,7 +8,7 @@ from h_api.exceptions import (
     ConflictingDataError,
     UnsupportedOperationError,
 )
-from sqlalchemy import text
+from sqlalchemy import text, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError, ProgrammingError
 from zope.sqlalchemy import mark_changed
@@ -202,6 +202,13 @@ class GroupMembershipCreateAction(DBAction):
 
             raise
 
+        # Invalidate the users' cached readable groups (see `GroupService`)
+        self._execute_statement(
+            update(User)
+            .where(User.id.in_({value["user_id"] for value in values}))
+            .values(memberships_version=User.memberships_version + 1)
+        )
+
         return [Report(id_) for (id_,) in membership_rows]
 
 
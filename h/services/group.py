@@ -1,9 +1,66 @@
 import sqlalchemy as sa
-from sqlalchemy import literal_column, select, union
+from sqlalchemy import select
 
 from h.models import Group, GroupMembership
 from h.models.group import ReadableBy
 from h.util import group as group_util
+from h.util.cache import TTLCache
+
+# How long (in seconds) the list of world-readable groups is cached for. It's
+# cached per process, so it can take this long for groups created or changed
+# by other processes to be noticed.
+WORLD_READABLE_GROUPS_TTL = 60
+
+# How long (in seconds) each user's list of members-readable groups is cached
+# for, and for how many users at most. These entries are keyed on the user's
+# `memberships_version`, so they're never stale, even across processes.
+MEMBER_READABLE_GROUPS_TTL = 600
+MEMBER_READABLE_GROUPS_CACHE_SIZE = 10000
+
+
+class ReadableGroupsCache:
+    """
+    A cache of the pubids of the groups users can read.
+
+    The world-readable groups are the same for everyone, and are cached for
+    `world_ttl` seconds. The members-readable groups a user is a member of
+    are cached in an LRU cache whose entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize, ttl, world_ttl):
+        self._world = TTLCache(maxsize=1, ttl=world_ttl)
+        # (User ID, memberships version) to pubids
+        self._members = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get_world(self):
+        """Get the world-readable pubids, or None if they aren't cached."""
+        return self._world.get("world")
+
+    def set_world(self, pubids):
+        self._world.set("world", pubids)
+
+    def invalidate_world(self):
+        """Forget the world-readable pubids, e.g. when a group is created."""
+        self._world.clear()
+
+    def get_member(self, key):
+        """Get the members-readable pubids for `key`, or None if there are none."""
+        return self._members.get(key)
+
+    def set_member(self, key, pubids):
+        """
+        Cache the members-readable pubids for a user.
+
+        :param key: a `(user.id, user.memberships_version)` tuple
+        """
+        self._members.set(key, pubids)
+
+
+READABLE_GROUPS_CACHE = ReadableGroupsCache(
+    maxsize=MEMBER_READABLE_GROUPS_CACHE_SIZE,
+    ttl=MEMBER_READABLE_GROUPS_TTL,
+    world_ttl=WORLD_READABLE_GROUPS_TTL,
+)
 
 
 class GroupService:
@@ -84,36 +141,60 @@ class GroupService:
         world-readable groups.
 
         If `group_ids` is specified, only the subset of groups from that list is
-        returned. This is more efficient if the caller wants to know which
-        groups from a specific list are readable by the user.
+        returned.
+
+        The pubids are cached in `READABLE_GROUPS_CACHE`, so this doesn't
+        usually need to query the DB. They're returned sorted, so equivalent
+        searches are turned into identical Elasticsearch queries.
 
         :type user: `h.models.user.User`
         """
-        # Very few groups are readable by world, query those separately
-        readable_by_world_query = select(Group.pubid).where(
-            Group.readable_by == ReadableBy.world
-        )
-        query = readable_by_world_query
-
+        pubids = self._world_readable_groupids()
         if user is not None:
-            user_is_member_query = (
+            pubids = pubids + self.private_groupids(user)
+
+        if group_ids:
+            group_ids = set(group_ids)
+            pubids = [pubid for pubid in pubids if pubid in group_ids]
+
+        return sorted(pubids)
+
+    def _world_readable_groupids(self):
+        pubids = READABLE_GROUPS_CACHE.get_world()
+
+        if pubids is None:
+            pubids = self.session.scalars(
+                select(Group.pubid).where(Group.readable_by == ReadableBy.world)
+            ).all()
+            READABLE_GROUPS_CACHE.set_world(pubids)
+
+        return pubids
+
+    def private_groupids(self, user):
+        """
+        Return the pubids of the private groups the user is a member of.
+
+        These are the groups only their members can read. The pubids are
+        cached in `READABLE_GROUPS_CACHE` until the user's memberships, or who
+        can read one of their groups, change.
+
+        :type user: `h.models.user.User`
+        """
+        key = (user.id, user.memberships_version)
+        pubids = READABLE_GROUPS_CACHE.get_member(key)
+
+        if pubids is None:
+            pubids = self.session.scalars(
                 select(Group.pubid)
                 .join(GroupMembership)
                 .where(
                     GroupMembership.user_id == user.id,
                     Group.readable_by == ReadableBy.members,
                 )
-            )
-            # Union these with the world readable ones
-            # We wrap a subquery around in case we need to apply the group_ids filter below
-            query = select(
-                union(readable_by_world_query, user_is_member_query).subquery()
-            )
-
-        if group_ids:
-            query = query.where(literal_column("pubid").in_(group_ids))
+            ).all()
+            READABLE_GROUPS_CACHE.set_member(key, pubids)
 
-        return self.session.scalars(query).all()
+        return pubids
 
     def groupids_created_by(self, user):
         """
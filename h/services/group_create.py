@@ -1,8 +1,10 @@
 from functools import partial
 
 from h import session
-from h.models import Group, GroupScope
-from h.models.group import GROUP_TYPE_FLAGS
+from h.models import Group, GroupScope, User
+from h.models.group import GROUP_TYPE_FLAGS, ReadableBy
+from h.services.group import READABLE_GROUPS_CACHE
+from h.services.group_scope import SCOPE_INDEX_CACHE
 
 
 class GroupCreateService:
@@ -127,6 +129,10 @@ class GroupCreateService:
         self.db.flush()
 
         group.members.append(group.creator)
+        group.creator.memberships_version = User.memberships_version + 1
+        if group.readable_by == ReadableBy.world:
+            READABLE_GROUPS_CACHE.invalidate_world()
+        SCOPE_INDEX_CACHE.invalidate(*(scope.origin for scope in group_scopes))
         self.publish("group-join", group.pubid, group.creator.userid)
 
         return group
@@ -1,4 +1,6 @@
 from h.models import Annotation
+from h.models.group import ReadableBy
+from h.services.group import READABLE_GROUPS_CACHE
 
 
 class DeletePublicGroupError(Exception):
@@ -20,6 +22,9 @@ class GroupDeleteService:
         self._delete_annotations(group)
         self.request.db.delete(group)
 
+        if group.readable_by == ReadableBy.world:
+            READABLE_GROUPS_CACHE.invalidate_world()
+
     def _delete_annotations(self, group):
         if group.pubid == "__world__":
             raise DeletePublicGroupError("Public group can not be deleted")
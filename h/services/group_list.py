@@ -1,3 +1,6 @@
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import selectinload
+
 from h import models
 from h.models import group
 
@@ -11,7 +14,7 @@ class GroupListService:
     ALl public methods return relevant group model objects.
     """
 
-    def __init__(self, session, default_authority, group_scope_service):
+    def __init__(self, session, default_authority, group_scope_service, group_service):
         """
         Create a new group_list service.
 
@@ -20,6 +23,7 @@ class GroupListService:
         """
         self._session = session
         self._group_scope_service = group_scope_service
+        self._group_service = group_service
         self.default_authority = default_authority
 
     def _authority(self, user=None, authority=None):
@@ -110,21 +114,59 @@ class GroupListService:
 
           This should return a list of groups appropriate to the client
           via the API.
+
+        As this is called whenever the client starts, the scoped groups and
+        the user's private groups are found in memory where possible and all
+        of the groups are loaded together, with their scopes.
         """
         authority = self._authority(user, authority)
-        scoped_groups = []
-        private_groups = []
 
+        scoped_ids = set()
         if document_uri:
-            scoped_groups = self.scoped_groups(authority, document_uri)
-
-        world_group = self.world_group(authority)
-        world_group = [world_group] if world_group else []
+            scoped_ids.update(
+                self._group_scope_service.fetch_group_ids_by_scope(document_uri)
+            )
 
+        private_pubids = set()
         if user:
-            private_groups = self.private_groups(user)
-
-        return scoped_groups + world_group + private_groups
+            private_pubids.update(self._group_service.private_groupids(user))
+
+        groups = self._session.scalars(
+            select(models.Group)
+            .where(
+                or_(
+                    models.Group.id.in_(scoped_ids),
+                    models.Group.pubid.in_(private_pubids),
+                    and_(
+                        models.Group.authority == authority,
+                        models.Group.pubid == "__world__",
+                    ),
+                )
+            )
+            .options(selectinload(models.Group.scopes))
+        ).all()
+
+        scoped_groups = [
+            group_
+            for group_ in groups
+            if group_.id in scoped_ids
+            and group_.authority == authority
+            and group_.readable_by == group.ReadableBy.world
+        ]
+        world_group = [
+            group_
+            for group_ in groups
+            if group_.pubid == "__world__"
+            and group_.authority == authority
+            and group_.readable_by == group.ReadableBy.world
+        ]
+        private_groups = [
+            group_
+            for group_ in groups
+            if group_.pubid in private_pubids and group_.type == "private"
+        ]
+
+        return self._sort(scoped_groups) + world_group + self._sort(private_groups)
 
     def user_groups(self, user=None):
         """
@@ -161,8 +203,9 @@ class GroupListService:
     def scoped_groups(self, authority, document_uri):
         if not document_uri:
             return []
-        matching_scopes = self._group_scope_service.fetch_by_scope(document_uri)
-        matching_scope_groupids = [scope.group_id for scope in matching_scopes]
+        matching_scope_groupids = self._group_scope_service.fetch_group_ids_by_scope(
+            document_uri
+        )
 
         if not matching_scope_groupids:
             return []
@@ -219,4 +262,5 @@ def group_list_factory(_context, request):
         session=request.db,
         default_authority=request.default_authority,
         group_scope_service=group_scope_service,
+        group_service=request.find_service(name="group"),
     )
@@ -1,6 +1,7 @@
 from functools import partial
 
 from h import session
+from h.models import User
 
 
 class GroupMembersService:
@@ -61,6 +62,8 @@ class GroupMembersService:
             return
 
         group.members.append(user)
+        # Invalidate the user's cached readable groups (see `GroupService`)
+        user.memberships_version = User.memberships_version + 1
 
         self.publish("group-join", group.pubid, userid)
 
@@ -72,6 +75,7 @@ class GroupMembersService:
             return
 
         group.members.remove(user)
+        user.memberships_version = User.memberships_version + 1
 
         self.publish("group-leave", group.pubid, userid)
 
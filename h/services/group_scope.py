@@ -1,5 +1,54 @@
+from collections import defaultdict
+
+from sqlalchemy import select
+
 from h.models import GroupScope
 from h.util import group_scope as scope_util
+from h.util.cache import TTLCache
+
+# How long (in seconds) the scopes of an origin are kept in memory for, and for
+# how many origins at most. The index is per process, so it can take this long
+# for scopes changed by other processes to be noticed.
+SCOPE_INDEX_TTL = 60
+SCOPE_INDEX_CACHE_SIZE = 1000
+
+
+class ScopeIndex:
+    """
+    An index of the scopes on one origin, for finding the scopes a URL is in.
+
+    A URL is in a scope if it starts with it. Rather than testing every scope,
+    the index looks up the prefixes of the URL which are as long as a scope
+    is, so lookups don't get slower as more scopes are added.
+    """
+
+    def __init__(self, scopes):
+        """
+        Create an index of `scopes`.
+
+        :param scopes: (scope URL, group ID) tuples
+        """
+        # Scope URL to the IDs of the groups with that scope
+        self._group_ids = defaultdict(list)
+        for scope, group_id in scopes:
+            self._group_ids[scope].append(group_id)
+
+        self._lengths = sorted({len(scope) for scope in self._group_ids})
+
+    def match(self, url):
+        """Return the IDs of the groups with a scope that `url` is in."""
+        group_ids = []
+        for length in self._lengths:
+            if length > len(url):
+                break
+
+            group_ids.extend(self._group_ids.get(url[:length], ()))
+
+        return group_ids
+
+
+# Origin to its `ScopeIndex`
+SCOPE_INDEX_CACHE = TTLCache(maxsize=SCOPE_INDEX_CACHE_SIZE, ttl=SCOPE_INDEX_TTL)
 
 
 class GroupScopeService:
@@ -26,6 +75,31 @@ class GroupScopeService:
             if scope_util.url_in_scope(url, [scope.scope])
         ]
 
+    def fetch_group_ids_by_scope(self, url):
+        """
+        Return the IDs of the groups with a scope that matches the given URL.
+
+        This matches the same scopes as `fetch_by_scope()`, but uses an index
+        of the origin's scopes which is kept in `SCOPE_INDEX_CACHE`.
+
+        :arg url: URL to find matching scopes for
+        :type url: str
+        :rtype: list(int)
+        """
+        origin = scope_util.parse_origin(url)
+        if not origin:
+            return []
+
+        index = SCOPE_INDEX_CACHE.get(origin)
+        if index is None:
+            scopes = self._session.scalars(
+                select(GroupScope).where(GroupScope.origin == origin)
+            )
+            index = ScopeIndex((scope.scope, scope.group_id) for scope in scopes)
+            SCOPE_INDEX_CACHE.set(origin, index)
+
+        return index.match(url)
+
 
 def group_scope_factory(_context, request):
     return GroupScopeService(session=request.db)
@@ -1,6 +1,9 @@
 from sqlalchemy.exc import SQLAlchemyError
 
+from h.models import User
 from h.services.exceptions import ConflictError, ValidationError
+from h.services.group import READABLE_GROUPS_CACHE
+from h.services.group_scope import SCOPE_INDEX_CACHE
 
 
 class GroupUpdateService:
@@ -26,12 +29,24 @@ class GroupUpdateService:
         :rtype: ~h.models.Group
         """
 
+        # The origins whose scopes are changed by this update
+        origins = set()
+        if "scopes" in kwargs:
+            origins.update(scope.origin for scope in group.scopes)
+            origins.update(scope.origin for scope in kwargs["scopes"])
+        # Changing the type of a group changes who can read it too
+        readable_by = group.readable_by
+
         for key, value in kwargs.items():
             try:
                 setattr(group, key, value)
             except ValueError as err:
                 raise ValidationError(err) from err
 
+        readable_by_changed = group.readable_by != readable_by
+        if readable_by_changed:
+            self._invalidate_members_readable_groups(group)
+
         try:
             self.session.flush()
 
@@ -48,8 +63,18 @@ class GroupUpdateService:
             # Re-raise as this is an unexpected problem
             raise
 
+        if readable_by_changed:
+            READABLE_GROUPS_CACHE.invalidate_world()
+        SCOPE_INDEX_CACHE.invalidate(*origins)
+
         return group
 
+    @staticmethod
+    def _invalidate_members_readable_groups(group):
+        """Invalidate the members' cached readable groups (see `GroupService`)."""
+        for user in group.members:
+            user.memberships_version = User.memberships_version + 1
+
 
 def group_update_factory(_context, request):
     """Return a GroupUpdateService instance for the passed context and request."""
@@ -1,12 +1,89 @@
 """Tools for generating links to domain objects."""
 
+from functools import cached_property
+
+from pyramid.interfaces import IRoutesMapper
 from pyramid.request import Request
+from pyramid.traversal import PATH_SAFE, quote_path_segment
 
 from h.security.request_methods import default_authority
 
 LINK_GENERATORS_KEY = "h.links.link_generators"
 
 
+class _LinksRequest:
+    """
+    The request passed to link generators by `LinksService`.
+
+    Link generators only need `registry`, `default_authority` and
+    `route_url()`, so this provides just those, using a blank request.
+
+    `route_url()` is called for every link to every annotation we present, so
+    rather than looking up the route and working out the application URL for
+    each link, this compiles a URL template once per route and set of
+    arguments and fills it in.
+    """
+
+    # The placeholder for the nth route argument when compiling templates
+    _PLACEHOLDER = "__link_argument_{}__"
+
+    def __init__(self, base_url, registry):
+        self._request = Request.blank("/", base_url=base_url)
+        self._request.registry = registry
+        self._url_templates = {}
+
+    @property
+    def registry(self):
+        return self._request.registry
+
+    @cached_property
+    def default_authority(self):
+        # The same as for real requests
+        return default_authority(self._request)
+
+    def route_url(self, route_name, *elements, **kw):
+        if elements or not all(
+            isinstance(value, str) and not key.startswith("_")
+            for key, value in kw.items()
+        ):
+            return self._request.route_url(route_name, *elements, **kw)
+
+        names = tuple(sorted(kw))
+
+        try:
+            template = self._url_templates[(route_name, names)]
+        except KeyError:
+            template = self._url_templates[(route_name, names)] = self._compile(
+                route_name, names
+            )
+
+        if template is None:
+            return self._request.route_url(route_name, **kw)
+
+        return template.format(
+            *(quote_path_segment(kw[name], safe=PATH_SAFE) for name in names)
+        )
+
+    def _compile(self, route_name, names):
+        """Return a URL template for `route_name`, or None if it can't have one."""
+        route = self.registry.getUtility(IRoutesMapper).get_route(route_name)
+        if route is None or route.pregenerator is not None:
+            return None
+
+        template = (
+            self._request.route_url(
+                route_name,
+                **{name: self._PLACEHOLDER.format(i) for i, name in enumerate(names)},
+            )
+            .replace("{", "{{")
+            .replace("}", "}}")
+        )
+        for i in range(len(names)):
+            template = template.replace(self._PLACEHOLDER.format(i), "{%d}" % i)
+
+        return template
+
+
 class LinksService:
     """A service for generating links to annotations."""
 
@@ -40,14 +117,7 @@ class LinksService:
         # generate a request object is that this is the simplest and least
         # error-prone way to get access to the route_url function, which can
         # be used by link generators.
-        self._request = Request.blank("/", base_url=base_url)
-        self._request.registry = registry
-
-        # Allow retrieval of the authority from the fake request object, the
-        # same as we do for real requests.
-        self._request.set_property(
-            default_authority, name="default_authority", reify=True
-        )
+        self._request = _LinksRequest(base_url, registry)
 
     def get(self, annotation, name):
         """Get the link named `name` for the passed `annotation`."""
@@ -2,6 +2,7 @@ from h_pyramid_sentry import report_exception
 
 from h import tasks
 from h.presenters import AnnotationSearchIndexPresenter
+from h.search import instrumentation
 from h.services.annotation_read import AnnotationReadService
 
 
@@ -114,13 +115,14 @@ class SearchIndexService:
         return async_task.delay(event.annotation_id)
 
     def _index_annotation_body(self, annotation_id, body, refresh, target_index=None):
-        self._es.conn.index(
-            index=self._es.index if target_index is None else target_index,
-            doc_type=self._es.mapping_type,
-            body=body,
-            id=annotation_id,
-            refresh=refresh,
-        )
+        with instrumentation.caller("indexer"):
+            self._es.conn.index(
+                index=self._es.index if target_index is None else target_index,
+                doc_type=self._es.mapping_type,
+                body=body,
+                id=annotation_id,
+                refresh=refresh,
+            )
 
         if target_index is not None:
             return
@@ -1,11 +1,35 @@
+from collections import namedtuple
+
 import sqlalchemy as sa
 
 from h.models import User, UserIdentity
+from h.util.cache import TTLCache
 from h.util.db import on_transaction_end
-from h.util.user import split_user
+from h.util.user import format_userid, split_user
 
 UPDATE_PREFS_ALLOWED_KEYS = {"show_sidebar_tutorial"}
 
+# How long (in seconds) the fields used to present users are cached for, and
+# for how many users at most. The cache is per process, so it can take this
+# long for changes made by other processes to be noticed.
+USER_INFO_CACHE_TTL = 300
+USER_INFO_CACHE_SIZE = 10000
+
+#: The fields of a user needed to present their annotations
+UserInfo = namedtuple("UserInfo", ["userid", "authority", "display_name"])
+
+
+def _user_info_key(userid):
+    """Match userids like the database matches them, ignoring case and dots."""
+    parts = split_user(userid)
+    return (parts["username"].replace(".", "").lower(), parts["domain"])
+
+
+# Userids to their `UserInfo`
+USER_INFO_CACHE = TTLCache(
+    maxsize=USER_INFO_CACHE_SIZE, ttl=USER_INFO_CACHE_TTL, key=_user_info_key
+)
+
 
 class UserNotActivated(Exception):
     """Tried to log in to an unactivated user account."""
@@ -26,11 +50,14 @@ class UserService:
 
         # Local cache of fetched users.
         self._cache = {}
+        # Userids which `fetch_all_user_info()` couldn't find a user for
+        self._user_info_misses = set()
 
         # But don't allow the cache to persist after the session is closed.
         @on_transaction_end(session)
         def flush_cache():
             self._cache = {}
+            self._user_info_misses = set()
 
     def fetch(self, userid_or_username, authority=None):
         """
@@ -116,6 +143,57 @@ class UserService:
 
         return [v for k, v in self._cache.items() if k in cache_keys]
 
+    def fetch_user_info(self, userid):
+        """
+        Fetch the fields needed to present a user's annotations.
+
+        Unlike the users returned by `fetch()` these are cached across
+        requests.
+
+        :returns: the user's info, if the user was found
+        :raises InvalidUserId: If the userid cannot be parsed
+        :rtype: UserInfo or None
+        """
+        return self.fetch_all_user_info([userid]).get(userid)
+
+    def fetch_all_user_info(self, userids):
+        """
+        Fetch the fields needed to present many users' annotations.
+
+        Only the users which aren't cached already are loaded, in one query.
+        Userids are matched like `fetch()` matches them.
+
+        :param userids: a list of userid strings.
+        :returns: a dict of userid to `UserInfo` for the users that were found
+        """
+        infos = {}
+        missing_ids = []
+        for userid in set(userids) - self._user_info_misses:
+            info = USER_INFO_CACHE.get(userid)
+            if info is None:
+                missing_ids.append(userid)
+            else:
+                infos[userid] = info
+
+        if missing_ids:
+            # Just the columns we need, as loading whole users is much slower
+            rows = self.session.execute(
+                sa.select(User.username, User.authority, User.display_name).where(
+                    User.userid.in_(missing_ids)  # pylint:disable=no-member
+                )
+            )
+            for username, authority, display_name in rows:
+                userid = format_userid(username, authority)
+                USER_INFO_CACHE.set(userid, UserInfo(userid, authority, display_name))
+
+            for userid in missing_ids:
+                if info := USER_INFO_CACHE.get(userid):
+                    infos[userid] = info
+                else:
+                    self._user_info_misses.add(userid)
+
+        return infos
+
     def fetch_by_identity(self, provider, provider_unique_id):
         """
         Fetch a user by associated identity.
@@ -1,4 +1,5 @@
 from h import models, tasks
+from h.services.user import USER_INFO_CACHE
 
 
 class UserRenameError(Exception):
@@ -43,6 +44,7 @@ class UserRenameService:
         old_userid = user.userid
         user.username = new_username
         new_userid = user.userid
+        USER_INFO_CACHE.invalidate(old_userid, new_userid)
 
         # Remove auth tickets when renaming the user. We cannot just update the
         # denormalized `user_userid` of these because the previous userid values
@@ -1,6 +1,7 @@
 from sqlalchemy.exc import SQLAlchemyError
 
 from h.services.exceptions import ConflictError, ValidationError
+from h.services.user import USER_INFO_CACHE
 
 
 class UserUpdateService:
@@ -33,6 +34,7 @@ class UserUpdateService:
         if "authority" in kwargs:
             raise ValidationError("A user's authority may not be changed")
 
+        old_userid = user.userid
         for key, value in kwargs.items():
             try:
                 setattr(user, key, value)
@@ -58,6 +60,8 @@ class UserUpdateService:
             # Re-raise as this is an unexpected problem
             raise
 
+        USER_INFO_CACHE.invalidate(old_userid, user.userid)
+
         return user
 
 
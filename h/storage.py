@@ -7,12 +7,24 @@ assumed to be validated.
 """
 
 from pyramid import i18n
+from sqlalchemy import select
 
 from h import models
+from h.util.cache import TTLCache
 from h.util.uri import normalize as normalize_uri
 
 _ = i18n.TranslationStringFactory(__package__)
 
+# How long (in seconds) `expand_uri()` remembers which URIs refer to the same
+# document, and for how many URIs at most. The cache is per process, so it
+# can take this long for changes made by other processes to be noticed.
+EXPAND_URI_CACHE_TTL = 60
+EXPAND_URI_CACHE_SIZE = 10000
+
+# Normalized URIs to their document URI rows, tagged with the ID of the
+# document they're for (if there is one)
+EXPAND_URI_CACHE = TTLCache(maxsize=EXPAND_URI_CACHE_SIZE, ttl=EXPAND_URI_CACHE_TTL)
+
 
 def expand_uri(session, uri, normalized=False):
     """
@@ -22,32 +34,50 @@ def expand_uri(session, uri, normalized=False):
     passed URI, and if so returns the set of all URIs which we currently
     believe refer to the same document.
 
+    The document URIs are cached in :py:data:`EXPAND_URI_CACHE`, which is
+    invalidated when this process changes the URIs of a document.
+
     :param session: Database session
     :param uri: URI associated with the document
     :param normalized: Return normalized URIs instead of the raw value
 
     :returns: a list of equivalent URIs
     """
+    return expand_uris(session, [uri], normalized=normalized)[uri]
 
-    normalized_uri = normalize_uri(uri)
 
-    document_id = (
-        session.query(models.DocumentURI.document_id)
-        .filter(models.DocumentURI.uri_normalized == normalized_uri)
-        .limit(1)
-        .scalar_subquery()
-    )
+def expand_uris(session, uris, normalized=False):
+    """
+    Return all URIs which refer to the same underlying document as each of `uris`.
 
-    type_uris = list(
-        session.query(
-            # Using the specific fields we want prevents object creation
-            # which significantly speeds this method up (knocks ~40% off)
-            models.DocumentURI.type,
-            models.DocumentURI.uri,
-            models.DocumentURI.uri_normalized,
-        ).filter(models.DocumentURI.document_id == document_id)
-    )
+    This is the same as calling :py:func:`expand_uri` for each URI, except
+    that the documents of any URIs which aren't cached are looked up together,
+    in a single query.
+
+    :param session: Database session
+    :param uris: URIs associated with the documents
+    :param normalized: Return normalized URIs instead of the raw values
+
+    :returns: a dict of each of `uris` to a list of its equivalent URIs
+    """
+    normalized_uris = {uri: normalize_uri(uri) for uri in uris}
+
+    type_uris = {}
+    for normalized_uri in set(normalized_uris.values()):
+        if (cached := EXPAND_URI_CACHE.get(normalized_uri)) is not None:
+            type_uris[normalized_uri] = cached
+
+    if missing := set(normalized_uris.values()) - type_uris.keys():
+        type_uris.update(_fetch_document_uris(session, missing))
 
+    return {
+        uri: _expand(uri, normalized_uri, type_uris[normalized_uri], normalized)
+        for uri, normalized_uri in normalized_uris.items()
+    }
+
+
+def _expand(uri, normalized_uri, type_uris, normalized):
+    """Get the URIs equivalent to `uri` from the URIs of its document."""
     if not type_uris:
         return [normalized_uri if normalized else uri]
 
@@ -62,3 +92,54 @@ def expand_uri(session, uri, normalized=False):
         return [uri_normalized for _, _, uri_normalized in type_uris]
 
     return [plain_uri for _, plain_uri, _ in type_uris]
+
+
+def _fetch_document_uris(session, normalized_uris):
+    """
+    Get and cache the URIs of the documents which `normalized_uris` are for.
+
+    :returns: a dict of each normalized URI to a tuple of `(type, uri,
+        uri_normalized)` tuples for the URIs of its document, which is empty
+        if there's no document for it
+    """
+    # The column rather than the `uri_normalized` hybrid property, which pylint
+    # can't tell is a column expression
+    uri_normalized = models.DocumentURI.__table__.c.uri_normalized
+
+    # One document for each normalized URI, which is the same as picking the
+    # first match for each URI on its own
+    documents = (
+        select(uri_normalized.label("query_uri"), models.DocumentURI.document_id)
+        .where(uri_normalized.in_(normalized_uris))
+        .distinct(uri_normalized)
+        .subquery()
+    )
+
+    rows = session.execute(
+        # Using the specific fields we want prevents object creation
+        # which significantly speeds this method up (knocks ~40% off)
+        select(
+            documents.c.query_uri,
+            models.DocumentURI.document_id,
+            models.DocumentURI.type,
+            models.DocumentURI.uri,
+            models.DocumentURI.uri_normalized,
+        ).join(documents, models.DocumentURI.document_id == documents.c.document_id)
+    )
+
+    document_ids = {}
+    type_uris = {normalized_uri: [] for normalized_uri in normalized_uris}
+    for query_uri, document_id, doc_type, plain_uri, uri_normalized in rows:
+        document_ids[query_uri] = document_id
+        type_uris[query_uri].append((doc_type, plain_uri, uri_normalized))
+
+    for normalized_uri, uris in type_uris.items():
+        type_uris[normalized_uri] = tuple(uris)
+        document_id = document_ids.get(normalized_uri)
+        EXPAND_URI_CACHE.set(
+            normalized_uri,
+            type_uris[normalized_uri],
+            tags=() if document_id is None else (document_id,),
+        )
+
+    return type_uris
@@ -3,11 +3,22 @@ import pyramid
 from h.config import configure
 from h.security import StreamerPolicy
 from h.sentry_filters import SENTRY_FILTERS
+from h.settings import SettingError
+from h.streamer.websocket import SLOW_CONSUMER_POLICIES
 
 
 def create_app(_global_config, **settings):
     config = configure(settings=settings)
 
+    slow_consumer_policy = config.registry.settings.get(
+        "h.streamer.slow_consumer_policy"
+    )
+    if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+        raise SettingError(
+            f"unknown slow consumer policy {slow_consumer_policy!r}, "
+            f"expected one of {', '.join(SLOW_CONSUMER_POLICIES)}"
+        )
+
     config.include("pyramid_services")
 
     config.include("h.security")
@@ -31,6 +42,8 @@ def create_app(_global_config, **settings):
     # Health check
     config.scan("h.views.status")
     config.add_route("status", "/_status")
+    # Local debugging of streamer performance, see `h.streamer.views`
+    config.add_route("metrics", "/_metrics")
 
     config.scan("h.streamer.views")
     config.scan("h.streamer.streamer")
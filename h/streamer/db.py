@@ -1,7 +1,8 @@
 import logging
 from contextlib import contextmanager
+from time import perf_counter
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 
 from h import db
 
@@ -13,6 +14,23 @@ def get_session(settings):
     return db.Session(bind=db.create_engine(settings["sqlalchemy.url"]))
 
 
+class QueryTimer:
+    """A running total of the time spent executing queries on an engine."""
+
+    def __init__(self, engine):
+        self.elapsed = 0.0
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, *_args):
+        conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+    def _after_cursor_execute(self, conn, *_args):
+        self.elapsed += perf_counter() - conn.info["query_start_time"].pop()
+
+
 @contextmanager
 def read_only_transaction(session):
     """Wrap a call in a read only transaction context manager."""
@@ -1,3 +1,7 @@
+import weakref
+from collections import defaultdict
+from collections.abc import Hashable
+
 from h import storage
 from h.util.uri import normalize as normalize_uri
 
@@ -28,46 +32,56 @@ FILTER_SCHEMA = {
 class SocketFilter:
     KNOWN_FIELDS = {"/id", "/group", "/uri", "/references"}
 
+    # An inverted index of `(field, value)` filter rows to the sockets which
+    # have them. This lets us find the sockets interested in an annotation
+    # without visiting every connected socket. Sockets are held weakly so a
+    # socket which goes away without being closed cleanly doesn't leak.
+    _index = defaultdict(weakref.WeakSet)
+
     @classmethod
-    def matching(cls, sockets, annotation, session):
+    def matching(cls, sockets, annotation, session, expanded_uris=None):
         """
         Find sockets with matching filters for the given annotation.
 
         For this to work, the sockets must have first had `set_filter()` called
         on them.
 
-        :param sockets: Iterable of sockets to check
+        :param sockets: Iterable of sockets to restrict the results to
         :param annotation: Annotation to match
         :param session: DB session
+        :param expanded_uris: The normalized expansion of the annotation's
+            target URI, if it has already been looked up
 
         :return: A generator of matching socket objects
         """
+        if expanded_uris is None:
+            # Expand the URI to ensure we match any variants of it. This should
+            # match the normalization when searching (see `h.search.query`)
+            expanded_uris = storage.expand_uri(
+                session, annotation.target_uri, normalized=True
+            )
 
         values = {
             "/id": [annotation.id],
             "/group": [annotation.groupid],
-            # Expand the URI to ensure we match any variants of it. This should
-            # match the normalization when searching (see `h.search.query`)
-            "/uri": set(
-                storage.expand_uri(session, annotation.target_uri, normalized=True)
-            ),
+            "/uri": set(expanded_uris),
             "/references": set(annotation.references),
         }
 
-        for socket in sockets:
-            # Some sockets might not yet have the filter applied (or had a non
-            # parsable filter etc.)
-            if not hasattr(socket, "filter_rows"):
-                continue
+        # Collect the candidates up front, as sockets can be added to or
+        # removed from the index by other greenlets while we are yielding
+        candidates = set()
+        for field, field_values in values.items():
+            for value in field_values:
+                if matched := cls._index.get((field, value)):
+                    candidates.update(matched)
 
-            # Iterate over the filter_rows added by `set_filter()`
-            for field, value in socket.filter_rows:
-                try:
-                    if value in values[field]:
-                        yield socket
-                        break
-                except KeyError:
-                    continue
+        if not candidates:
+            return
+
+        # Sockets which don't have a filter applied (or had a non parsable
+        # filter etc.) are never in the index, so they never match
+        yield from candidates.intersection(sockets)
 
     @classmethod
     def set_filter(cls, socket, filter_):
@@ -77,7 +91,26 @@ class SocketFilter:
         :param socket: Socket to add filtering information too
         :param filter_: Filter JSON to process
         """
+        cls.remove_filter(socket)
+
         socket.filter_rows = tuple(cls._rows_for(filter_))
+        for row in socket.filter_rows:
+            cls._index[row].add(socket)
+
+    @classmethod
+    def remove_filter(cls, socket):
+        """
+        Remove any filtering information previously added to a socket.
+
+        :param socket: Socket to remove filtering information from
+        """
+        for row in getattr(socket, "filter_rows", ()):
+            sockets = cls._index[row]
+            sockets.discard(socket)
+            if not sockets:
+                del cls._index[row]
+
+        socket.filter_rows = ()
 
     @classmethod
     def _rows_for(cls, filter_):
@@ -93,6 +126,10 @@ class SocketFilter:
             values = set(values) if isinstance(values, list) else [values]
 
             for value in values:
+                # Values are used as keys in the index
+                if not isinstance(value, Hashable):
+                    continue
+
                 if field == "/uri":
                     value = normalize_uri(value)
 
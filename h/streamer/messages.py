@@ -1,14 +1,14 @@
 import logging
 from collections import namedtuple
-from itertools import chain
+from itertools import groupby
+from time import perf_counter
 
 from gevent.queue import Full
 
-from h import realtime
+from h import realtime, storage
 from h.realtime import Consumer
-from h.security import Permission, identity_permits
 from h.services.annotation_read import AnnotationReadService
-from h.streamer import websocket
+from h.streamer import metrics, websocket
 from h.streamer.contexts import request_context
 from h.streamer.filter import SocketFilter
 from h.traversal import AnnotationContext
@@ -16,8 +16,9 @@ from h.traversal import AnnotationContext
 log = logging.getLogger(__name__)
 
 
-# An incoming message from a subscribed realtime consumer
-Message = namedtuple("Message", ["topic", "payload"])
+# An incoming message from a subscribed realtime consumer, and when it was put
+# on the work queue (from `time.perf_counter()`)
+Message = namedtuple("Message", ["topic", "payload", "queued_at"], defaults=(None,))
 
 
 def process_messages(settings, routing_key, work_queue, raise_error=True):
@@ -30,7 +31,7 @@ def process_messages(settings, routing_key, work_queue, raise_error=True):
     """
 
     def _handler(payload):
-        message = Message(topic=routing_key, payload=payload)
+        message = Message(topic=routing_key, payload=payload, queued_at=perf_counter())
         try:
             work_queue.put(message, timeout=0.1)
         except Full:  # pragma: no cover
@@ -73,11 +74,46 @@ def handle_message(message, registry, session, topic_handlers):
     # The `prepare` function sets the active registry which is an implicit
     # dependency of some of the authorization logic used to look up annotation
     # and group permissions.
-    with request_context(registry) as request:
+    with request_context(registry) as request, metrics.timed(
+        f"handler_seconds.{message.topic}"
+    ):
         handler(message.payload, sockets, request, session)
 
 
-def handle_user_event(message, sockets, _request, _session):
+def handle_messages(messages, registry, session, batch_topic_handlers):
+    """
+    Deserialize and process a batch of messages from the reader.
+
+    This is the batched equivalent of :py:func:`handle_message`. Each run of
+    consecutive messages for the same topic is passed to the topic's batch
+    handler in one go, along with the currently connected sockets, so the
+    handler can share work (like database lookups) between the messages.
+    """
+    # N.B. We iterate over a non-weak list of instances, see `handle_message`
+    sockets = list(websocket.WebSocket.instances)
+
+    with request_context(registry) as request:
+        for topic, topic_messages in groupby(messages, key=lambda msg: msg.topic):
+            try:
+                handler = batch_topic_handlers[topic]
+            except KeyError as err:
+                raise RuntimeError(
+                    f"Don't know how to handle message from topic: {topic}"
+                ) from err
+
+            with metrics.timed(f"handler_seconds.{topic}"):
+                handler(
+                    [msg.payload for msg in topic_messages], sockets, request, session
+                )
+
+
+def handle_user_events(messages, sockets, request, session):
+    """Handle a batch of user events."""
+    for message in messages:
+        handle_user_event(message, sockets, request, session)
+
+
+def handle_user_event(message, sockets, _request, session):
     # for session state change events, the full session model
     # is included so that clients can update themselves without
     # further API requests
@@ -88,6 +124,10 @@ def handle_user_event(message, sockets, _request, _session):
         if not socket.identity or socket.identity.user.userid != message["userid"]:
             continue
 
+        # The user's group memberships have changed, so what they can read
+        # may have too
+        socket.refresh_identity(session)
+
         if reply is None:
             reply = {
                 "type": "session-change",
@@ -98,6 +138,50 @@ def handle_user_event(message, sockets, _request, _session):
         socket.send_json(reply)
 
 
+def handle_annotation_events(messages, sockets, request, session):
+    """
+    Handle a batch of annotation events.
+
+    Repeated create or update events for the same annotation are coalesced
+    into the last one, as it will present the annotation's latest state
+    anyway. All of the annotations are then loaded together and their target
+    URIs are expanded together.
+    """
+    messages = _coalesce_annotation_events(messages)
+
+    annotations = {
+        annotation.id: annotation
+        for annotation in request.find_service(
+            AnnotationReadService
+        ).get_annotations_by_id(
+            list({message["annotation_id"] for message in messages})
+        )
+    }
+    expanded_uris = storage.expand_uris(
+        session,
+        {annotation.target_uri for annotation in annotations.values()},
+        normalized=True,
+    )
+
+    for message in messages:
+        annotation = annotations.get(message["annotation_id"])
+        if annotation is None:
+            log.warning(
+                "received annotation event for missing annotation: %s",
+                message["annotation_id"],
+            )
+            continue
+
+        _notify_annotation_event(
+            message,
+            annotation,
+            sockets,
+            request,
+            session,
+            expanded_uris=expanded_uris[annotation.target_uri],
+        )
+
+
 def handle_annotation_event(message, sockets, request, session):
     id_ = message["annotation_id"]
     annotation = request.find_service(AnnotationReadService).get_annotation_by_id(id_)
@@ -106,26 +190,52 @@ def handle_annotation_event(message, sockets, request, session):
         log.warning("received annotation event for missing annotation: %s", id_)
         return
 
+    _notify_annotation_event(message, annotation, sockets, request, session)
+
+
+def _coalesce_annotation_events(messages):
+    """Drop create and update events superseded by a later one in `messages`."""
+    coalesced = []
+    upserted_ids = set()
+
+    for message in reversed(messages):
+        if message["action"] in ("create", "update"):
+            if message["annotation_id"] in upserted_ids:
+                continue
+            upserted_ids.add(message["annotation_id"])
+
+        coalesced.append(message)
+
+    coalesced.reverse()
+    return coalesced
+
+
+def _notify_annotation_event(  # pylint:disable=too-many-arguments
+    message, annotation, sockets, request, session, expanded_uris=None
+):
     # Find connected clients which are interested in this annotation.
-    matching_sockets = SocketFilter.matching(sockets, annotation, session)
+    with metrics.timed("matching_seconds"):
+        matching_sockets = list(
+            SocketFilter.matching(
+                sockets, annotation, session, expanded_uris=expanded_uris
+            )
+        )
 
-    try:
-        # Check to see if the generator has any items
-        first_socket = next(matching_sockets)
-    except StopIteration:
-        # Nothing matched
+    metrics.observe(
+        "sockets_matched", len(matching_sockets), buckets=metrics.COUNT_BUCKETS
+    )
+    if not matching_sockets:
         return
 
-    # Create a generator which has the first socket back again
-    matching_sockets = chain(  # pylint: disable=redefined-variable-type
-        (first_socket,), matching_sockets
+    # Serialize the reply once, rather than once for each socket we send it to
+    reply = websocket.PreparedMessage.from_json(
+        _generate_annotation_event(request, message, annotation)
     )
 
-    reply = _generate_annotation_event(request, message, annotation)
-
     annotator_nipsad = request.find_service(name="nipsa").is_flagged(annotation.userid)
     annotation_context = AnnotationContext(annotation)
 
+    recipients = []
     for socket in matching_sockets:
         # Don't send notifications back to the person who sent them
         if message["src_client_id"] == socket.client_id:
@@ -140,14 +250,14 @@ def handle_annotation_event(message, sockets, request, session):
             continue
 
         # Check whether client is authorized to read this annotation.
-        if not identity_permits(
-            socket.identity,
-            annotation_context,
-            Permission.Annotation.READ_REALTIME_UPDATES,
-        ):
+        if not socket.permits_realtime_updates(annotation_context):
             continue
 
-        socket.send_json(reply)
+        recipients.append(socket)
+
+    with metrics.timed("send_seconds"):
+        for socket in recipients:
+            socket.send_prepared(reply)
 
 
 def _generate_annotation_event(request, message, annotation):
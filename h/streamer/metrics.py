@@ -1,4 +1,6 @@
+from contextlib import contextmanager
 from pathlib import Path
+from time import perf_counter
 
 import gevent
 import importlib_resources
@@ -7,15 +9,47 @@ import newrelic.agent
 from h.streamer import db
 from h.streamer.websocket import WebSocket
 from h.streamer.worker import WSGIServer
+from h.util.metrics import DURATION_BUCKETS, Histogram
 
 PREFIX = "Custom/WebSocket"
 METRICS_INTERVAL = 60
 
+# Upper bounds of the histogram buckets for counts
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+# Histograms of what the streamer has been doing, by name. These are kept in
+# memory since the process started, so they don't depend on New Relic.
+HISTOGRAMS = {}
+
+
+def observe(name, value, buckets=DURATION_BUCKETS):
+    """Record `value` in the histogram `name`, creating it if necessary."""
+    try:
+        histogram = HISTOGRAMS[name]
+    except KeyError:
+        histogram = HISTOGRAMS[name] = Histogram(buckets)
+
+    histogram.observe(value)
+
+
+@contextmanager
+def timed(name):
+    """Record how long the wrapped block takes in the histogram `name`."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, perf_counter() - start)
+
 
 def websocket_metrics(queue):
     """
     Report metrics about the websocket service to New Relic.
 
+    Each worker process (shard) of the websocket server reports its own values
+    for its own connections. They aren't combined across workers here.
+
     See https://docs.newrelic.com/docs/agents/python-agent/supported-features/python-custom-metrics.
     """
     connections_active = len(WebSocket.instances)
@@ -30,6 +64,15 @@ def websocket_metrics(queue):
 
     yield f"{PREFIX}/WorkQueueSize", queue.qsize()
 
+    yield f"{PREFIX}/SendBuffer/Queued", sum(
+        ws.send_buffer_length for ws in WebSocket.instances
+    )
+    # These count events since the last report
+    counters = WebSocket.send_buffer_counters
+    yield f"{PREFIX}/SendBuffer/Dropped", counters["dropped"]
+    yield f"{PREFIX}/SendBuffer/Disconnected", counters["disconnected"]
+    counters.clear()
+
     # There really only should be one server per instance
     for server in WSGIServer.instances:
         pool = server.connection_pool
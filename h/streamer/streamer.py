@@ -1,15 +1,24 @@
 import logging
 import os
 import sys
+from time import perf_counter
 
 import gevent
+from gevent.queue import Empty
 from pyramid.events import ApplicationCreated, subscriber
 
-from h.streamer import db, messages, websocket
-from h.streamer.metrics import metrics_process
+from h.streamer import db, messages, metrics, websocket
 
 log = logging.getLogger(__name__)
 
+# N.B. The websocket server is sharded across processes by Gunicorn: it runs
+# `WEBSOCKET_NUM_WORKERS` worker processes and hands each new connection to one
+# of them. Everything below is per worker process. Each worker has its own
+# work queue, its own `process_work_queue` greenlet and its own realtime
+# consumers, which bind a uniquely named queue to the `realtime` exchange, so
+# every worker receives every realtime message and notifies its own sockets.
+# The metrics each worker reports, and serves at /_metrics, are its own too.
+
 # Queue of messages to process, from both client websockets and message queues
 # to which the streamer is subscribed.
 #
@@ -27,6 +36,11 @@ TOPIC_HANDLERS = {
     USER_TOPIC: messages.handle_user_event,
 }
 
+BATCH_TOPIC_HANDLERS = {
+    ANNOTATION_TOPIC: messages.handle_annotation_events,
+    USER_TOPIC: messages.handle_user_events,
+}
+
 
 class UnknownMessageType(Exception):
     """Raised if a message in the work queue if of an unknown type."""
@@ -54,7 +68,7 @@ def start(event):  # pragma: no cover
 
     if not os.environ.get("KILL_SWITCH_WEBSOCKET_METRICS"):
         greenlets.append(
-            gevent.spawn(metrics_process, registry, WORK_QUEUE),
+            gevent.spawn(metrics.metrics_process, registry, WORK_QUEUE),
         )
 
     # Start a "greenlet of last resort" to monitor the worker greenlets and
@@ -70,19 +84,66 @@ def process_work_queue(registry, queue):
     dispatching them as appropriate. The handling of each message is wrapped in
     code that ensures the database session is appropriately committed and
     closed between messages.
+
+    If the `h.streamer.batch_size` setting is greater than one, up to that
+    many consecutive realtime messages which are already waiting on the queue
+    are handled together, in a single transaction.
     """
 
     session = db.get_session(registry.settings)
+    query_timer = db.QueryTimer(session.get_bind())
+    batch_size = registry.settings.get("h.streamer.batch_size", 1)
 
     for msg in queue:
+        if queued_at := getattr(msg, "queued_at", None):
+            metrics.observe("queue_wait_seconds", perf_counter() - queued_at)
+
+        db_time_before = query_timer.elapsed
+
         with db.read_only_transaction(session):
             if isinstance(msg, messages.Message):
-                messages.handle_message(msg, registry, session, TOPIC_HANDLERS)
+                if batch_size > 1:
+                    messages.handle_messages(
+                        _drain_batch(queue, msg, batch_size),
+                        registry,
+                        session,
+                        batch_topic_handlers=BATCH_TOPIC_HANDLERS,
+                    )
+                else:
+                    messages.handle_message(
+                        msg, registry, session, topic_handlers=TOPIC_HANDLERS
+                    )
             elif isinstance(msg, websocket.Message):
-                websocket.handle_message(msg, session)
+                with metrics.timed("handler_seconds.websocket"):
+                    websocket.handle_message(msg, session)
             else:
                 raise UnknownMessageType(repr(msg))
 
+        metrics.observe("db_seconds", query_timer.elapsed - db_time_before)
+
+
+def _drain_batch(queue, first_message, batch_size):
+    """
+    Get `first_message` and any realtime messages directly after it on `queue`.
+
+    This doesn't wait for more messages to arrive, and stops at the first
+    message which isn't a realtime message so that the queue's order is kept.
+    """
+    batch = [first_message]
+
+    while len(batch) < batch_size:
+        try:
+            next_message = queue.peek_nowait()
+        except Empty:
+            break
+
+        if not isinstance(next_message, messages.Message):
+            break
+
+        batch.append(queue.get_nowait())
+
+    return batch
+
 
 def supervise(greenlets):  # pragma: no cover
     try:
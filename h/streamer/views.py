@@ -1,9 +1,10 @@
+from pyramid.httpexceptions import HTTPNotFound
 from pyramid.settings import asbool
 from pyramid.view import forbidden_view_config, notfound_view_config, view_config
 from ws4py.exc import HandshakeError
 from ws4py.server.wsgiutils import WebSocketWSGIApplication
 
-from h.streamer import streamer, websocket
+from h.streamer import metrics, streamer, websocket
 
 
 @view_config(route_name="ws")
@@ -14,6 +15,12 @@ def websocket_view(request):
             "h.ws.debug": asbool(request.params.get("debug")),
             "h.ws.streamer_work_queue": streamer.WORK_QUEUE,
             "h.ws.identity": request.identity,
+            "h.ws.send_buffer_size": request.registry.settings.get(
+                "h.streamer.send_buffer_size", 0
+            ),
+            "h.ws.slow_consumer_policy": request.registry.settings.get(
+                "h.streamer.slow_consumer_policy", websocket.SLOW_CONSUMER_DROP_OLDEST
+            ),
         }
     )
 
@@ -21,6 +28,18 @@ def websocket_view(request):
     return request.get_response(app)
 
 
+@view_config(route_name="metrics", renderer="json", http_cache=0)
+def metrics_view(request):
+    """Report the histograms in `h.streamer.metrics` for this worker process."""
+    if not request.registry.settings.get("h.streamer.debug_metrics"):
+        raise HTTPNotFound()
+
+    return {
+        name: histogram.asdict()
+        for name, histogram in sorted(metrics.HISTOGRAMS.items())
+    }
+
+
 @notfound_view_config(renderer="json")
 def notfound(_exc, request):  # pragma: no cover
     request.response.status_code = 404
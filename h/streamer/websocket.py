@@ -2,13 +2,20 @@ import copy
 import json
 import logging
 import weakref
-from collections import namedtuple
+from collections import Counter, deque, namedtuple
+from time import perf_counter
 
+import gevent
 import jsonschema
 from gevent.queue import Full
+from ws4py.messaging import TextMessage
 from ws4py.websocket import WebSocket as _WebSocket
 
+from h.models import User
+from h.security import Permission, identity_permits
+from h.security.identity import LongLivedGroup
 from h.streamer.filter import FILTER_SCHEMA, SocketFilter
+from h.util.cache import TTLCache
 
 log = logging.getLogger(__name__)
 
@@ -17,8 +24,11 @@ log = logging.getLogger(__name__)
 MESSAGE_HANDLERS = {}
 
 
-# An incoming message from a WebSocket client.
-class Message(namedtuple("Message", ["socket", "payload"])):
+# An incoming message from a WebSocket client, and when it was put on the work
+# queue (from `time.perf_counter()`)
+class Message(
+    namedtuple("Message", ["socket", "payload", "queued_at"], defaults=(None,))
+):
     def reply(self, payload, ok=True):
         """
         Send a response to this message.
@@ -36,6 +46,49 @@ class Message(namedtuple("Message", ["socket", "payload"])):
         self.socket.send_json(data)
 
 
+class PreparedMessage(namedtuple("PreparedMessage", ["data", "frame"])):
+    """
+    A JSON message which has been serialized once, ready to send to many sockets.
+
+    `data` is the JSON encoded text and `frame` the complete WebSocket frame
+    for it. Frames sent by a server are never masked (see RFC 6455 section
+    5.1) so the same frame bytes can be written to every socket as is.
+    """
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.dumps(payload)
+        return cls(data=data, frame=TextMessage(data).single(mask=False))
+
+
+# What to do when a client's send buffer is full
+SLOW_CONSUMER_DROP_OLDEST = "drop_oldest"
+"""Drop the oldest buffered message to make space for the new one."""
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+"""Drop the connection, the client will reconnect and catch up."""
+SLOW_CONSUMER_POLICIES = (SLOW_CONSUMER_DROP_OLDEST, SLOW_CONSUMER_DISCONNECT)
+
+# How long (in seconds) a connection remembers whether it can read the shared
+# annotations in a group. Groups can change who can read them (e.g. from
+# anyone to only their members) without the streamer being told, so this is
+# how long such a change can take to apply to open connections.
+READABLE_GROUPS_TTL = 60
+READABLE_GROUPS_SIZE = 1000
+
+
+class _SendBuffer:
+    """Frames waiting to be written to a client by a separate greenlet."""
+
+    def __init__(self, size, slow_consumer_policy):
+        self.size = size
+        """The most frames to hold, or 0 to write frames straight away."""
+        self.slow_consumer_policy = slow_consumer_policy
+        """What to do with new frames when the buffer is full."""
+        self.frames = deque()
+        self.sender = None
+        """The greenlet writing the frames, if there are any to write."""
+
+
 class WebSocket(_WebSocket):
     # All instances of WebSocket, allowing us to iterate over open websockets
     instances = weakref.WeakSet()
@@ -49,6 +102,11 @@ class WebSocket(_WebSocket):
     debug = False
     """Enable debug logging for this connection."""
 
+    # Counts of what happened to messages which didn't fit in the send buffers
+    # of slow clients, across all instances. These are reported (and reset) by
+    # `h.streamer.metrics`.
+    send_buffer_counters = Counter()
+
     def __init__(self, sock, protocols=None, extensions=None, environ=None):
         super().__init__(
             sock,
@@ -63,6 +121,23 @@ class WebSocket(_WebSocket):
 
         self._work_queue = environ["h.ws.streamer_work_queue"]
 
+        # Whether this connection can read realtime updates for shared
+        # annotations, by the pubid of the annotation's group
+        self._readable_groups = TTLCache(
+            maxsize=READABLE_GROUPS_SIZE, ttl=READABLE_GROUPS_TTL
+        )
+
+        # If given a size, messages are buffered and written by a separate
+        # greenlet so a client which reads slowly can't hold up whoever is
+        # sending to it. Once the buffer is full the slow consumer policy
+        # decides what happens.
+        self._send_buffer = _SendBuffer(
+            size=environ.get("h.ws.send_buffer_size", 0),
+            slow_consumer_policy=environ.get(
+                "h.ws.slow_consumer_policy", SLOW_CONSUMER_DROP_OLDEST
+            ),
+        )
+
     def __new__(cls, *_args, **_kwargs):
         instance = super(WebSocket, cls).__new__(cls)
         cls.instances.add(instance)
@@ -81,7 +156,10 @@ class WebSocket(_WebSocket):
             return
 
         try:
-            self._work_queue.put(Message(socket=self, payload=payload), timeout=0.1)
+            self._work_queue.put(
+                Message(socket=self, payload=payload, queued_at=perf_counter()),
+                timeout=0.1,
+            )
         except Full:  # pragma: no cover
             log.warning(
                 "Streamer work queue full! Unable to queue message from "
@@ -96,11 +174,120 @@ class WebSocket(_WebSocket):
         except KeyError:
             pass
 
+        SocketFilter.remove_filter(self)
+
+    def permits_realtime_updates(self, annotation_context):
+        """
+        Check whether this connection can be notified about an annotation.
+
+        Whether a shared annotation can be read only depends on its group, so
+        the answer is cached per group for `READABLE_GROUPS_TTL` seconds, or
+        until `refresh_identity()` is called.
+
+        :param annotation_context: `AnnotationContext` of the annotation
+        """
+        annotation = annotation_context.annotation
+        if not annotation.shared:
+            return bool(
+                identity_permits(
+                    self.identity,
+                    annotation_context,
+                    Permission.Annotation.READ_REALTIME_UPDATES,
+                )
+            )
+
+        permitted = self._readable_groups.get(annotation.groupid)
+        if permitted is None:
+            permitted = bool(
+                identity_permits(
+                    self.identity,
+                    annotation_context,
+                    Permission.Annotation.READ_REALTIME_UPDATES,
+                )
+            )
+            self._readable_groups.set(annotation.groupid, permitted)
+
+        return permitted
+
+    def refresh_identity(self, session):
+        """
+        Reload the user's groups and forget any cached permissions.
+
+        This should be called when the groups the user is a member of change.
+
+        :param session: DB session to load the user's groups with
+        """
+        self._readable_groups.clear()
+
+        if self.identity and self.identity.user:
+            if user := session.get(User, self.identity.user.id):
+                self.identity.user.groups = [
+                    LongLivedGroup.from_model(group) for group in user.groups
+                ]
+
     def send_json(self, payload):
         if self.debug:
             log.info("Sending message %s (terminated: %s)", payload, self.terminated)
         if not self.terminated:
-            self.send(json.dumps(payload))
+            if self._send_buffer.size:
+                self._buffer_frame(PreparedMessage.from_json(payload).frame)
+            else:
+                self.send(json.dumps(payload))
+
+    def send_prepared(self, message):
+        """Send a :py:class:`PreparedMessage` without re-encoding it."""
+        if self.debug:
+            log.info(
+                "Sending message %s (terminated: %s)", message.data, self.terminated
+            )
+        if not self.terminated:
+            if self._send_buffer.size:
+                self._buffer_frame(message.frame)
+            else:
+                self._write(message.frame)
+
+    @property
+    def send_buffer_length(self):
+        """Get the number of messages waiting to be written to the client."""
+        return len(self._send_buffer.frames)
+
+    def _buffer_frame(self, frame):
+        """Queue a frame to be written to the client by the sender greenlet."""
+        if self.sock is None:
+            return
+
+        buffer = self._send_buffer
+        if len(buffer.frames) >= buffer.size:
+            if buffer.slow_consumer_policy == SLOW_CONSUMER_DISCONNECT:
+                self.send_buffer_counters["disconnected"] += 1
+                log.info("Disconnecting slow client %s", self.client_id)
+                buffer.frames.clear()
+                # Closing the socket fails any write or read in progress, after
+                # which ws4py terminates the connection as normal
+                self.close_connection()
+                return
+
+            self.send_buffer_counters["dropped"] += 1
+            buffer.frames.popleft()
+
+        buffer.frames.append(frame)
+
+        if buffer.sender is None:
+            buffer.sender = gevent.spawn(self._flush_send_buffer)
+
+    def _flush_send_buffer(self):
+        """Write buffered frames to the client until the buffer is empty."""
+        buffer = self._send_buffer
+        try:
+            while buffer.frames:
+                self._write(buffer.frames.popleft())
+        except (RuntimeError, OSError) as err:
+            # The connection was terminated or failed underneath us
+            if self.debug:
+                log.info("Failed to send buffered messages: %s", err)
+            buffer.frames.clear()
+        finally:
+            buffer.sender = None
 
 
 def handle_message(message, session=None):
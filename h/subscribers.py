@@ -6,6 +6,7 @@ from h import __version__, emails
 from h.events import AnnotationEvent
 from h.exceptions import RealtimeMessageQueueError
 from h.notification import reply
+from h.search.cache import COUNT_CACHE, SEARCH_RESULT_CACHE
 from h.services.annotation_read import AnnotationReadService
 from h.tasks import mailer
 
@@ -52,6 +53,22 @@ def annotation_sync(event):
         search_index.handle_annotation_event(event)
 
 
+@subscriber(AnnotationEvent)
+def invalidate_search_results(event):
+    """Forget any cached search results and counts for the annotation's URI."""
+    # This is needed even if nothing is cached, so that searches which are
+    # already running don't cache results without the change
+    request = event.request
+
+    with request.tm:
+        annotation = request.find_service(AnnotationReadService).get_annotation_by_id(
+            event.annotation_id
+        )
+        if annotation:
+            SEARCH_RESULT_CACHE.invalidate_tags(annotation.target_uri_normalized)
+            COUNT_CACHE.invalidate_tags(annotation.target_uri_normalized)
+
+
 @subscriber(AnnotationEvent)
 def publish_annotation_event(event):
     """Publish an annotation event to the message queue."""
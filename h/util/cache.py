@@ -0,0 +1,138 @@
+"""
+Small in-memory caches for values which are expensive to look up.
+
+Each `TTLCache` is per process, so it can take as long as its TTL for changes
+made by other processes to be noticed.
+"""
+
+from collections import OrderedDict, defaultdict
+from time import monotonic
+from weakref import WeakSet
+
+# All of the caches in this process, so they can be cleared together
+_CACHES = WeakSet()
+
+
+class TTLCache:
+    """
+    An LRU cache whose entries also expire after `ttl` seconds.
+
+    Entries can be tagged when they're set (e.g. with the URIs a search was
+    for) so that all of the entries for a tag can be invalidated at once.
+    """
+
+    def __init__(self, maxsize, ttl, key=None):
+        """
+        Create a cache.
+
+        :param maxsize: the most entries to keep
+        :param ttl: how long (in seconds) entries are kept for
+        :param key: a function which turns keys into the keys actually stored,
+            for keys which should match each other (e.g. case-insensitively)
+        """
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._key = key or (lambda key: key)
+
+        # Key to (expiry time, tags, value)
+        self._entries = OrderedDict()
+        # Tag to the keys of the entries with that tag
+        self._keys_by_tag = defaultdict(set)
+        # Tag to when it was last invalidated, oldest first
+        self._invalidated = OrderedDict()
+
+        _CACHES.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Get the cached value for `key`, or None if there isn't one."""
+        key = self._key(key)
+        try:
+            expires, _tags, value = self._entries[key]
+        except KeyError:
+            return None
+
+        if expires <= monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, tags=(), since=None):
+        """
+        Cache `value` for `key`.
+
+        :param tags: tags which the entry is invalidated by
+        :param since: when (from `time.monotonic()`) `value` was looked up.
+            If given, `value` isn't cached if any of `tags` have been
+            invalidated since then, as it might be out of date already.
+        """
+        if since is not None and self._invalidated_since(tags, since):
+            return
+
+        key = self._key(key)
+        tags = tuple(tags)
+        self._remove(key)
+
+        self._entries[key] = (monotonic() + self._ttl, tags, value)
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+
+        while len(self._entries) > self._maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *keys):
+        """Forget the entries for the given keys."""
+        for key in keys:
+            self._remove(self._key(key))
+
+    def invalidate_tags(self, *tags):
+        """Forget the entries with any of the given tags."""
+        now = monotonic()
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+            self._invalidated.pop(tag, None)
+            self._invalidated[tag] = now
+
+        # Values looked up longer ago than the TTL aren't cached anyway, so
+        # there's no need to remember older invalidations
+        horizon = now - self._ttl
+        while self._invalidated and next(iter(self._invalidated.values())) < horizon:
+            self._invalidated.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._invalidated.clear()
+
+    def _invalidated_since(self, tags, since):
+        if since < monotonic() - self._ttl:
+            # We no longer know what was invalidated then
+            return True
+
+        return any(
+            tag in self._invalidated and self._invalidated[tag] >= since for tag in tags
+        )
+
+    def _remove(self, key):
+        try:
+            _expires, tags, _value = self._entries.pop(key)
+        except KeyError:
+            return
+
+        for tag in tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+def clear_all():
+    """Clear every `TTLCache` in this process, e.g. between tests."""
+    for cache in _CACHES:
+        cache.clear()
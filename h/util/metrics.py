@@ -1,5 +1,54 @@
+from bisect import bisect_left
+
 import newrelic.agent
 
+# Upper bounds of the histogram buckets for durations (in seconds)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """A count of observed values in buckets, plus their total count and sum."""
+
+    def __init__(self, buckets):
+        """
+        Create a histogram with the given buckets.
+
+        :param buckets: Sorted upper bounds (inclusive) of the buckets. Values
+            bigger than the last bound are counted in an extra `+Inf` bucket.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def asdict(self):
+        """
+        Get a JSON serializable representation of the histogram.
+
+        Like Prometheus histograms the bucket counts are cumulative, so each
+        one is the number of values less than or equal to its bound.
+        """
+        cumulative_counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            cumulative_counts.append(total)
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(
+                zip(
+                    [str(bound) for bound in self.buckets] + ["+Inf"], cumulative_counts
+                )
+            ),
+        }
+
 
 def record_search_query_params(params, separate_replies):
     """
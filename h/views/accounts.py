@@ -29,6 +29,7 @@ from h.schemas.forms.accounts import (
     ResetPasswordSchema,
 )
 from h.services import SubscriptionService
+from h.services.user import USER_INFO_CACHE
 from h.tasks import mailer
 from h.util.view import json_view
 
@@ -516,6 +517,7 @@ class EditProfileController:
         user.location = appstruct["location"]
         user.uri = appstruct["link"]
         user.orcid = appstruct["orcid"]
+        USER_INFO_CACHE.invalidate(user.userid)
 
 
 @view_defaults(
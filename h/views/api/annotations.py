@@ -26,8 +26,10 @@ from h.schemas.annotation import (
     UpdateAnnotationSchema,
 )
 from h.schemas.util import validate_query_params
+from h.search.query import LIMIT_MAX
 from h.security import Permission
 from h.services import AnnotationWriteService
+from h.views.api.bulk._ndjson import get_ndjson_response
 from h.views.api.config import api_config
 from h.views.api.exceptions import PayloadError
 
@@ -47,7 +49,14 @@ def search(request):
 
     separate_replies = params.pop("_separate_replies", False)
 
-    result = search_lib.Search(request, separate_replies=separate_replies).run(params)
+    result = search_lib.Search(
+        request,
+        separate_replies=separate_replies,
+        combine_replies_search=request.feature("search_combined_replies"),
+        replies_limit=params.pop("_replies_limit"),
+        replies_search_after=params.pop("_replies_search_after", None),
+        cache_results=True,
+    ).run(params)
 
     svc = request.find_service(name="annotation_json")
 
@@ -62,10 +71,82 @@ def search(request):
         out["replies"] = svc.present_all_for_user(
             annotation_ids=result.reply_ids, user=request.user
         )
+        out["replies_total"] = result.reply_total
+        # Where the next page of replies starts, for `_replies_search_after`
+        out["replies_search_after"] = (
+            result.reply_cursors[-1] if result.reply_cursors else None
+        )
 
     return out
 
 
+@api_config(
+    versions=["v1", "v2"],
+    route_name="api.search",
+    accept="application/x-ndjson",
+    subtype="x-ndjson",
+)
+def search_ndjson(request):
+    """
+    Stream all of the annotations matching the given query as NDJSON.
+
+    Rather than returning a single page of results this pages through the
+    search index itself, presenting and sending a page of annotations at a
+    time so that large result sets don't have to be held in memory.
+    """
+    schema = SearchParamsSchema()
+    params = validate_query_params(schema, request.params)
+
+    # We choose the page size and where each page starts ourselves, and
+    # replies aren't returned separately
+    for key in ("limit", "offset", "_separate_replies", "_replies_limit"):
+        params.pop(key)
+    params.pop("_replies_search_after", None)
+
+    return get_ndjson_response(_stream_search(request, params))
+
+
+def _stream_search(request, params):
+    """Yield the presented annotations for `params` a page at a time."""
+    rows, search_after = _search_page(request, params, params.pop("search_after", None))
+    yield from rows
+
+    while search_after:
+        # Later pages are fetched after this request's transaction has ended
+        # and its DB session has been closed, so each gets a transaction of
+        # its own and the user is brought back into the session.
+        with request.tm:
+            if request.user is not None and request.user not in request.db:
+                request.db.add(request.user)
+
+            rows, search_after = _search_page(request, params, search_after)
+
+        yield from rows
+
+
+def _search_page(request, params, search_after):
+    """
+    Return one page of presented annotations and where the next page starts.
+
+    :returns: a `(rows, search_after)` tuple, where `search_after` is the
+        cursor of the page's last annotation, or None if this is the last page
+    """
+    page_params = params.copy()
+    page_params["limit"] = LIMIT_MAX
+    if search_after is not None:
+        page_params["search_after"] = search_after
+
+    result = search_lib.Search(request).run(page_params)
+
+    rows = request.find_service(name="annotation_json").present_all_for_user(
+        annotation_ids=result.annotation_ids, user=request.user
+    )
+    if len(result.annotation_ids) < LIMIT_MAX:
+        return rows, None
+
+    return rows, result.cursors[-1]
+
+
 @api_config(
     versions=["v1", "v2"],
     route_name="api.annotations",
@@ -113,8 +113,6 @@ def badge(request):
         count = 0
 
     else:
-        query = MultiDict({"uri": uri, "limit": 0})
-        result = search.Search(request).run(query)
-        count = result.total
+        count = search.Count(request, caller="badge").run(MultiDict({"uri": uri}))
 
     return {"total": count}
@@ -1,9 +1,10 @@
 import logging
 
-from pyramid.httpexceptions import HTTPInternalServerError
+from pyramid.httpexceptions import HTTPInternalServerError, HTTPNotFound
 from sentry_sdk import capture_message
 from sqlalchemy import text
 
+from h.search import instrumentation
 from h.util.view import json_view
 
 log = logging.getLogger(__name__)
@@ -28,3 +29,12 @@ def status(request):
         capture_message("Test message from h's status view")
 
     return {"status": "okay"}
+
+
+@json_view(route_name="elasticsearch_metrics", http_cache=0)
+def elasticsearch_metrics(request):
+    """Report the Elasticsearch requests made by this process, by caller."""
+    if not request.registry.settings.get("es.debug_metrics"):
+        raise HTTPNotFound()
+
+    return instrumentation.report()
@@ -4,6 +4,8 @@ import pytest
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
+from h.util import cache
+
 
 @pytest.fixture(scope="session")
 def db_engine():
@@ -15,6 +17,13 @@ def db_sessionfactory():
     return sessionmaker()
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Don't let anything cached by one test be seen by later tests."""
+    yield
+    cache.clear_all()
+
+
 @pytest.fixture
 def db_session(db_engine, db_sessionfactory):
     """
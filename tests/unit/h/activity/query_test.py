@@ -1,3 +1,5 @@
+import json
+from base64 import urlsafe_b64encode
 from unittest import mock
 
 import pytest
@@ -5,8 +7,9 @@ from h_matchers import Any
 from pyramid.httpexceptions import HTTPFound
 from webob.multidict import MultiDict
 
-from h.activity.query import check_url, execute, extract
+from h.activity.query import CURSOR_AFTER, CURSOR_BEFORE, check_url, execute, extract
 from h.models import Annotation
+from h.search.core import SearchResult
 
 
 class TestExtract:
@@ -330,6 +333,97 @@ class TestExecute:
         query = search.run.call_args[0][0]
         assert not query["offset"]
 
+    def test_it_gets_the_page_after_a_cursor(self, pyramid_request, search):
+        pyramid_request.params["page"] = "50"
+        pyramid_request.params["cursor"] = self.cursor(
+            CURSOR_AFTER, "1700000000000,annotation_id"
+        )
+
+        execute(pyramid_request, MultiDict(), self.PAGE_SIZE)
+
+        query = search.run.call_args[0][0]
+        assert query["search_after"] == "1700000000000,annotation_id"
+        assert "offset" not in query
+        assert "order" not in query
+
+    def test_it_gets_the_page_before_a_cursor(
+        self, pyramid_request, search, annotation_read_service
+    ):
+        pyramid_request.params["page"] = "50"
+        pyramid_request.params["cursor"] = self.cursor(
+            CURSOR_BEFORE, "1700000000000,annotation_id"
+        )
+        search.run.return_value = SearchResult(
+            total=20,
+            annotation_ids=["id_1", "id_2"],
+            reply_ids=[],
+            aggregations=mock.sentinel.aggregations,
+            cursors=["1700000000001,id_1", "1700000000002,id_2"],
+        )
+
+        result = execute(pyramid_request, MultiDict(), self.PAGE_SIZE)
+
+        query = search.run.call_args[0][0]
+        assert query["search_after"] == "1700000000000,annotation_id"
+        assert query["order"] == "asc"
+        assert "offset" not in query
+        annotation_read_service.get_annotations_by_id.assert_called_once_with(
+            ids=["id_2", "id_1"], eager_load=[Annotation.document]
+        )
+        assert result.cursors == {
+            49: self.cursor(CURSOR_BEFORE, "1700000000002,id_2"),
+            51: self.cursor(CURSOR_AFTER, "1700000000001,id_1"),
+        }
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "!!!",
+            urlsafe_b64encode(b"null").decode(),
+            urlsafe_b64encode(b"[1, 2, 3]").decode(),
+            urlsafe_b64encode(b'["sideways", 1700000000000]').decode(),
+            urlsafe_b64encode(b'["after", null]').decode(),
+            urlsafe_b64encode(b'["after", 1700000000000]').decode(),
+            urlsafe_b64encode(b'["after", [1700000000000]]').decode(),
+        ],
+    )
+    def test_it_ignores_invalid_cursors(self, pyramid_request, search, cursor):
+        pyramid_request.params["page"] = "2"
+        pyramid_request.params["cursor"] = cursor
+
+        execute(pyramid_request, MultiDict(), self.PAGE_SIZE)
+
+        query = search.run.call_args[0][0]
+        assert query["offset"] == self.PAGE_SIZE
+        assert "search_after" not in query
+
+    @pytest.mark.parametrize(
+        "page,expected_pages", [("1", [2]), ("2", [3]), ("10", [9, 11])]
+    )
+    def test_it_returns_cursors_for_the_pages_either_side(
+        self, pyramid_request, search, page, expected_pages
+    ):
+        pyramid_request.params["page"] = page
+        cursors = search.run.return_value.cursors
+
+        result = execute(pyramid_request, MultiDict(), self.PAGE_SIZE)
+
+        assert sorted(result.cursors) == expected_pages
+        assert result.cursors[int(page) + 1] == self.cursor(CURSOR_AFTER, cursors[-1])
+        if int(page) > 2:
+            assert result.cursors[int(page) - 1] == self.cursor(
+                CURSOR_BEFORE, cursors[0]
+            )
+
+    def test_it_returns_no_cursors_if_there_are_no_annotations(
+        self, pyramid_request, search
+    ):
+        search.run.return_value.cursors = []
+
+        result = execute(pyramid_request, MultiDict(), self.PAGE_SIZE)
+
+        assert result.cursors == {}
+
     def test_it_passes_the_given_query_params_to_the_search(
         self, pyramid_request, search
     ):
@@ -459,6 +553,14 @@ class TestExecute:
 
         assert result.aggregations == mock.sentinel.aggregations
 
+    @staticmethod
+    def cursor(direction, search_after):
+        return (
+            urlsafe_b64encode(json.dumps([direction, search_after]).encode())
+            .decode()
+            .rstrip("=")
+        )
+
     @pytest.fixture
     def _fetch_groups(self, group_pubids, patch):
         _fetch_groups = patch("h.activity.query._fetch_groups")
@@ -561,13 +663,17 @@ class TestExecute:
     def search(self, annotations):
         search = mock.Mock(spec_set=["append_modifier", "append_aggregation", "run"])
         search.run.return_value = mock.Mock(
-            spec_set=["total", "aggregations", "annotation_ids"]
+            spec_set=["total", "aggregations", "annotation_ids", "cursors"]
         )
         search.run.return_value.total = 20
         search.run.return_value.aggregations = mock.sentinel.aggregations
         search.run.return_value.annotation_ids = [
             annotation.id for annotation in annotations
         ]
+        search.run.return_value.cursors = [
+            f"{1700000000000 - i},{annotation.id}"
+            for i, annotation in enumerate(annotations)
+        ]
         return search
 
     @pytest.fixture
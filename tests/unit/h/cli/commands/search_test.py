@@ -32,6 +32,86 @@ class TestUpdateSettingsCommand:
         return patch("h.cli.commands.search.config.update_index_settings")
 
 
+class TestReindexCommand:
+    def test_it_reindexes_every_partition(
+        self, cli, cliconfig, pyramid_request, reindex
+    ):
+        result = cli.invoke(
+            search.reindex_,
+            ["--workers", "2", "--chunk-size", "10", "--concurrency", "3"],
+            obj=cliconfig,
+        )
+
+        assert not result.exit_code
+        reindex.start.assert_called_once_with(pyramid_request)
+        assert reindex.index_partition.call_args_list == [
+            mock.call(pyramid_request, reindex.start.return_value, partition, 10, 3)
+            for partition in range(reindex.PARTITIONS)
+        ]
+        reindex.finish.assert_called_once_with(pyramid_request)
+
+    def test_it_runs_the_partitions_in_worker_processes(
+        self, cli, cliconfig, ProcessPoolExecutor
+    ):
+        cli.invoke(search.reindex_, ["--workers", "2"], obj=cliconfig)
+
+        ProcessPoolExecutor.assert_called_once_with(
+            max_workers=2,
+            initializer=search._init_worker,  # pylint:disable=protected-access
+            initargs=(cliconfig["bootstrap"],),
+        )
+
+    def test_it_doesnt_finish_if_annotations_fail_to_index(
+        self, cli, cliconfig, reindex
+    ):
+        reindex.index_partition.side_effect = [{"id_1"}] + [set()] * (
+            reindex.PARTITIONS - 1
+        )
+
+        result = cli.invoke(search.reindex_, [], obj=cliconfig)
+
+        assert result.exit_code == 1
+        assert "1 annotations failed to index" in result.output
+        reindex.finish.assert_not_called()
+
+    def test_it_handles_runtimeerror_when_finishing(self, cli, cliconfig, reindex):
+        reindex.finish.side_effect = RuntimeError("asplode!")
+
+        result = cli.invoke(search.reindex_, [], obj=cliconfig)
+
+        assert result.exit_code == 1
+        assert "asplode!" in result.output
+
+    @pytest.fixture(autouse=True)
+    def reindex(self, patch):
+        reindex = patch("h.cli.commands.search.reindex")
+        reindex.PARTITIONS = 4
+        reindex.index_partition.return_value = set()
+        return reindex
+
+    @pytest.fixture(autouse=True)
+    def ProcessPoolExecutor(self, patch):
+        class InlineExecutor:
+            """Run the workers in this process instead of a process pool."""
+
+            def __init__(self, max_workers, initializer, initargs):
+                self.max_workers = max_workers
+                initializer(*initargs)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def map(self, fn, *iterables):
+                return [fn(*args) for args in zip(*iterables)]
+
+        return patch(
+            "h.cli.commands.search.ProcessPoolExecutor", side_effect=InlineExecutor
+        )
+
+
 @pytest.fixture
 def cliconfig(pyramid_request, mock_es_client):
     pyramid_request.es = mock_es_client
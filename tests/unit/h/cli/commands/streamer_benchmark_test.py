@@ -0,0 +1,429 @@
+# pylint:disable=protected-access
+from unittest import mock
+
+import pytest
+from gevent.queue import Queue
+from h_matchers import Any
+from sqlalchemy import func, select
+from ws4py.messaging import TextMessage
+
+from h import models
+from h.cli.commands import streamer_benchmark
+from h.cli.commands.streamer_benchmark import (
+    URI_PREFIX,
+    FakeSocket,
+    MemoryRealtime,
+    StreamerBenchmark,
+    _frame_payload,
+)
+from h.streamer import messages, metrics, streamer, websocket
+
+
+class TestStreamerBenchmarkCommand:
+    def test_it_runs_the_benchmark(
+        self, cli, cliconfig, pyramid_request, StreamerBenchmark, benchmark
+    ):
+        result = cli.invoke(
+            streamer_benchmark.streamer_benchmark,
+            [
+                "--clients",
+                "10",
+                "--events",
+                "20",
+                "--rate",
+                "0",
+                "--uris",
+                "3",
+                "--annotations",
+                "4",
+                "--seed",
+                "7",
+            ],
+            obj=cliconfig,
+        )
+
+        assert not result.exit_code
+        StreamerBenchmark.assert_called_once_with(pyramid_request, 7)
+        assert benchmark.method_calls[:2] == [
+            # Annotations left behind by earlier runs are deleted first
+            mock.call.delete_annotations(),
+            mock.call.create_annotations(4, 3),
+        ]
+        benchmark.run.assert_called_once_with(
+            connect_kwargs={
+                "count": 10,
+                "uri_count": 3,
+                "group_filter_ratio": 0.01,
+                "authenticated_ratio": 0.2,
+            },
+            send_kwargs={"count": 20, "rate": 0.0, "user_event_ratio": 0.1},
+        )
+        assert benchmark.method_calls[-2:] == [
+            mock.call.delete_annotations(),
+            mock.call.report(),
+        ]
+        assert result.output == "Clients: 10\nElapsed: 1.000s\n"
+
+    def test_it_overrides_the_streamer_settings(self, cli, cliconfig, pyramid_request):
+        result = cli.invoke(
+            streamer_benchmark.streamer_benchmark,
+            ["--batch-size", "50", "--send-buffer-size", "10"],
+            obj=cliconfig,
+        )
+
+        assert not result.exit_code
+        assert pyramid_request.registry.settings["h.streamer.batch_size"] == 50
+        assert pyramid_request.registry.settings["h.streamer.send_buffer_size"] == 10
+
+    def test_it_leaves_the_streamer_settings_alone_by_default(
+        self, cli, cliconfig, pyramid_request
+    ):
+        result = cli.invoke(streamer_benchmark.streamer_benchmark, [], obj=cliconfig)
+
+        assert not result.exit_code
+        assert "h.streamer.batch_size" not in pyramid_request.registry.settings
+        assert "h.streamer.send_buffer_size" not in pyramid_request.registry.settings
+
+    def test_it_deletes_the_annotations_if_the_run_fails(
+        self, cli, cliconfig, benchmark
+    ):
+        benchmark.run.side_effect = RuntimeError("Oh no")
+
+        result = cli.invoke(streamer_benchmark.streamer_benchmark, [], obj=cliconfig)
+
+        assert result.exit_code
+        assert benchmark.method_calls[-1] == mock.call.delete_annotations()
+
+    @pytest.fixture
+    def cliconfig(self, pyramid_request):
+        return {"bootstrap": mock.Mock(return_value=pyramid_request)}
+
+    @pytest.fixture(autouse=True)
+    def StreamerBenchmark(self, patch):
+        return patch("h.cli.commands.streamer_benchmark.StreamerBenchmark")
+
+    @pytest.fixture
+    def benchmark(self, StreamerBenchmark):
+        benchmark = StreamerBenchmark.return_value
+        benchmark.report.return_value = ["Clients: 10", "Elapsed: 1.000s"]
+        return benchmark
+
+
+class TestStreamerBenchmark:
+    def test_create_annotations(self, benchmark, db_session, pyramid_request):
+        benchmark.create_annotations(count=20, uri_count=3)
+
+        annotations = db_session.scalars(
+            select(models.Annotation).where(
+                models.Annotation.id.in_(benchmark._annotation_ids)
+            )
+        ).all()
+        assert len(annotations) == 20
+        assert {annotation.target_uri for annotation in annotations} <= {
+            f"{URI_PREFIX}{i}" for i in range(3)
+        }
+        pyramid_request.tm.commit.assert_called_once_with()
+
+    def test_create_annotations_is_repeatable(self, pyramid_request):
+        target_uris = []
+        for _ in range(2):
+            benchmark = StreamerBenchmark(pyramid_request, seed=1)
+            benchmark.create_annotations(count=20, uri_count=5)
+            target_uris.append(
+                [
+                    pyramid_request.db.get(models.Annotation, id_).target_uri
+                    for id_ in benchmark._annotation_ids
+                ]
+            )
+
+        assert target_uris[0] == target_uris[1]
+
+    def test_delete_annotations(self, benchmark, db_session, pyramid_request):
+        benchmark.create_annotations(count=5, uri_count=2)
+        # Annotations from an earlier run
+        StreamerBenchmark(pyramid_request, seed=1).create_annotations(
+            count=5, uri_count=2
+        )
+        document_ids = db_session.scalars(
+            select(models.Annotation.document_id).where(
+                models.Annotation.userid == benchmark._userid
+            )
+        ).all()
+
+        benchmark.delete_annotations()
+
+        assert not db_session.scalar(
+            select(func.count(models.Annotation.id)).where(
+                models.Annotation.userid == benchmark._userid
+            )
+        )
+        assert not db_session.scalar(
+            select(func.count(models.Document.id)).where(
+                models.Document.id.in_(document_ids)
+            )
+        )
+
+    def test_delete_annotations_leaves_other_annotations_alone(
+        self, benchmark, db_session, factories
+    ):
+        benchmark.create_annotations(count=5, uri_count=2)
+        # An annotation by someone else on a benchmark page
+        annotation = factories.Annotation(target_uri=f"{URI_PREFIX}0")
+        # A benchmark user's annotation elsewhere, sharing a benchmark document
+        other_annotation = factories.Annotation(
+            userid=benchmark._userid,
+            document=db_session.get(
+                models.Annotation, benchmark._annotation_ids[0]
+            ).document,
+        )
+        db_session.flush()
+
+        benchmark.delete_annotations()
+
+        assert (
+            db_session.scalars(
+                select(models.Annotation.id).where(
+                    models.Annotation.id.in_(
+                        [annotation.id, other_annotation.id, *benchmark._annotation_ids]
+                    )
+                )
+            ).all()
+            == Any.list.containing([annotation.id, other_annotation.id]).only()
+        )
+        assert db_session.get(models.Document, other_annotation.document_id)
+
+    def test_run_connects_the_clients(self, benchmark, process_work_queue):
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(self.CONNECT_KWARGS, self.SEND_KWARGS)
+
+        assert len(benchmark._clients) == 4
+        client_messages = [
+            message
+            for message in process_work_queue.handled
+            if isinstance(message, websocket.Message)
+        ]
+        assert [message.payload["type"] for message in client_messages] == [
+            "client_id",
+            "filter",
+        ] * 4
+
+    def test_run_connects_clients_as_users_if_there_are_users(
+        self, benchmark, process_work_queue, factories
+    ):
+        user = factories.User()
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(
+            dict(self.CONNECT_KWARGS, authenticated_ratio=1), self.SEND_KWARGS
+        )
+
+        assert {client.identity.user.userid for client in benchmark._clients} == {
+            user.userid
+        }
+        assert process_work_queue.handled
+
+    def test_run_waits_for_the_work_queue_while_connecting_clients(
+        self, benchmark, process_work_queue
+    ):
+        benchmark._work_queue = Queue(maxsize=4)
+        benchmark._realtime = MemoryRealtime(benchmark._work_queue)
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(dict(self.CONNECT_KWARGS, count=10), self.SEND_KWARGS)
+
+        # Nothing was dropped because the queue was full
+        assert len(process_work_queue.handled) == 2 * 10 + 10
+
+    @pytest.mark.usefixtures("process_work_queue")
+    def test_run_with_send_buffers(self, benchmark, pyramid_request):
+        pyramid_request.registry.settings["h.streamer.send_buffer_size"] = 100
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(self.CONNECT_KWARGS, self.SEND_KWARGS)
+
+        assert not any(client.send_buffer_length for client in benchmark._clients)
+        assert len(benchmark._sockets[0].frames) == 10
+
+    def test_run_sends_events_at_the_given_rate(self, benchmark, process_work_queue):
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(self.CONNECT_KWARGS, dict(self.SEND_KWARGS, rate=1000))
+
+        sent_at = sorted(
+            time for times in benchmark._sent_at.values() for time in times
+        )
+        assert sent_at[-1] - sent_at[0] >= 9 / 1000
+        assert process_work_queue.handled
+
+    def test_run_sends_the_events(self, benchmark, process_work_queue):
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(self.CONNECT_KWARGS, self.SEND_KWARGS)
+
+        events = [
+            message
+            for message in process_work_queue.handled
+            if isinstance(message, messages.Message)
+        ]
+        assert len(events) == 10
+        assert {event.topic for event in events} <= {
+            streamer.ANNOTATION_TOPIC,
+            streamer.USER_TOPIC,
+        }
+        assert {
+            event.payload["annotation_id"]
+            for event in events
+            if event.topic == streamer.ANNOTATION_TOPIC
+        } <= set(benchmark._annotation_ids)
+
+    def test_run_sends_user_events_if_there_are_users(
+        self, benchmark, process_work_queue, factories
+    ):
+        factories.User()
+        benchmark.create_annotations(count=5, uri_count=3)
+
+        benchmark.run(self.CONNECT_KWARGS, dict(self.SEND_KWARGS, user_event_ratio=1))
+
+        assert {
+            message.topic
+            for message in process_work_queue.handled
+            if isinstance(message, messages.Message)
+        } == {streamer.USER_TOPIC}
+        # Only notifications about annotations are counted
+        assert "Annotation events: 0" in benchmark.report()
+
+    def test_report(self, benchmark, process_work_queue):
+        benchmark.create_annotations(count=5, uri_count=3)
+        benchmark.run(self.CONNECT_KWARGS, self.SEND_KWARGS)
+
+        report = benchmark.report()
+
+        assert report[:3] == [
+            "Clients: 4",
+            "Annotation events: 10",
+            # Every event is delivered to every client
+            "Messages delivered: 40",
+        ]
+        assert report[3].startswith("Elapsed: ")
+        assert report[4].startswith("Messages/sec: ")
+        assert [line.split(":")[0] for line in report[5:8]] == [
+            "Delivery latency p50",
+            "Delivery latency p99",
+            "Delivery latency max",
+        ]
+        # Only what happened while sending events is reported
+        assert report[8:] == ["handler_seconds: count=10 mean=0.500000"]
+        assert process_work_queue.handled
+
+    def test_report_without_any_deliveries(self, benchmark, process_work_queue):
+        process_work_queue.deliver = False
+        benchmark.create_annotations(count=5, uri_count=3)
+        benchmark.run(self.CONNECT_KWARGS, self.SEND_KWARGS)
+
+        report = benchmark.report()
+
+        assert report[:4] == [
+            "Clients: 4",
+            "Annotation events: 10",
+            "Messages delivered: 0",
+            "Elapsed: 0.000s",
+        ]
+        assert not [line for line in report if line.startswith("Delivery")]
+
+    CONNECT_KWARGS = {
+        "count": 4,
+        "uri_count": 3,
+        "group_filter_ratio": 0.5,
+        "authenticated_ratio": 0,
+    }
+    SEND_KWARGS = {"count": 10, "rate": 0, "user_event_ratio": 0}
+
+    @pytest.fixture
+    def pyramid_request(self, pyramid_request):
+        pyramid_request.tm = mock.Mock()
+        return pyramid_request
+
+    @pytest.fixture
+    def benchmark(self, pyramid_request):
+        return StreamerBenchmark(pyramid_request, seed=0)
+
+    @pytest.fixture
+    def process_work_queue(self, patch, benchmark):
+        """Replace the streamer with one which notifies every client of every event."""
+        process_work_queue = patch(
+            "h.cli.commands.streamer_benchmark.streamer.process_work_queue"
+        )
+        process_work_queue.handled = []
+        process_work_queue.deliver = True
+
+        def handle_messages(_registry, queue):
+            for message in queue:
+                process_work_queue.handled.append(message)
+
+                if not isinstance(message, messages.Message):
+                    continue
+
+                metrics.observe("handler_seconds", 0.5)
+                if not process_work_queue.deliver:
+                    continue
+
+                if message.topic == streamer.ANNOTATION_TOPIC:
+                    payload = {
+                        "type": "annotation-notification",
+                        "payload": [{"id": message.payload["annotation_id"]}],
+                    }
+                else:
+                    payload = {"type": "session-change"}
+
+                reply = websocket.PreparedMessage.from_json(payload)
+                for client in benchmark._clients:
+                    client.send_prepared(reply)
+
+        process_work_queue.side_effect = handle_messages
+        return process_work_queue
+
+    @pytest.fixture(autouse=True)
+    def histograms(self, monkeypatch):
+        monkeypatch.setattr(metrics, "HISTOGRAMS", {})
+
+
+class TestMemoryRealtime:
+    @pytest.mark.parametrize(
+        "method,topic",
+        (
+            ("publish_annotation", streamer.ANNOTATION_TOPIC),
+            ("publish_user", streamer.USER_TOPIC),
+        ),
+    )
+    def test_it_puts_messages_on_the_work_queue(self, method, topic):
+        work_queue = mock.Mock(spec_set=["put"])
+
+        getattr(MemoryRealtime(work_queue), method)({"key": ("value",)})
+
+        message = work_queue.put.call_args[0][0]
+        assert message.topic == topic
+        # The payload has been through JSON, like one from the broker
+        assert message.payload == {"key": ["value"]}
+        assert message.queued_at
+
+
+class TestFakeSocket:
+    def test_it_records_the_frames_sent(self):
+        sock = FakeSocket()
+
+        sock.sendall(b"frame 1")
+        sock.sendall(b"frame 2")
+        sock.shutdown(None)
+        sock.close()
+
+        assert [frame for _, frame in sock.frames] == [b"frame 1", b"frame 2"]
+        assert sock.frames[0][0] <= sock.frames[1][0]
+
+
+@pytest.mark.parametrize("length", (0, 125, 126, 65535, 65536))
+def test_frame_payload(length):
+    data = "x" * length
+    frame = TextMessage(data).single(mask=False)
+
+    assert _frame_payload(frame) == data.encode("utf-8")
@@ -9,6 +9,17 @@ from h.config import configure
         (None, None, "h.db_session_checks", True),
         ("DB_SESSION_CHECKS", "False", "h.db_session_checks", False),
         ("SECRET_KEY", "dont_tell_anyone", "secret_key", b"dont_tell_anyone"),
+        (None, None, "h.streamer.batch_size", 1),
+        ("STREAMER_BATCH_SIZE", "100", "h.streamer.batch_size", 100),
+        ("STREAMER_SEND_BUFFER_SIZE", "64", "h.streamer.send_buffer_size", 64),
+        (None, None, "h.streamer.slow_consumer_policy", "drop_oldest"),
+        ("STREAMER_DEBUG_METRICS", "true", "h.streamer.debug_metrics", True),
+        (
+            "STREAMER_SLOW_CONSUMER_POLICY",
+            "disconnect",
+            "h.streamer.slow_consumer_policy",
+            "disconnect",
+        ),
         ("SECRET_SALT", "best_with_pepper", "secret_salt", b"best_with_pepper"),
         ("SENTRY_ENVIRONMENT", "test-env", "h.sentry_environment", "test-env"),
         (
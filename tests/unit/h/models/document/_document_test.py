@@ -226,6 +226,15 @@ class TestMergeDocuments:
 
             assert count == expected_count
 
+    def test_it_invalidates_the_expand_uri_cache(
+        self, db_session, duplicate_docs, EXPAND_URI_CACHE
+    ):
+        merge_documents(db_session, duplicate_docs)
+
+        EXPAND_URI_CACHE.invalidate_tags.assert_called_once_with(
+            *[doc.id for doc in duplicate_docs]
+        )
+
     def test_it_raises_retryable_error_when_flush_fails(
         self, db_session, duplicate_docs, monkeypatch
     ):
@@ -270,6 +279,10 @@ class TestMergeDocuments:
 
         return documents
 
+    @pytest.fixture
+    def EXPAND_URI_CACHE(self, patch):
+        return patch("h.storage.EXPAND_URI_CACHE")
+
 
 class TestUpdateDocumentMetadata:
     @pytest.mark.parametrize(
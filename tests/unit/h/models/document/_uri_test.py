@@ -120,6 +120,31 @@ class TestCreateOrUpdateDocumentURI:
         )
         assert document_uri == Any.object.with_attrs(updated_attrs)
 
+    def test_it_invalidates_the_expand_uri_cache_for_new_DocumentURIs(
+        self, db_session, doc_uri_attrs, EXPAND_URI_CACHE
+    ):
+        db_session.add(doc_uri_attrs["document"])
+        db_session.flush()
+
+        create_or_update_document_uri(session=db_session, **doc_uri_attrs)
+
+        EXPAND_URI_CACHE.invalidate.assert_called_once_with(
+            "httpx://example.com/example_uri.html"
+        )
+        EXPAND_URI_CACHE.invalidate_tags.assert_called_once_with(
+            doc_uri_attrs["document"].id
+        )
+
+    def test_it_doesnt_invalidate_the_expand_uri_cache_for_existing_DocumentURIs(
+        self, db_session, doc_uri_attrs, EXPAND_URI_CACHE
+    ):
+        db_session.add(DocumentURI(**doc_uri_attrs))
+
+        create_or_update_document_uri(session=db_session, **doc_uri_attrs)
+
+        EXPAND_URI_CACHE.invalidate.assert_not_called()
+        EXPAND_URI_CACHE.invalidate_tags.assert_not_called()
+
     def test_it_skips_denormalizing_http_uris_to_document(
         self, db_session, doc_uri_attrs
     ):
@@ -173,6 +198,10 @@ class TestCreateOrUpdateDocumentURI:
             "updated": datetime.now() - timedelta(days=1),
         }
 
+    @pytest.fixture
+    def EXPAND_URI_CACHE(self, patch):
+        return patch("h.storage.EXPAND_URI_CACHE")
+
     @pytest.fixture()
     def mock_db_session(self, db_session):
         return Mock(spec=db_session)
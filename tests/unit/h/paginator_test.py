@@ -149,6 +149,28 @@ class TestPaginate:
         pyramid_request.current_route_path.assert_called_once_with(_query=expected)
         assert url == pyramid_request.current_route_path.return_value
 
+    @pytest.mark.parametrize(
+        "page,expected",
+        [
+            # Links to pages with cursors include the page's cursor.
+            (33, {"page": 33, "cursor": "next_cursor"}),
+            # Links to other pages don't include the current page's cursor.
+            (26, {"page": 26}),
+        ],
+    )
+    def test_url_for_with_cursors(self, pyramid_request, page, expected):
+        pyramid_request.params = NestedMultiDict(
+            {"page": "32", "cursor": "current_cursor"}
+        )
+        pyramid_request.current_route_path = mock.Mock(spec_set=["__call__"])
+        url_for = paginate(pyramid_request, 600, 10, cursors={33: "next_cursor"})[
+            "url_for"
+        ]
+
+        url_for(page=page)
+
+        pyramid_request.current_route_path.assert_called_once_with(_query=expected)
+
 
 @pytest.mark.usefixtures("paginate")
 class TestPaginateQuery:
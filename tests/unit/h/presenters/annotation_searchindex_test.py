@@ -1,7 +1,11 @@
 import pytest
+import sqlalchemy as sa
 from h_matchers import Any
 
-from h.presenters.annotation_searchindex import AnnotationSearchIndexPresenter
+from h.presenters.annotation_searchindex import (
+    AnnotationSearchIndexPresenter,
+    AnnotationsSearchIndexPresenter,
+)
 from h.util.datetime import utc_iso8601
 
 pytestmark = pytest.mark.usefixtures("moderation_service")
@@ -87,10 +91,105 @@ class TestAnnotationSearchIndexPresenter:
         else:
             assert "nipsa" not in annotation_dict
 
-    @pytest.fixture(autouse=True)
-    def DocumentSearchIndexPresenter(self, patch):
-        class_ = patch(
-            "h.presenters.annotation_searchindex.DocumentSearchIndexPresenter"
+
+@pytest.mark.usefixtures("nipsa_service")
+class TestAnnotationsSearchIndexPresenter:
+    def test_asdicts_matches_the_single_annotation_presenter(
+        self, pyramid_request, factories
+    ):
+        annotations = factories.Annotation.create_batch(2)
+        factories.Annotation.create_batch(2, references=[annotations[0].id])
+        factories.Annotation(references=[annotations[1].id])
+
+        annotation_dicts = AnnotationsSearchIndexPresenter(
+            annotations, pyramid_request
+        ).asdicts()
+
+        assert annotation_dicts == [
+            AnnotationSearchIndexPresenter(annotation, pyramid_request).asdict()
+            for annotation in annotations
+        ]
+
+    def test_asdicts_looks_up_thread_ids_for_all_annotations_at_once(
+        self, pyramid_request, factories, db_session
+    ):
+        annotations = factories.Annotation.create_batch(3)
+        replies = factories.Annotation.create_batch(2, references=[annotations[0].id])
+        db_session.flush()
+        statements = []
+
+        def before_cursor_execute(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        sa.event.listen(db_session.bind, "before_cursor_execute", before_cursor_execute)
+        try:
+            annotation_dicts = AnnotationsSearchIndexPresenter(
+                annotations, pyramid_request
+            ).asdicts()
+        finally:
+            sa.event.remove(
+                db_session.bind, "before_cursor_execute", before_cursor_execute
+            )
+
+        assert len(statements) == 1
+        assert (
+            annotation_dicts[0]["thread_ids"]
+            == Any.list.containing([reply.id for reply in replies]).only()
         )
-        class_.return_value.asdict.return_value = {}
-        return class_
+        assert annotation_dicts[1]["thread_ids"] == []
+
+    @pytest.mark.parametrize("is_moderated", [True, False])
+    @pytest.mark.parametrize("replies_moderated", [True, False])
+    def test_it_marks_annotations_hidden_correctly(
+        self,
+        pyramid_request,
+        moderation_service,
+        is_moderated,
+        replies_moderated,
+        factories,
+    ):
+        annotation, other_annotation = factories.Annotation.create_batch(2)
+        replies = factories.Annotation.create_batch(2, references=[annotation.id])
+        moderated_ids = {other_annotation.id}
+        if is_moderated:
+            moderated_ids.add(annotation.id)
+        if replies_moderated:
+            moderated_ids.update(reply.id for reply in replies)
+        moderation_service.all_hidden.return_value = moderated_ids
+
+        annotation_dicts = AnnotationsSearchIndexPresenter(
+            [annotation, other_annotation], pyramid_request
+        ).asdicts()
+
+        moderation_service.all_hidden.assert_called_once_with(
+            Any.list.containing(
+                [annotation.id, other_annotation.id] + [reply.id for reply in replies]
+            ).only()
+        )
+        assert annotation_dicts[0]["hidden"] == bool(is_moderated and replies_moderated)
+        assert annotation_dicts[1]["hidden"]
+
+    def test_it_marks_annotations_nipsad_correctly(
+        self, pyramid_request, nipsa_service, factories
+    ):
+        nipsad_annotation, annotation = factories.Annotation.create_batch(2)
+        nipsa_service.fetch_all_flagged_userids.return_value = {
+            nipsad_annotation.userid
+        }
+
+        annotation_dicts = AnnotationsSearchIndexPresenter(
+            [nipsad_annotation, annotation], pyramid_request
+        ).asdicts()
+
+        assert annotation_dicts[0]["nipsa"]
+        assert "nipsa" not in annotation_dicts[1]
+
+    def test_asdicts_with_no_annotations(self, pyramid_request):
+        assert not AnnotationsSearchIndexPresenter([], pyramid_request).asdicts()
+
+
+@pytest.fixture(autouse=True)
+def DocumentSearchIndexPresenter(patch):
+    class_ = patch("h.presenters.annotation_searchindex.DocumentSearchIndexPresenter")
+    class_.return_value.asdict.return_value = {}
+    return class_
@@ -211,6 +211,7 @@ def test_includeme():
         call("custom_onboarding", "/welcome/{slug}"),
         call("unsubscribe", "/notification/unsubscribe/{token}"),
         call("status", "/_status"),
+        call("elasticsearch_metrics", "/_metrics/elasticsearch"),
         call("about", "/about/", static=True),
         call("bioscience", "/bioscience/", static=True),
         call("blog", "/blog/", static=True),
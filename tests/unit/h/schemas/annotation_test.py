@@ -622,6 +622,8 @@ class TestSearchParamsSchema:
         expected_params = MultiDict(
             {
                 "_separate_replies": True,
+                "_replies_limit": 10,
+                "_replies_search_after": "2018-01-01",
                 "group": "group1",
                 "quote": "quote me",
                 "references": "3456TA12",
@@ -645,6 +647,8 @@ class TestSearchParamsSchema:
             MultiDict(
                 {
                     "_separate_replies": "1",
+                    "_replies_limit": "10",
+                    "_replies_search_after": "2018-01-01",
                     "group": "group1",
                     "quote": "quote me",
                     "references": "3456TA12",
@@ -691,6 +695,11 @@ class TestSearchParamsSchema:
 
         assert params["limit"] == LIMIT_DEFAULT
 
+    def test_it_defaults_replies_limit(self, schema):
+        params = validate_query_params(schema, NestedMultiDict())
+
+        assert params["_replies_limit"] == LIMIT_MAX
+
     def test_it_defaults_offset(self, schema):
         params = validate_query_params(schema, NestedMultiDict())
 
@@ -738,6 +747,40 @@ class TestSearchParamsSchema:
         with pytest.raises(ValidationError):
             validate_query_params(schema, input_params)
 
+    @pytest.mark.parametrize("replies_limit", (LIMIT_MAX + 1, -1))
+    def test_raises_if_invalid_replies_limit(self, schema, replies_limit):
+        input_params = NestedMultiDict(MultiDict({"_replies_limit": replies_limit}))
+
+        with pytest.raises(ValidationError):
+            validate_query_params(schema, input_params)
+
+    @pytest.mark.parametrize(
+        "replies_search_after", ("invalid_date", "invalid_date,abc123")
+    )
+    def test_raises_if_invalid_replies_search_after_date(
+        self, schema, replies_search_after
+    ):
+        input_params = NestedMultiDict(
+            MultiDict({"_replies_search_after": replies_search_after})
+        )
+
+        with pytest.raises(ValidationError):
+            validate_query_params(schema, input_params)
+
+    @pytest.mark.parametrize(
+        "replies_search_after", ("2018-01-01", "1514764800000,abc123")
+    )
+    def test_passes_validation_if_valid_replies_search_after(
+        self, schema, replies_search_after
+    ):
+        input_params = NestedMultiDict(
+            MultiDict({"_replies_search_after": replies_search_after})
+        )
+
+        params = validate_query_params(schema, input_params)
+
+        assert params["_replies_search_after"] == replies_search_after
+
     @pytest.mark.parametrize(
         "search_after,sort",
         (
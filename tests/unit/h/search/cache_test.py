@@ -0,0 +1,48 @@
+from unittest import mock
+
+from elasticsearch_dsl import Q, Search
+
+from h.search.cache import INDEX_REFRESH_INTERVAL, index_as_of, scope_uris
+
+
+class TestIndexAsOf:
+    def test_it(self):
+        with mock.patch("h.search.cache.monotonic", return_value=100.0):
+            assert index_as_of() == 100.0 - INDEX_REFRESH_INTERVAL
+
+
+class TestScopeURIs:
+    def test_it_returns_the_uris(self):
+        search = (
+            Search()
+            .filter("term", shared=True)
+            .query(Q("simple_query_string", query="foo"))
+            .query(
+                "bool",
+                should=[
+                    Q("terms", **{"target.scope": ["httpx://example.com"]}),
+                    Q("terms", **{"target.scope": ["httpx://example.org"]}),
+                ],
+            )
+        )
+
+        assert scope_uris(search.to_dict()) == [
+            "httpx://example.com",
+            "httpx://example.org",
+        ]
+
+    def test_it_returns_None_if_there_are_no_uris(self):
+        search = Search().filter("terms", group=["__world__"])
+
+        assert scope_uris(search.to_dict()) is None
+
+    def test_it_returns_None_if_there_are_wildcard_uris(self):
+        search = Search().query(
+            "bool",
+            should=[
+                Q("wildcard", **{"target.scope": "httpx://example.com/*"}),
+                Q("terms", **{"target.scope": ["httpx://example.org"]}),
+            ],
+        )
+
+        assert scope_uris(search.to_dict()) is None
@@ -6,6 +6,7 @@ from h_matchers import Any
 from packaging.version import Version
 
 from h.search.client import Client, get_client
+from h.search.instrumentation import InstrumentedConnection, InstrumentedTransport
 
 pytestmark = [
     pytest.mark.xdist_group("elasticsearch"),
@@ -76,6 +77,16 @@ class TestGetClient:
         )
         assert client == Client.return_value
 
+    def test_it_instruments_the_client(self, Elasticsearch):
+        get_client({"es.url": sentinel.url, "es.index": sentinel.index})
+
+        assert Elasticsearch.call_args.kwargs == Any.dict.containing(
+            {
+                "transport_class": InstrumentedTransport,
+                "connection_class": InstrumentedConnection,
+            }
+        )
+
     @pytest.fixture
     def Elasticsearch(self, patch):
         return patch("h.search.client.elasticsearch.Elasticsearch")
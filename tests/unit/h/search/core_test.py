@@ -6,12 +6,15 @@ Tests for filtering/matching/aggregating on specific annotation fields are in
 """
 
 import datetime
+from unittest import mock
 
 import pytest
+from elasticsearch import TransportError
 from h_matchers import Any
 from webob.multidict import MultiDict
 
 from h import search
+from h.search import cache, instrumentation, query
 
 pytestmark = [
     pytest.mark.xdist_group("elasticsearch"),
@@ -166,6 +169,17 @@ class TestSearch:
 
         assert result.reply_ids == []
 
+    @pytest.mark.parametrize("caller", ("search", "badge"))
+    def test_it_tags_its_requests_with_the_caller(self, pyramid_request, caller):
+        instrumentation.reset()
+
+        if caller == "search":
+            search.Search(pyramid_request).run(MultiDict({}))
+        else:
+            search.Search(pyramid_request, caller=caller).run(MultiDict({}))
+
+        assert instrumentation.report()[caller]["requests"] == 1
+
     @pytest.fixture
     def UriCombinedWildcardFilter(self, patch):
         return patch("h.search.core.query.UriCombinedWildcardFilter")
@@ -295,14 +309,498 @@ class TestSearchWithSeparateReplies:
 
         # Create three more replies so that the oldest reply will be pushed out
         # of reply_ids. (We only need 3, not 200, because we're going to use
-        # the _replies_limit test seam to limit it to 3 replies instead of 200.
+        # replies_limit to limit it to 3 replies instead of 200.
         # This is just to make the test faster.)
         for _ in range(3):
             Annotation(references=[annotation.id], shared=True)
 
         result = search.Search(
-            pyramid_request, separate_replies=True, _replies_limit=3
+            pyramid_request, separate_replies=True, replies_limit=3
         ).run(MultiDict({}))
 
         assert len(result.reply_ids) == 3
         assert oldest_reply.id not in result.reply_ids
+
+    def test_it_returns_the_total_number_of_replies(self, pyramid_request, Annotation):
+        annotation = Annotation(shared=True)
+        for _ in range(3):
+            Annotation(references=[annotation.id], shared=True)
+
+        result = search.Search(
+            pyramid_request, separate_replies=True, replies_limit=1
+        ).run(MultiDict({}))
+
+        assert len(result.reply_ids) == 1
+        assert result.reply_total == 3
+
+    def test_it_pages_through_replies_with_replies_search_after(
+        self, pyramid_request, Annotation
+    ):
+        now = datetime.datetime.now()
+        annotation = Annotation(updated=now, shared=True)
+        replies = [
+            Annotation(
+                references=[annotation.id],
+                shared=True,
+                updated=now + datetime.timedelta(minutes=minutes),
+            )
+            for minutes in (3, 2, 1)
+        ]
+
+        result = search.Search(
+            pyramid_request,
+            separate_replies=True,
+            replies_limit=2,
+            replies_search_after=replies[1].updated.isoformat(),
+        ).run(MultiDict({}))
+
+        assert result.reply_ids == [replies[2].id]
+        assert result.reply_total == 3
+
+    def test_it_pages_through_replies_with_the_same_updated_time(
+        self, pyramid_request, Annotation
+    ):
+        now = datetime.datetime.now()
+        annotation = Annotation(updated=now, shared=True)
+        reply_ids = sorted(
+            (
+                Annotation(references=[annotation.id], shared=True, updated=now).id
+                for _ in range(3)
+            ),
+            reverse=True,
+        )
+
+        def page(replies_search_after=None):
+            return search.Search(
+                pyramid_request,
+                separate_replies=True,
+                replies_limit=2,
+                replies_search_after=replies_search_after,
+            ).run(MultiDict({}))
+
+        first = page()
+        second = page(first.reply_cursors[-1])
+
+        assert first.reply_ids + second.reply_ids == reply_ids
+
+
+@pytest.mark.usefixtures("group_service", "nipsa_service")
+class TestSearchWithCombinedRepliesSearch:
+    """Unit tests for search.Search when combine_replies_search=True is given."""
+
+    def test_it_returns_replies_separately_from_annotations(
+        self, search_for_uri, Annotation
+    ):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        reply_1 = Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+        reply_2 = Annotation(
+            target_uri="http://example.com",
+            references=[annotation.id, reply_1.id],
+            shared=True,
+        )
+
+        result = search_for_uri("http://example.com")
+
+        assert result.total == 1
+        assert result.annotation_ids == [annotation.id]
+        assert result.reply_ids == Any.list.containing([reply_1.id, reply_2.id]).only()
+
+    def test_it_searches_in_a_single_request(self, search_for_uri, es_client):
+        with mock.patch.object(
+            es_client.conn, "search", wraps=es_client.conn.search
+        ) as search_, mock.patch.object(
+            es_client.conn, "msearch", wraps=es_client.conn.msearch
+        ) as msearch:
+            search_for_uri("http://example.com")
+
+        search_.assert_not_called()
+        msearch.assert_called_once()
+
+    def test_it_doesnt_return_replies_to_other_annotations(
+        self, search_for_uri, Annotation
+    ):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        reply = Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+        other_annotation = Annotation(target_uri="http://example.com", shared=True)
+        Annotation(
+            target_uri="http://example.com",
+            references=[other_annotation.id],
+            shared=True,
+        )
+
+        result = search_for_uri(
+            "http://example.com",
+            # The other annotation is on the next page
+            limit=1,
+            sort="id",
+            order="asc" if annotation.id < other_annotation.id else "desc",
+        )
+
+        assert result.annotation_ids == [annotation.id]
+        assert result.reply_ids == [reply.id]
+
+    def test_it_searches_for_replies_separately_if_there_are_too_many(
+        self, pyramid_request, Annotation
+    ):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        newest_reply = Annotation(
+            target_uri="http://example.com",
+            references=[annotation.id],
+            shared=True,
+            updated=datetime.datetime.now() + datetime.timedelta(minutes=5),
+        )
+        Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+
+        result = search.Search(
+            pyramid_request,
+            separate_replies=True,
+            combine_replies_search=True,
+            replies_limit=1,
+        ).run(MultiDict({"uri": "http://example.com"}))
+
+        assert result.reply_ids == [newest_reply.id]
+        assert result.reply_total == 2
+
+    def test_it_returns_the_total_number_of_replies(self, search_for_uri, Annotation):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+
+        result = search_for_uri("http://example.com")
+
+        assert result.reply_total == 1
+
+    def test_it_only_returns_replies_the_user_can_read(
+        self, search_for_uri, Annotation
+    ):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        reply = Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+        Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=False
+        )
+
+        result = search_for_uri("http://example.com")
+
+        assert result.reply_ids == [reply.id]
+
+    def test_it_returns_aggregations(self, pyramid_request, Annotation):
+        Annotation(target_uri="http://example.com", shared=True, tags=["tag"])
+        search_ = search.Search(
+            pyramid_request, separate_replies=True, combine_replies_search=True
+        )
+        search_.append_aggregation(query.TagsAggregation())
+
+        result = search_.run(MultiDict({"uri": "http://example.com"}))
+
+        assert result.aggregations == {"tags": [{"tag": "tag", "count": 1}]}
+
+    def test_the_replies_search_is_for_the_same_uris(
+        self, search_for_uri, es_client, msearch_response
+    ):
+        with mock.patch.object(
+            es_client.conn, "msearch", return_value=msearch_response
+        ) as msearch:
+            search_for_uri("http://example.com")
+
+        annotations_search, replies_search = msearch.call_args[1]["body"][1::2]
+        assert replies_search["query"]["bool"]["must"] == (
+            annotations_search["query"]["bool"]["must"]
+        )
+        assert {"exists": {"field": "references"}} in replies_search["query"]["bool"][
+            "filter"
+        ]
+        assert replies_search["_source"] == ["references"]
+
+    def test_it_drops_replies_to_other_annotations(
+        self, search_for_uri, es_client, msearch_response
+    ):
+        with mock.patch.object(
+            es_client.conn, "msearch", return_value=msearch_response
+        ):
+            result = search_for_uri("http://example.com")
+
+        assert result.annotation_ids == ["annotation_1", "annotation_2"]
+        assert result.reply_ids == ["reply_1", "reply_2"]
+        assert result.reply_cursors == [
+            "1514764800000,reply_1",
+            "1514764800000,reply_2",
+        ]
+        assert result.reply_total == 2
+
+    def test_it_raises_if_either_search_fails(
+        self, search_for_uri, es_client, msearch_response
+    ):
+        msearch_response["responses"][1] = {
+            "error": {"type": "search_phase_execution_exception"},
+            "status": 500,
+        }
+
+        with mock.patch.object(
+            es_client.conn, "msearch", return_value=msearch_response
+        ):
+            with pytest.raises(TransportError):
+                search_for_uri("http://example.com")
+
+    def test_it_searches_for_replies_separately_when_paging_replies(
+        self, pyramid_request, Annotation, es_client
+    ):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        reply = Annotation(
+            target_uri="http://example.com",
+            references=[annotation.id],
+            shared=True,
+            updated=datetime.datetime.now() - datetime.timedelta(days=1),
+        )
+
+        with mock.patch.object(
+            es_client.conn, "msearch", wraps=es_client.conn.msearch
+        ) as msearch:
+            result = search.Search(
+                pyramid_request,
+                separate_replies=True,
+                combine_replies_search=True,
+                replies_search_after=datetime.datetime.now().isoformat(),
+            ).run(MultiDict({"uri": "http://example.com"}))
+
+        msearch.assert_not_called()
+        assert result.reply_ids == [reply.id]
+
+    def test_it_searches_for_replies_separately_without_uris(
+        self, pyramid_request, Annotation
+    ):
+        annotation = Annotation(shared=True)
+        reply = Annotation(references=[annotation.id], shared=True)
+
+        result = search.Search(
+            pyramid_request, separate_replies=True, combine_replies_search=True
+        ).run(MultiDict({}))
+
+        assert result.annotation_ids == [annotation.id]
+        assert result.reply_ids == [reply.id]
+
+    @pytest.fixture
+    def search_for_uri(self, pyramid_request):
+        def search_for_uri(uri, **params):
+            return search.Search(
+                pyramid_request, separate_replies=True, combine_replies_search=True
+            ).run(MultiDict({"uri": uri, **params}))
+
+        return search_for_uri
+
+    @pytest.fixture
+    def msearch_response(self):
+        def response(*hits):
+            return {"hits": {"total": len(hits), "hits": list(hits)}}
+
+        def hit(id_, references=None):
+            hit = {"_id": id_, "sort": [1514764800000, id_]}
+            if references is not None:
+                hit["_source"] = {"references": references}
+            return hit
+
+        return {
+            "responses": [
+                response(hit("annotation_1"), hit("annotation_2")),
+                response(
+                    hit("reply_1", ["annotation_1"]),
+                    hit("reply_2", ["annotation_2", "reply_1"]),
+                    hit("reply_3", ["other"]),
+                ),
+            ]
+        }
+
+
+@pytest.mark.usefixtures("group_service", "nipsa_service")
+class TestSearchResultCaching:
+    """Unit tests for search.Search when cache_results=True is given."""
+
+    def test_it_caches_the_results(self, search_for_uri, Annotation, es_client):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        search_for_uri("http://example.com")
+        Annotation(target_uri="http://example.com", shared=True)
+
+        with mock.patch.object(
+            es_client.conn, "search", wraps=es_client.conn.search
+        ) as search_:
+            result = search_for_uri("http://example.com")
+
+        search_.assert_not_called()
+        assert result.annotation_ids == [annotation.id]
+
+    def test_it_caches_the_replies(self, search_for_uri, Annotation):
+        annotation = Annotation(target_uri="http://example.com", shared=True)
+        reply = Annotation(
+            target_uri="http://example.com", references=[annotation.id], shared=True
+        )
+        search_for_uri("http://example.com", separate_replies=True)
+
+        result = search_for_uri("http://example.com", separate_replies=True)
+
+        assert result.annotation_ids == [annotation.id]
+        assert result.reply_ids == [reply.id]
+
+    def test_it_searches_again_once_the_uri_is_invalidated(
+        self, search_for_uri, Annotation
+    ):
+        Annotation(target_uri="http://example.com", shared=True)
+        search_for_uri("http://example.com")
+        Annotation(target_uri="http://example.com", shared=True)
+
+        cache.SEARCH_RESULT_CACHE.invalidate_tags("httpx://example.com")
+        result = search_for_uri("http://example.com")
+
+        assert result.total == 2
+
+    def test_it_doesnt_cache_results_which_might_be_missing_changes(
+        self, search_for_uri
+    ):
+        # The search index might not have been refreshed since the change
+        cache.SEARCH_RESULT_CACHE.invalidate_tags("httpx://example.com")
+
+        search_for_uri("http://example.com")
+
+        assert not cache.SEARCH_RESULT_CACHE
+
+    def test_different_searches_are_cached_separately(self, search_for_uri, Annotation):
+        Annotation(target_uri="http://example.com", shared=True)
+        Annotation(target_uri="http://example.com", shared=True)
+        search_for_uri("http://example.com", limit=1)
+
+        result = search_for_uri("http://example.com", limit=2)
+
+        assert len(result.annotation_ids) == 2
+
+    def test_it_doesnt_cache_searches_which_arent_on_uris(self, pyramid_request):
+        search.Search(pyramid_request, cache_results=True).run(MultiDict({}))
+
+        assert not cache.SEARCH_RESULT_CACHE
+
+    def test_it_doesnt_cache_searches_by_logged_in_users(
+        self, search_for_uri, pyramid_config
+    ):
+        pyramid_config.testing_securitypolicy("acct:someone@example.com")
+
+        search_for_uri("http://example.com")
+
+        assert not cache.SEARCH_RESULT_CACHE
+
+    def test_it_doesnt_cache_unless_asked_to(self, pyramid_request):
+        search.Search(pyramid_request).run(MultiDict({"uri": "http://example.com"}))
+
+        assert not cache.SEARCH_RESULT_CACHE
+
+    @pytest.fixture
+    def search_for_uri(self, pyramid_request):
+        def search_for_uri(uri, separate_replies=False, **params):
+            return search.Search(
+                pyramid_request, separate_replies=separate_replies, cache_results=True
+            ).run(MultiDict({"uri": uri, **params}))
+
+        return search_for_uri
+
+
+@pytest.mark.usefixtures("group_service", "nipsa_service")
+class TestCount:
+    def test_it_counts_the_annotations(self, pyramid_request, Annotation):
+        Annotation(target_uri="http://example.com", shared=True)
+        Annotation(target_uri="http://example.com", shared=True)
+        Annotation(target_uri="http://example.com", shared=False)
+        Annotation(target_uri="http://example.org", shared=True)
+
+        count = search.Count(pyramid_request).run(
+            MultiDict({"uri": "http://example.com"})
+        )
+
+        assert count == 2
+
+    def test_it_uses_the_count_api(self, pyramid_request, es_client):
+        with mock.patch.object(
+            es_client.conn, "count", wraps=es_client.conn.count
+        ) as count, mock.patch.object(
+            es_client.conn, "search", wraps=es_client.conn.search
+        ) as search_:
+            search.Count(pyramid_request).run(MultiDict({}))
+
+        count.assert_called_once()
+        search_.assert_not_called()
+
+    def test_it_caches_the_count(self, pyramid_request, Annotation):
+        Annotation(target_uri="http://example.com", shared=True)
+        search.Count(pyramid_request).run(MultiDict({"uri": "http://example.com"}))
+        Annotation(target_uri="http://example.com", shared=True)
+
+        count = search.Count(pyramid_request).run(
+            MultiDict({"uri": "http://example.com"})
+        )
+
+        assert count == 1
+
+    def test_it_counts_again_once_the_uri_is_invalidated(
+        self, pyramid_request, Annotation
+    ):
+        Annotation(target_uri="http://example.com", shared=True)
+        search.Count(pyramid_request).run(MultiDict({"uri": "http://example.com"}))
+        Annotation(target_uri="http://example.com", shared=True)
+
+        cache.COUNT_CACHE.invalidate_tags("httpx://example.com")
+        count = search.Count(pyramid_request).run(
+            MultiDict({"uri": "http://example.com"})
+        )
+
+        assert count == 2
+
+    def test_it_doesnt_cache_counts_which_arent_on_uris(
+        self, pyramid_request, Annotation
+    ):
+        Annotation(userid="acct:someone@example.com", shared=True)
+        params = {"user": "acct:someone@example.com"}
+        search.Count(pyramid_request).run(MultiDict(params))
+        Annotation(userid="acct:someone@example.com", shared=True)
+
+        count = search.Count(pyramid_request).run(MultiDict(params))
+
+        assert count == 2
+        assert not cache.COUNT_CACHE
+
+    def test_it_doesnt_cache_counts_which_might_be_missing_changes(
+        self, pyramid_request
+    ):
+        # The search index might not have been refreshed since the change
+        cache.COUNT_CACHE.invalidate_tags("httpx://example.com")
+
+        search.Count(pyramid_request).run(MultiDict({"uri": "http://example.com"}))
+
+        assert not cache.COUNT_CACHE
+
+    def test_it_tags_its_requests_with_the_caller(self, pyramid_request):
+        instrumentation.reset()
+
+        search.Count(pyramid_request, caller="badge").run(MultiDict({}))
+
+        assert instrumentation.report()["badge"]["requests"] == 1
+
+    def test_append_modifier(self, pyramid_request, Annotation):
+        annotation = Annotation(shared=True)
+        Annotation(shared=True, references=[annotation.id])
+        count = search.Count(pyramid_request)
+
+        count.append_modifier(query.TopLevelAnnotationsFilter())
+
+        assert count.run(MultiDict({})) == 1
+
+    def test_clear(self, pyramid_request, Annotation):
+        Annotation(shared=False)
+        count = search.Count(pyramid_request)
+
+        count.clear()
+
+        assert count.run(MultiDict({})) == 1
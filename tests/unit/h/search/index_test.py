@@ -3,8 +3,10 @@ from unittest.mock import sentinel
 
 import pytest
 from elasticsearch.exceptions import NotFoundError
+from h_matchers import Any
 
-from h.search.index import BatchIndexer
+from h.search import instrumentation
+from h.search.index import BatchIndexer, _InContextClient, eager_loaded_annotations
 
 pytestmark = [
     pytest.mark.xdist_group("elasticsearch"),
@@ -132,6 +134,90 @@ class TestBatchIndexer:
 
         assert errored == expected_errored_ids
 
+    def test_it_indexes_loaded_annotations(
+        self, batch_indexer, db_session, factories, get_indexed_ann
+    ):
+        annotations = factories.Annotation.create_batch(2)
+        db_session.flush()
+
+        batch_indexer.index_annotations(eager_loaded_annotations(db_session).all())
+
+        for annotation in annotations:
+            assert get_indexed_ann(annotation.id) is not None
+
+    def test_it_presents_annotations_a_chunk_at_a_time(
+        self, db_session, es_client, factories, pyramid_request, moderation_service
+    ):
+        annotations = factories.Annotation.create_batch(3)
+
+        BatchIndexer(db_session, es_client, pyramid_request, chunk_size=2).index(
+            [annotation.id for annotation in annotations]
+        )
+
+        # The moderation status of each chunk is looked up in one go
+        assert moderation_service.all_hidden.call_count == 2
+
+    def test_it_sends_bulk_requests_in_chunks(
+        self, db_session, es_client, factories, pyramid_request, es_helpers
+    ):
+        annotations = factories.Annotation.create_batch(2)
+        es_helpers.streaming_bulk.return_value = []
+
+        BatchIndexer(db_session, es_client, pyramid_request, chunk_size=10).index(
+            [annotation.id for annotation in annotations]
+        )
+
+        es_helpers.streaming_bulk.assert_called_once_with(
+            es_client.conn,
+            Any(),
+            chunk_size=10,
+            raise_on_error=False,
+            expand_action_callback=Any.callable(),
+        )
+
+    def test_it_sends_concurrent_bulk_requests(
+        self, db_session, es_client, factories, pyramid_request, es_helpers
+    ):
+        annotations = factories.Annotation.create_batch(2)
+        es_helpers.parallel_bulk.return_value = []
+
+        BatchIndexer(
+            db_session, es_client, pyramid_request, chunk_size=10, concurrency=3
+        ).index([annotation.id for annotation in annotations])
+
+        es_helpers.streaming_bulk.assert_not_called()
+        es_helpers.parallel_bulk.assert_called_once_with(
+            Any.instance_of(_InContextClient).with_attrs(
+                {"transport": es_client.conn.transport}
+            ),
+            Any(),
+            thread_count=3,
+            chunk_size=10,
+            raise_on_error=False,
+            expand_action_callback=Any.callable(),
+        )
+
+    def test_it_tags_its_requests_as_the_indexer(self, batch_indexer, factories):
+        annotations = factories.Annotation.create_batch(2)
+        instrumentation.reset()
+
+        batch_indexer.index([annotation.id for annotation in annotations])
+        batch_indexer.delete([annotation.id for annotation in annotations])
+
+        assert instrumentation.report()["indexer"]["requests"] == 2
+
+    def test_it_tags_its_concurrent_requests_as_the_indexer(
+        self, db_session, es_client, factories, pyramid_request
+    ):
+        annotations = factories.Annotation.create_batch(2)
+        instrumentation.reset()
+
+        BatchIndexer(
+            db_session, es_client, pyramid_request, chunk_size=1, concurrency=2
+        ).index([annotation.id for annotation in annotations])
+
+        assert instrumentation.report()["indexer"]["requests"] == 2
+
     def test_delete(self, batch_indexer, factories, get_indexed_ann):
         annotations = factories.Annotation.create_batch(2)
         batch_indexer.index([annotation.id for annotation in annotations])
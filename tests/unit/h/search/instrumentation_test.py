@@ -0,0 +1,211 @@
+import json
+import threading
+from unittest import mock
+
+import pytest
+from elasticsearch import Connection
+from elasticsearch import ConnectionError as ESConnectionError
+from elasticsearch import NotFoundError
+
+from h.search import instrumentation
+from h.search.instrumentation import InstrumentedConnection, InstrumentedTransport
+
+
+class TestCaller:
+    def test_it_tags_requests_with_the_caller(self, transport):
+        with instrumentation.caller("search"):
+            transport.perform_request("GET", "/")
+
+        assert instrumentation.report()["search"]["requests"] == 1
+
+    def test_requests_outside_a_caller_block_are_tagged_as_other(self, transport):
+        with instrumentation.caller("search"):
+            pass
+        transport.perform_request("GET", "/")
+
+        assert list(instrumentation.report()) == [instrumentation.DEFAULT_CALLER]
+
+    def test_it_nests(self, transport):
+        with instrumentation.caller("sync"):
+            with instrumentation.caller("search"):
+                transport.perform_request("GET", "/")
+            transport.perform_request("GET", "/")
+
+        report = instrumentation.report()
+        assert report["search"]["requests"] == 1
+        assert report["sync"]["requests"] == 1
+
+
+class TestReport:
+    def test_it(self, transport):
+        with instrumentation.caller("search"):
+            transport.perform_request("GET", "/")
+
+        report = instrumentation.report()
+
+        assert report == {
+            "search": {
+                "requests": 1,
+                "retries": 0,
+                "latency": mock.ANY,
+                "took": mock.ANY,
+            }
+        }
+        assert report["search"]["latency"]["count"] == 1
+        # The report can be rendered as JSON
+        json.dumps(report)
+
+    def test_reset(self, transport):
+        transport.perform_request("GET", "/")
+
+        instrumentation.reset()
+
+        assert not instrumentation.report()
+
+
+class TestInstrumentedTransport:
+    def test_it_returns_the_response(self, transport):
+        assert transport.perform_request("GET", "/") == {"took": 5}
+
+    def test_it_records_the_time_elasticsearch_took(self, transport):
+        transport.perform_request("GET", "/")
+
+        took = instrumentation.report()["other"]["took"]
+        assert took["count"] == 1
+        assert took["sum"] == pytest.approx(0.005)
+
+    def test_it_ignores_responses_without_took(self, transport, FakeConnection):
+        FakeConnection.data = "true"
+
+        transport.perform_request("HEAD", "/")
+
+        assert "took" not in instrumentation.report()["other"]
+
+    def test_it_records_retries(self, transport, FakeConnection):
+        FakeConnection.failures = 2
+
+        transport.perform_request("GET", "/")
+
+        report = instrumentation.report()["other"]
+        assert report["requests"] == 1
+        assert report["retries"] == 2
+        assert "errors" not in report
+
+    def test_it_records_errors(self, transport, FakeConnection):
+        FakeConnection.failures = 10
+
+        with pytest.raises(ESConnectionError):
+            transport.perform_request("GET", "/")
+
+        report = instrumentation.report()["other"]
+        assert report["requests"] == 1
+        assert report["errors"] == 1
+        assert report["retries"] == 3
+        assert report["latency"]["count"] == 1
+
+    @pytest.fixture(autouse=True)
+    def time(self, patch):
+        # Don't wait between retries
+        return patch("elasticsearch.transport.time")
+
+
+class TestInContext:
+    def test_it_calls_the_function_with_the_caller_from_other_threads(self, transport):
+        with instrumentation.caller("indexer"):
+            perform_request = instrumentation.in_context(transport.perform_request)
+
+        threads = [
+            threading.Thread(target=perform_request, args=("GET", "/"))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert list(instrumentation.report()) == ["indexer"]
+        assert instrumentation.report()["indexer"]["requests"] == 2
+
+    def test_it_returns_the_functions_result(self):
+        assert instrumentation.in_context(lambda x: x * 2)(21) == 42
+
+
+class TestInstrumentedConnection:
+    def test_it_records_the_pool_wait(self, connection):
+        connection.pool._get_conn(timeout=1)  # pylint:disable=protected-access
+
+        assert instrumentation.report()["other"]["pool_wait"]["count"] == 1
+
+    @pytest.mark.parametrize(
+        "use_ssl,pool_class",
+        (
+            (False, instrumentation.InstrumentedHTTPConnectionPool),
+            (True, instrumentation.InstrumentedHTTPSConnectionPool),
+        ),
+    )
+    def test_it_uses_an_instrumented_pool(self, use_ssl, pool_class):
+        connection = InstrumentedConnection(use_ssl=use_ssl)
+
+        assert isinstance(connection.pool, pool_class)
+
+    def test_it_records_the_request_and_response_sizes(self, connection):
+        connection.pool.urlopen.return_value = mock.Mock(status=200, data=b"x" * 500)
+
+        result = connection.perform_request("POST", "/_search", body=b"y" * 50)
+
+        assert result == (200, mock.ANY, "x" * 500)
+        report = instrumentation.report()["other"]
+        assert report["request_bytes"]["sum"] == 50
+        assert report["response_bytes"]["sum"] == 500
+
+    def test_it_records_requests_without_bodies(self, connection):
+        connection.pool.urlopen.return_value = mock.Mock(status=200, data=b"")
+
+        connection.perform_request("HEAD", "/")
+
+        report = instrumentation.report()["other"]
+        assert not report["request_bytes"]["sum"]
+        assert not report["response_bytes"]["sum"]
+
+    def test_it_doesnt_record_the_response_size_of_failed_requests(self, connection):
+        connection.pool.urlopen.return_value = mock.Mock(status=404, data=b"{}")
+
+        with pytest.raises(NotFoundError):
+            connection.perform_request("GET", "/missing")
+
+        assert "response_bytes" not in instrumentation.report()["other"]
+
+    @pytest.fixture
+    def connection(self):
+        connection = InstrumentedConnection()
+        connection.pool.urlopen = mock.Mock()
+        return connection
+
+
+@pytest.fixture
+def FakeConnection():
+    class FakeConnection(Connection):
+        data = json.dumps({"took": 5})
+        # The number of requests to fail before succeeding
+        failures = 0
+
+        def perform_request(self, *_args, **_kwargs):
+            if FakeConnection.failures:
+                FakeConnection.failures -= 1
+                raise ESConnectionError("N/A", "Connection refused", None)
+
+            return 200, {}, self.data
+
+    return FakeConnection
+
+
+@pytest.fixture
+def transport(FakeConnection):
+    return InstrumentedTransport([{}], connection_class=FakeConnection)
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
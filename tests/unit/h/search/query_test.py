@@ -190,7 +190,99 @@ class TestSorter:
         #    1970, 1st month, 1st day, 0 hrs, 0 min, 0 sec, 0 ms
         q = sorter(es_dsl_search, params).to_dict()
 
-        assert q["search_after"] == [1514764800000.0]
+        assert q["search_after"][0] == 1514764800000.0
+
+    def test_it_sorts_ties_by_id(self, es_dsl_search):
+        q = query.Sorter()(es_dsl_search, {"order": "asc"}).to_dict()
+
+        assert q["sort"] == [
+            {"updated": {"order": "asc", "unmapped_type": "boolean"}},
+            {"id": {"order": "asc"}},
+        ]
+
+    @pytest.mark.parametrize("order,tiebreaker", [("asc", "\uffff"), ("desc", "")])
+    def test_it_skips_ties_for_a_plain_search_after(
+        self, es_dsl_search, order, tiebreaker
+    ):
+        params = {"search_after": "1514764800000", "order": order}
+
+        q = query.Sorter()(es_dsl_search, params).to_dict()
+
+        assert q["sort"] == [
+            {"updated": {"order": order, "unmapped_type": "boolean"}},
+            {"id": {"order": order}},
+        ]
+        assert q["search_after"] == [1514764800000.0, tiebreaker]
+
+    def test_it_doesnt_sort_ties_when_sorting_by_id(self, es_dsl_search):
+        params = {"search_after": "abc123", "sort": "id"}
+
+        q = query.Sorter()(es_dsl_search, params).to_dict()
+
+        assert q["sort"] == [{"id": {"order": "desc", "unmapped_type": "boolean"}}]
+        assert q["search_after"] == ["abc123"]
+
+    def test_it_continues_after_a_cursor(self, es_dsl_search):
+        params = {"search_after": "1514764800000,abc123"}
+
+        q = query.Sorter()(es_dsl_search, params).to_dict()
+
+        assert q["search_after"] == [1514764800000.0, "abc123"]
+        assert q["sort"][1] == {"id": {"order": "desc"}}
+
+    def test_it_pages_through_ties_with_cursors(self, search, Annotation):
+        updated = datetime.datetime(2018, 1, 1)
+        ann_ids = sorted(Annotation(updated=updated).id for _ in range(3))
+        search.append_modifier(query.Limiter())
+
+        results = []
+        params = {"order": "asc", "limit": 1}
+        for _ in ann_ids:
+            result = search.run(webob.multidict.MultiDict(params))
+            results.extend(result.annotation_ids)
+            params["search_after"] = result.cursors[-1]
+
+        assert results == ann_ids
+
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_it_pages_through_ties_across_a_page_boundary(
+        self, search, Annotation, order
+    ):
+        dt = datetime.datetime
+        tied_ids = sorted(Annotation(updated=dt(2018, 1, 1)).id for _ in range(3))
+        ann_ids = [Annotation(updated=dt(2017, 1, 1)).id, *tied_ids]
+        ann_ids.append(Annotation(updated=dt(2019, 1, 1)).id)
+        if order == "desc":
+            ann_ids.reverse()
+        search.append_modifier(query.Limiter())
+
+        results = []
+        params = {"order": order, "limit": 2}
+        for _ in range(3):
+            result = search.run(webob.multidict.MultiDict(params))
+            results.extend(result.annotation_ids)
+            params["search_after"] = result.cursors[-1]
+
+        assert results == ann_ids
+
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_a_plain_search_after_skips_ties(self, search, Annotation, order):
+        dt = datetime.datetime
+        before = Annotation(updated=dt(2017, 1, 1)).id
+        for _ in range(2):
+            Annotation(updated=dt(2018, 1, 1))
+        after = Annotation(updated=dt(2019, 1, 1)).id
+
+        result = search.run(
+            webob.multidict.MultiDict({"search_after": "2018-01-01", "order": order})
+        )
+
+        assert result.annotation_ids == [after if order == "asc" else before]
+
+    def test_cursor(self):
+        assert query.cursor({"sort": [1514764800000, "abc123"]}) == (
+            "1514764800000,abc123"
+        )
 
     def test_it_ignores_unknown_sort_fields(self, search):
         search.run(webob.multidict.MultiDict({"sort": "no_such_field"}))
@@ -277,6 +369,21 @@ class TestTopLevelAnnotationsFilter:
         return search
 
 
+class TestRepliesFilter:
+    def test_it_filters_out_annotations_but_leaves_replies_in(self, Annotation, search):
+        annotation = Annotation()
+        reply = Annotation(references=[annotation.id])
+
+        result = search.run(webob.multidict.MultiDict({}))
+
+        assert [reply.id] == result.annotation_ids
+
+    @pytest.fixture
+    def search(self, search):
+        search.append_modifier(query.RepliesFilter())
+        return search
+
+
 class TestAuthorityFilter:
     def test_it_filters_out_non_matching_authorities(self, Annotation, search):
         annotations_auth1 = [
@@ -497,12 +604,15 @@ class TestUriCombinedWildcardFilter:
     ):
         search = get_search()
         # Mark all these uri's as equivalent uri's.
-        storage.expand_uri.side_effect = lambda _, x: [
-            "urn:x-pdf:1234",
-            "file:///Users/june/article.pdf",
-            "doi:10.1.1/1234",
-            "http://reading.com/x-pdf",
-        ]
+        storage.expand_uris.side_effect = lambda _, uris: {
+            uri: [
+                "urn:x-pdf:1234",
+                "file:///Users/june/article.pdf",
+                "doi:10.1.1/1234",
+                "http://reading.com/x-pdf",
+            ]
+            for uri in uris
+        }
         Annotation(target_uri="urn:x-pdf:1235")
         _ = Annotation(target_uri="file:///Users/jane/article.pdf").id
         expected_ids = [
@@ -0,0 +1,235 @@
+import uuid
+from unittest import mock
+
+import pytest
+
+from h.db.types import URLSafeUUID
+from h.search import reindex
+from h.services.search_index import SearchIndexService
+from h.services.settings import SettingsService
+
+
+class TestPartitionRange:
+    def test_partitions_cover_all_ids_without_overlapping(self):
+        ranges = [
+            reindex.partition_range(partition)
+            for partition in range(reindex.PARTITIONS)
+        ]
+
+        assert ranges[0][0] == str(uuid.UUID(int=0))
+        assert ranges[-1][1] is None
+        for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+            assert end == next_start
+
+
+class TestStart:
+    def test_it_creates_a_new_index(
+        self, pyramid_request, config, settings, db_session
+    ):
+        config.configure_index.return_value = "hypothesis-new"
+
+        new_index = reindex.start(pyramid_request)
+
+        config.configure_index.assert_called_once_with(pyramid_request.es)
+        assert new_index == "hypothesis-new"
+        db_session.flush()
+        assert settings.get(SearchIndexService.REINDEX_SETTING_KEY) == new_index
+        pyramid_request.tm.commit.assert_called_once_with()
+
+    def test_it_resumes_a_reindex_in_progress(
+        self, pyramid_request, config, settings, db_session
+    ):
+        settings.put(SearchIndexService.REINDEX_SETTING_KEY, "hypothesis-abc123")
+        db_session.flush()
+
+        new_index = reindex.start(pyramid_request)
+
+        config.configure_index.assert_not_called()
+        assert new_index == "hypothesis-abc123"
+
+
+class TestIndexPartition:
+    def test_it_indexes_the_annotations_in_the_partition(
+        self, pyramid_request, BatchIndexer, annotations
+    ):
+        errored = reindex.index_partition(
+            pyramid_request, "new-index", 0, chunk_size=10, concurrency=2
+        )
+
+        BatchIndexer.assert_called_once_with(
+            pyramid_request.db,
+            pyramid_request.es,
+            pyramid_request,
+            target_index="new-index",
+            op_type="create",
+            chunk_size=10,
+            concurrency=2,
+        )
+        BatchIndexer.return_value.index_annotations.assert_called_once_with(
+            [annotations[0], annotations[1]]
+        )
+        assert errored == set()
+
+    def test_it_indexes_the_last_partition(
+        self, pyramid_request, BatchIndexer, annotations
+    ):
+        reindex.index_partition(pyramid_request, "new-index", reindex.PARTITIONS - 1)
+
+        BatchIndexer.return_value.index_annotations.assert_called_once_with(
+            [annotations[2]]
+        )
+
+    def test_it_indexes_in_chunks(self, pyramid_request, BatchIndexer, annotations):
+        reindex.index_partition(pyramid_request, "new-index", 0, chunk_size=1)
+
+        assert BatchIndexer.return_value.index_annotations.call_args_list == [
+            mock.call([annotations[0]]),
+            mock.call([annotations[1]]),
+        ]
+
+    def test_it_doesnt_index_deleted_annotations(
+        self, pyramid_request, BatchIndexer, annotations
+    ):
+        annotations[0].deleted = True
+
+        reindex.index_partition(pyramid_request, "new-index", 0)
+
+        BatchIndexer.return_value.index_annotations.assert_called_once_with(
+            [annotations[1]]
+        )
+
+    @pytest.mark.usefixtures("annotations")
+    def test_it_marks_the_partition_as_done(self, pyramid_request, settings):
+        reindex.index_partition(pyramid_request, "new-index", 0)
+
+        assert settings.get("reindex.checkpoint.0") == reindex.DONE
+
+    @pytest.mark.usefixtures("annotations")
+    def test_it_skips_partitions_which_are_done(
+        self, pyramid_request, settings, BatchIndexer, db_session
+    ):
+        settings.put("reindex.checkpoint.0", reindex.DONE)
+        db_session.flush()
+
+        reindex.index_partition(pyramid_request, "new-index", 0)
+
+        BatchIndexer.return_value.index_annotations.assert_not_called()
+
+    def test_it_resumes_from_the_checkpoint(
+        self, pyramid_request, settings, BatchIndexer, annotations, db_session
+    ):
+        settings.put(
+            "reindex.checkpoint.0", URLSafeUUID.url_safe_to_hex(annotations[0].id)
+        )
+        db_session.flush()
+
+        reindex.index_partition(pyramid_request, "new-index", 0)
+
+        BatchIndexer.return_value.index_annotations.assert_called_once_with(
+            [annotations[1]]
+        )
+
+    def test_it_stops_if_annotations_fail_to_index(
+        self, pyramid_request, settings, BatchIndexer, annotations
+    ):
+        BatchIndexer.return_value.index_annotations.side_effect = [
+            set(),
+            {annotations[1].id},
+        ]
+
+        errored = reindex.index_partition(pyramid_request, "new-index", 0, chunk_size=1)
+
+        assert errored == {annotations[1].id}
+        # The checkpoint isn't advanced past the annotation which failed.
+        assert settings.get("reindex.checkpoint.0") == URLSafeUUID.url_safe_to_hex(
+            annotations[0].id
+        )
+
+    @pytest.fixture
+    def annotations(self, factories):
+        """Return two annotations in the first partition and one in the last."""
+        return [
+            factories.Annotation(id=URLSafeUUID.hex_to_url_safe(hex_id))
+            for hex_id in (
+                "00000000-0000-1000-8000-000000000001",
+                "00000000-0000-1000-8000-000000000002",
+                "ffffffff-0000-1000-8000-000000000001",
+            )
+        ]
+
+
+class TestFinish:
+    @pytest.mark.usefixtures("all_done")
+    def test_it_moves_the_alias_to_the_new_index(self, pyramid_request, config):
+        new_index = reindex.finish(pyramid_request)
+
+        assert new_index == "hypothesis-new"
+        config.update_aliased_index.assert_called_once_with(
+            pyramid_request.es, "hypothesis-new"
+        )
+        config.delete_index.assert_called_once_with(
+            pyramid_request.es, config.get_aliased_index.return_value
+        )
+
+    @pytest.mark.usefixtures("all_done")
+    def test_it_clears_the_reindex_settings(
+        self, pyramid_request, settings, db_session
+    ):
+        reindex.finish(pyramid_request)
+        db_session.flush()
+
+        assert not settings.get(SearchIndexService.REINDEX_SETTING_KEY)
+        assert not settings.get("reindex.checkpoint.0")
+
+    def test_it_raises_if_there_is_no_reindex_in_progress(
+        self, pyramid_request, config
+    ):
+        with pytest.raises(RuntimeError):
+            reindex.finish(pyramid_request)
+
+        config.update_aliased_index.assert_not_called()
+
+    @pytest.mark.usefixtures("all_done")
+    def test_it_raises_if_partitions_havent_been_indexed(
+        self, pyramid_request, config, settings, db_session
+    ):
+        settings.delete("reindex.checkpoint.3")
+        db_session.flush()
+
+        with pytest.raises(RuntimeError):
+            reindex.finish(pyramid_request)
+
+        config.update_aliased_index.assert_not_called()
+
+    @pytest.fixture
+    def all_done(self, settings, db_session):
+        settings.put(SearchIndexService.REINDEX_SETTING_KEY, "hypothesis-new")
+        for partition in range(reindex.PARTITIONS):
+            settings.put(f"reindex.checkpoint.{partition}", reindex.DONE)
+        db_session.flush()
+
+
+@pytest.fixture(autouse=True)
+def settings(pyramid_config, db_session):
+    settings = SettingsService(db_session)
+    pyramid_config.register_service(settings, name="settings")
+    return settings
+
+
+@pytest.fixture
+def pyramid_request(pyramid_request):
+    pyramid_request.es = mock.sentinel.es
+    pyramid_request.tm = mock.MagicMock()
+    return pyramid_request
+
+
+@pytest.fixture(autouse=True)
+def config(patch):
+    return patch("h.search.reindex.config")
+
+
+@pytest.fixture(autouse=True)
+def BatchIndexer(patch):
+    BatchIndexer = patch("h.search.reindex.BatchIndexer")
+    BatchIndexer.return_value.index_annotations.return_value = set()
+    return BatchIndexer
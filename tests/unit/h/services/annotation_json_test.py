@@ -1,5 +1,5 @@
 from datetime import datetime
-from unittest.mock import sentinel
+from unittest.mock import call, sentinel
 
 import pytest
 from h_matchers import Any
@@ -8,7 +8,7 @@ from pyramid.authorization import Everyone
 from h.models import Annotation
 from h.security.permissions import Permission
 from h.services.annotation_json import AnnotationJSONService, factory
-from h.traversal import AnnotationContext
+from h.traversal import AnnotationContext, GroupContext
 
 
 class TestAnnotationJSONService:
@@ -23,7 +23,7 @@ class TestAnnotationJSONService:
         result = service.present(annotation)
 
         links_service.get_all.assert_called_once_with(annotation)
-        user_service.fetch.assert_called_once_with(annotation.userid)
+        user_service.fetch_user_info.assert_called_once_with(annotation.userid)
 
         assert result == {
             "id": annotation.id,
@@ -46,7 +46,9 @@ class TestAnnotationJSONService:
             "references": annotation.references,
             "extra-1": "foo",
             "extra-2": "bar",
-            "user_info": {"display_name": user_service.fetch.return_value.display_name},
+            "user_info": {
+                "display_name": user_service.fetch_user_info.return_value.display_name
+            },
         }
 
         DocumentJSONPresenter.assert_called_once_with(annotation.document)
@@ -192,13 +194,120 @@ class TestAnnotationJSONService:
         )
         flag_service.all_flagged.assert_called_once_with(user, sentinel.annotation_ids)
         flag_service.flag_counts.assert_called_once_with(sentinel.annotation_ids)
-        user_service.fetch_all.assert_called_once_with([annotation.userid])
+        user_service.fetch_all_user_info.assert_called_once_with([annotation.userid])
 
         assert result == [
             # A few indicative fields to show we are serializing
             Any.dict.containing({"id": Any(), "hidden": False})
         ]
 
+    def test_present_all_for_user_checks_permissions_once_per_group(
+        self,
+        service,
+        user,
+        factories,
+        annotation_read_service,
+        identity_permits,
+        Identity,
+    ):
+        group = factories.Group()
+        annotation_read_service.get_annotations_by_id.return_value = (
+            factories.Annotation.create_batch(3, group=group)
+        )
+
+        service.present_all_for_user(sentinel.annotation_ids, user)
+
+        Identity.from_models.assert_called_once_with(user=user)
+        context = Any.instance_of(GroupContext).with_attrs({"group": group})
+        assert identity_permits.call_args_list == [
+            call(identity=None, context=context, permission=Permission.Group.READ),
+            call(
+                identity=Identity.from_models.return_value,
+                context=context,
+                permission=Permission.Group.MODERATE,
+            ),
+        ]
+
+    @pytest.mark.parametrize(
+        "shared,deleted,groupid,readable_by_world,permission_template",
+        (
+            (False, False, "NOT WORLD", True, "{annotation.userid}"),
+            (True, False, "NOT WORLD", False, "group:{annotation.groupid}"),
+            (True, False, "NOT WORLD", True, "group:__world__"),
+            (True, True, "NOT WORLD", True, "group:{annotation.groupid}"),
+            (True, False, "__world__", False, "group:__world__"),
+        ),
+    )
+    def test_present_all_for_user_read_permission(  # pylint:disable=too-many-arguments
+        self,
+        service,
+        user,
+        annotation,
+        annotation_read_service,
+        identity_permits,
+        shared,
+        deleted,
+        groupid,
+        readable_by_world,
+        permission_template,
+    ):
+        annotation.shared = shared
+        annotation.deleted = deleted
+        annotation.groupid = groupid
+        annotation_read_service.get_annotations_by_id.return_value = [annotation]
+        identity_permits.side_effect = lambda permission, **_: (
+            readable_by_world if permission == Permission.Group.READ else False
+        )
+
+        (result,) = service.present_all_for_user(sentinel.annotation_ids, user)
+
+        permission = permission_template.format(annotation=annotation)
+        assert result["permissions"]["read"] == [permission]
+
+    @pytest.mark.parametrize(
+        "shared,deleted,group_moderator,moderator",
+        (
+            (True, False, True, True),
+            (True, False, False, False),
+            (False, False, True, False),
+            (True, True, True, False),
+        ),
+    )
+    def test_present_all_for_user_only_shows_moderation_to_moderators(
+        self,
+        service,
+        user,
+        annotation,
+        annotation_read_service,
+        identity_permits,
+        shared,
+        deleted,
+        group_moderator,
+        moderator,
+    ):
+        annotation.shared = shared
+        annotation.deleted = deleted
+        annotation_read_service.get_annotations_by_id.return_value = [annotation]
+        identity_permits.side_effect = lambda permission, **_: (
+            group_moderator if permission == Permission.Group.MODERATE else False
+        )
+
+        (result,) = service.present_all_for_user(sentinel.annotation_ids, user)
+
+        assert ("moderation" in result) == moderator
+
+    def test_present_all_for_user_doesnt_mutate_extra(
+        self, service, user, annotation, annotation_read_service
+    ):
+        annotation.extra = {"id": "DIFFERENT", "nested": {"key": "value"}}
+        annotation_read_service.get_annotations_by_id.return_value = [annotation]
+
+        (result,) = service.present_all_for_user(sentinel.annotation_ids, user)
+
+        assert result["id"] == annotation.id
+        assert result["nested"] == {"key": "value"}
+        assert annotation.extra == {"id": "DIFFERENT", "nested": {"key": "value"}}
+
     @pytest.fixture
     def service(
         self, annotation_read_service, links_service, flag_service, user_service
@@ -237,6 +346,53 @@ class TestAnnotationJSONService:
         return patch("h.services.annotation_json.DocumentJSONPresenter")
 
 
+class TestPresentAllForUserMatchesPresentForUser:
+    """Check the bulk presentation against presenting one at a time."""
+
+    @pytest.mark.parametrize("is_creator", (True, False))
+    def test_it(
+        self,
+        service,
+        factories,
+        annotation_read_service,
+        user_service,
+        is_creator,
+    ):
+        user = factories.User()
+        open_group = factories.OpenGroup(creator=user if is_creator else None)
+        private_group = factories.Group(creator=user if is_creator else None)
+        annotations = [
+            factories.Annotation(group=group, shared=shared, deleted=deleted)
+            for group in (open_group, private_group)
+            for shared in (True, False)
+            for deleted in (True, False)
+        ] + [
+            factories.Annotation(groupid="__world__", shared=True),
+            factories.Annotation(
+                group=open_group, moderation=factories.AnnotationModeration()
+            ),
+        ]
+        annotation_read_service.get_annotations_by_id.return_value = annotations
+        user_service.fetch_user_info.return_value = user
+
+        results = service.present_all_for_user(sentinel.annotation_ids, user)
+
+        assert results == [
+            service.present_for_user(annotation, user) for annotation in annotations
+        ]
+
+    @pytest.fixture
+    def service(
+        self, annotation_read_service, links_service, flag_service, user_service
+    ):
+        return AnnotationJSONService(
+            annotation_read_service=annotation_read_service,
+            links_service=links_service,
+            flag_service=flag_service,
+            user_service=user_service,
+        )
+
+
 class TestFactory:
     def test_it(
         self,
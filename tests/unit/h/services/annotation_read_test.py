@@ -26,10 +26,19 @@ class TestAnnotationReadService:
 
         assert results == annotations
 
+    def test_get_annotations_by_id_with_repeated_ids(self, svc, factories):
+        annotations = factories.Annotation.create_batch(2)
+
+        results = svc.get_annotations_by_id(
+            [annotations[1].id, annotations[0].id, annotations[1].id]
+        )
+
+        assert results == [annotations[1], annotations[0]]
+
     def test_get_annotations_by_id_with_no_input(self, svc):
         assert not svc.get_annotations_by_id(ids=[])
 
-    @pytest.mark.parametrize("attribute", ("document", "moderation", "group"))
+    @pytest.mark.parametrize("attribute", ("document", "moderation", "group", "thread"))
     def test_get_annotations_by_id_preloading(
         self, svc, factories, db_session, query_counter, attribute
     ):
@@ -7,75 +7,65 @@ from h.services.annotation_stats import AnnotationStatsService, annotation_stats
 
 class TestAnnotationStatsService:
     def test_user_annotation_count(
-        self, pyramid_request, svc, Search, TopLevelAnnotationsFilter
+        self, pyramid_request, svc, Count, TopLevelAnnotationsFilter
     ):
         num_annotations = svc.user_annotation_count(sentinel.userid)
 
-        Search.assert_called_with(pyramid_request)
+        Count.assert_called_with(pyramid_request, caller="stats")
         TopLevelAnnotationsFilter.assert_called_once_with()
-        Search.return_value.append_modifier.assert_called_with(
+        Count.return_value.append_modifier.assert_called_with(
             TopLevelAnnotationsFilter.return_value
         )
-        Search.return_value.run.assert_called_with(
-            {"limit": 0, "user": sentinel.userid}
-        )
-        assert num_annotations == Search.return_value.run.return_value.total
+        Count.return_value.run.assert_called_with({"user": sentinel.userid})
+        assert num_annotations == Count.return_value.run.return_value
 
     def test_total_user_annotation_count(
-        self, pyramid_request, svc, DeletedFilter, Limiter, Search, UserFilter
+        self, pyramid_request, svc, DeletedFilter, Count, UserFilter
     ):
         num_annotations = svc.total_user_annotation_count(sentinel.userid)
 
-        Search.assert_called_with(pyramid_request)
-        Search.return_value.clear.assert_called_once_with()
-        Limiter.assert_called_once_with()
+        Count.assert_called_with(pyramid_request, caller="stats")
+        Count.return_value.clear.assert_called_once_with()
         DeletedFilter.assert_called_once_with()
         UserFilter.assert_called_once_with()
-        assert Search.return_value.append_modifier.call_args_list == [
-            call(Limiter.return_value),
+        assert Count.return_value.append_modifier.call_args_list == [
             call(DeletedFilter.return_value),
             call(UserFilter.return_value),
         ]
-        Search.return_value.run.assert_called_with(
-            {"limit": 0, "user": sentinel.userid}
-        )
-        assert num_annotations == Search.return_value.run.return_value.total
+        Count.return_value.run.assert_called_with({"user": sentinel.userid})
+        assert num_annotations == Count.return_value.run.return_value
 
     def test_group_annotation_count(
-        self, pyramid_request, svc, Search, TopLevelAnnotationsFilter
+        self, pyramid_request, svc, Count, TopLevelAnnotationsFilter
     ):
         num_annotations = svc.group_annotation_count(sentinel.pubid)
 
-        Search.assert_called_with(pyramid_request)
+        Count.assert_called_with(pyramid_request, caller="stats")
         TopLevelAnnotationsFilter.assert_called_once_with()
-        Search.return_value.append_modifier.assert_called_once_with(
+        Count.return_value.append_modifier.assert_called_once_with(
             TopLevelAnnotationsFilter.return_value
         )
-        Search.return_value.run.assert_called_with(
-            {"limit": 0, "group": sentinel.pubid}
-        )
-        assert num_annotations == Search.return_value.run.return_value.total
+        Count.return_value.run.assert_called_with({"group": sentinel.pubid})
+        assert num_annotations == Count.return_value.run.return_value
 
     @pytest.mark.parametrize("unshared", [True, False])
     def test_total_group_annotation_count(
-        self, pyramid_request, svc, Search, SharedAnnotationsFilter, unshared
+        self, pyramid_request, svc, Count, SharedAnnotationsFilter, unshared
     ):
         num_annotations = svc.total_group_annotation_count(
             sentinel.pubid, unshared=unshared
         )
 
-        Search.assert_called_once_with(pyramid_request)
+        Count.assert_called_once_with(pyramid_request, caller="stats")
         if unshared:
-            Search.return_value.append_modifier.assert_not_called()
+            Count.return_value.append_modifier.assert_not_called()
         else:
             SharedAnnotationsFilter.assert_called_once_with()
-            Search.return_value.append_modifier.assert_called_once_with(
+            Count.return_value.append_modifier.assert_called_once_with(
                 SharedAnnotationsFilter.return_value
             )
-        Search.return_value.run.assert_called_once_with(
-            {"limit": 0, "group": sentinel.pubid}
-        )
-        assert num_annotations == Search.return_value.run.return_value.total
+        Count.return_value.run.assert_called_once_with({"group": sentinel.pubid})
+        assert num_annotations == Count.return_value.run.return_value
 
     @pytest.fixture
     def svc(self, pyramid_request):
@@ -99,23 +89,16 @@ class TestAnnotationStatsFactory:
 
 
 @pytest.fixture(autouse=True)
-def DeletedFilter(mocker):
+def Count(mocker):
     return mocker.patch(
-        "h.services.annotation_stats.DeletedFilter", autospec=True, spec_set=True
+        "h.services.annotation_stats.Count", autospec=True, spec_set=True
     )
 
 
 @pytest.fixture(autouse=True)
-def Limiter(mocker):
-    return mocker.patch(
-        "h.services.annotation_stats.Limiter", autospec=True, spec_set=True
-    )
-
-
-@pytest.fixture(autouse=True)
-def Search(mocker):
+def DeletedFilter(mocker):
     return mocker.patch(
-        "h.services.annotation_stats.Search", autospec=True, spec_set=True
+        "h.services.annotation_stats.DeletedFilter", autospec=True, spec_set=True
     )
 
 
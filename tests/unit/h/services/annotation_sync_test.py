@@ -5,6 +5,7 @@ import pytest
 from h_matchers import Any
 
 from h.db.types import URLSafeUUID
+from h.search import instrumentation
 from h.search.index import BatchIndexer
 from h.services.annotation_sync import (
     AnnotationSyncService,
@@ -465,6 +466,15 @@ class TestESHelper:
             },
         }
 
+    def test_get_tags_its_requests_as_sync(self, db_session, es_helper, factories):
+        jobs = factories.SyncAnnotationJob.create_batch(1)
+        db_session.flush()
+        instrumentation.reset()
+
+        es_helper.get(jobs)
+
+        assert instrumentation.report()["sync"]["requests"] == 1
+
     @pytest.fixture
     def es_helper(self, es_client):
         return ESHelper(es_client)
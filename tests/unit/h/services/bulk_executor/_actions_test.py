@@ -276,6 +276,14 @@ class TestBulkGroupMembershipCreate:
 
         assert final_ids == list(reversed(initial_ids))
 
+    def test_it_increments_the_users_memberships_version(
+        self, db_session, commands, user
+    ):
+        GroupMembershipCreateAction(db_session).execute(commands)
+
+        db_session.refresh(user)
+        assert user.memberships_version == 1
+
     def test_it_raises_conflict_with_bad_user_foreign_key(self, db_session, groups):
         with pytest.raises(ConflictingDataError):
             GroupMembershipCreateAction(db_session).execute(
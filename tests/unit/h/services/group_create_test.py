@@ -128,6 +128,21 @@ class TestCreatePrivateGroup:
 
         publish.assert_called_once_with("group-join", group.pubid, creator.userid)
 
+    def test_it_increments_the_creators_memberships_version(
+        self, svc, creator, db_session
+    ):
+        svc.create_private_group("Anteater fans", creator.userid)
+        db_session.flush()
+
+        assert creator.memberships_version == 1
+
+    def test_it_doesnt_invalidate_the_world_readable_groups(
+        self, svc, creator, READABLE_GROUPS_CACHE
+    ):
+        svc.create_private_group("Anteater fans", creator.userid)
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_not_called()
+
 
 class TestCreateOpenGroup:
     def test_it_returns_group_model(self, creator, svc, origins):
@@ -254,6 +269,20 @@ class TestCreateOpenGroup:
         "origins",
         (["http://example.com", "http://example.org"], [], None),
     )
+    def test_it_invalidates_the_world_readable_groups(
+        self, svc, creator, origins, READABLE_GROUPS_CACHE
+    ):
+        svc.create_open_group("Anteater fans", creator.userid, scopes=origins)
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_called_once_with()
+
+    def test_it_invalidates_the_scope_indexes_of_its_origins(
+        self, svc, creator, origins, SCOPE_INDEX_CACHE
+    ):
+        svc.create_open_group("Anteater fans", creator.userid, scopes=origins)
+
+        SCOPE_INDEX_CACHE.invalidate.assert_called_once_with(*origins)
+
     def test_it_sets_scopes(self, svc, creator, origins):
         group = svc.create_open_group(
             name="test_group", userid=creator.userid, scopes=origins
@@ -533,6 +562,16 @@ def creator(factories):
     return factories.User(username="group_creator")
 
 
+@pytest.fixture
+def READABLE_GROUPS_CACHE(patch):
+    return patch("h.services.group_create.READABLE_GROUPS_CACHE")
+
+
+@pytest.fixture
+def SCOPE_INDEX_CACHE(patch):
+    return patch("h.services.group_create.SCOPE_INDEX_CACHE")
+
+
 class GroupScopeWithOrigin(Matcher):
     """Matches any GroupScope with the given origin."""
 
@@ -26,6 +26,20 @@ class TestGroupDeleteService:
 
         assert group in db_session.deleted
 
+    def test_it_invalidates_the_world_readable_groups(
+        self, svc, factories, READABLE_GROUPS_CACHE
+    ):
+        svc.delete(factories.OpenGroup())
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_called_once_with()
+
+    def test_it_doesnt_invalidate_the_world_readable_groups_for_private_groups(
+        self, svc, factories, READABLE_GROUPS_CACHE
+    ):
+        svc.delete(factories.Group())
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_not_called()
+
     def test_it_deletes_annotations(self, svc, factories, annotation_delete_service):
         group = factories.Group()
         annotations = [
@@ -56,6 +70,11 @@ def svc(db_session, pyramid_request):
     return service_factory({}, pyramid_request)
 
 
+@pytest.fixture
+def READABLE_GROUPS_CACHE(patch):
+    return patch("h.services.group_delete.READABLE_GROUPS_CACHE")
+
+
 @pytest.fixture
 def annotation_delete_service(pyramid_config):
     service = mock.create_autospec(
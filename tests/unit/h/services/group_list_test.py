@@ -2,9 +2,11 @@ from unittest import mock
 from unittest.mock import sentinel
 
 import pytest
+import sqlalchemy as sa
 from h_matchers import Any
 
 from h.models.group import Group
+from h.services.group import GroupService
 from h.services.group_list import GroupListService, group_list_factory
 from h.services.group_scope import GroupScopeService
 
@@ -126,7 +128,7 @@ class TestListGroupsRequestGroups:
     ):
         svc.request_groups(authority=default_authority)
 
-        assert not group_scope_service.fetch_by_scope.call_count
+        assert not group_scope_service.fetch_group_ids_by_scope.call_count
 
     def test_it_returns_private_groups_if_user(
         self, svc, user, default_authority, sample_groups
@@ -142,6 +144,31 @@ class TestListGroupsRequestGroups:
 
         assert sample_groups["private"] not in groups
 
+    def test_it_only_returns_private_groups_of_the_private_type(
+        self, svc, user, default_authority, sample_groups, group_service
+    ):
+        group_service.private_groupids = mock.Mock(
+            return_value=[sample_groups["open"].pubid, sample_groups["private"].pubid]
+        )
+
+        groups = svc.request_groups(user=user, authority=default_authority)
+
+        group_service.private_groupids.assert_called_once_with(user)
+        assert sample_groups["private"] in groups
+        assert sample_groups["open"] not in groups
+
+    def test_it_loads_the_groups_scopes(
+        self, svc, default_authority, user, document_uri, db_session
+    ):
+        db_session.expunge_all()
+
+        groups = svc.request_groups(
+            authority=default_authority, user=user, document_uri=document_uri
+        )
+
+        for group in groups:
+            assert "scopes" not in sa.inspect(group).unloaded
+
     def test_returns_ordered_list_of_groups(
         self, svc, default_authority, user, document_uri, sample_groups
     ):
@@ -216,7 +243,9 @@ class TestScopedGroups:
     ):
         svc.scoped_groups(default_authority, document_uri)
 
-        group_scope_service.fetch_by_scope.assert_called_once_with(document_uri)
+        group_scope_service.fetch_group_ids_by_scope.assert_called_once_with(
+            document_uri
+        )
 
     def test_it_returns_empty_list_if_no_document_url(self, svc):
         results = svc.scoped_groups(sentinel.authority, document_uri=None)
@@ -226,7 +255,7 @@ class TestScopedGroups:
     def test_it_returns_empty_list_if_no_matching_scopes(
         self, svc, default_authority, document_uri, group_scope_service
     ):
-        group_scope_service.fetch_by_scope.return_value = []
+        group_scope_service.fetch_group_ids_by_scope.return_value = []
 
         results = svc.scoped_groups(default_authority, document_uri)
 
@@ -284,7 +313,7 @@ class TestWorldGroup:
         assert w_group is None
 
 
-@pytest.mark.usefixtures("group_scope_service")
+@pytest.mark.usefixtures("group_scope_service", "group_service")
 class TestGroupListFactory:
     def test_group_list_factory(self, pyramid_request):
         svc = group_list_factory(None, pyramid_request)
@@ -356,29 +385,38 @@ def sample_groups(factories, other_authority, document_uri, default_authority, u
 
 
 @pytest.fixture
-def group_scope_service(pyramid_config, sample_groups):
+def group_scope_service(pyramid_config, sample_groups, db_session):
+    db_session.flush()
     service = mock.create_autospec(GroupScopeService, spec_set=True, instance=True)
-    service.fetch_by_scope.return_value = [
-        sample_groups["open"].scopes[0],
-        sample_groups["open"].scopes[0],  # This verifies that the groups are de-duped
-        sample_groups["restricted"].scopes[0],
-        sample_groups["other_authority"].scopes[0],
+    service.fetch_group_ids_by_scope.return_value = [
+        sample_groups["open"].id,
+        sample_groups["open"].id,  # This verifies that the groups are de-duped
+        sample_groups["restricted"].id,
+        sample_groups["other_authority"].id,
     ]
     pyramid_config.register_service(service, name="group_scope")
     return service
 
 
 @pytest.fixture
-def svc(pyramid_request, db_session, group_scope_service):
+def group_service(pyramid_config, db_session):
+    service = GroupService(session=db_session, user_fetcher=mock.sentinel.user_fetcher)
+    pyramid_config.register_service(service, name="group")
+    return service
+
+
+@pytest.fixture
+def svc(pyramid_request, db_session, group_scope_service, group_service):
     return GroupListService(
         session=db_session,
         default_authority=pyramid_request.default_authority,
         group_scope_service=group_scope_service,
+        group_service=group_service,
     )
 
 
 @pytest.fixture
-def svc_no_sample_groups(pyramid_request, pyramid_config, db_session):
+def svc_no_sample_groups(pyramid_request, pyramid_config, db_session, group_service):
     # The way that the group_scope_service is mocked in the main `svc`
     # fixture brings `sample_groups` into the DB. For a clean service with
     # no groups in the DB...here we go
@@ -390,4 +428,5 @@ def svc_no_sample_groups(pyramid_request, pyramid_config, db_session):
         session=db_session,
         default_authority=pyramid_request.default_authority,
         group_scope_service=group_scope_svc,
+        group_service=group_service,
     )
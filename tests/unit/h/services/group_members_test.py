@@ -22,6 +22,16 @@ class TestMemberJoin:
 
         assert group.members.count(user) == 1
 
+    def test_it_increments_the_users_memberships_version(
+        self, group_members_service, factories
+    ):
+        user = factories.User()
+        group = factories.Group()
+        group_members_service.member_join(group, user.userid)
+        group_members_service.member_join(group, user.userid)
+
+        assert user.memberships_version == 1
+
     def test_it_publishes_join_event(self, group_members_service, factories, publish):
         group = factories.Group()
         user = factories.User()
@@ -53,6 +63,18 @@ class TestMemberLeave:
 
         assert new_member not in group.members
 
+    def test_it_increments_the_users_memberships_version(
+        self, group_members_service, factories, creator
+    ):
+        group = factories.Group(creator=creator)
+        new_member = factories.User()
+        group.members.append(new_member)
+
+        group_members_service.member_leave(group, new_member.userid)
+        group_members_service.member_leave(group, new_member.userid)
+
+        assert new_member.memberships_version == 1
+
     def test_it_publishes_leave_event(self, group_members_service, factories, publish):
         group = factories.Group()
         new_member = factories.User()
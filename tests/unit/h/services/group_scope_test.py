@@ -1,6 +1,11 @@
 import pytest
 
-from h.services.group_scope import GroupScopeService, group_scope_factory
+from h.services.group_scope import (
+    SCOPE_INDEX_CACHE,
+    GroupScopeService,
+    ScopeIndex,
+    group_scope_factory,
+)
 
 
 class TestFetchByScope:
@@ -34,6 +39,68 @@ class TestFetchByScope:
         assert "http://foo.com/bar/" in matching_scope_scopes
 
 
+class TestFetchGroupIdsByScope:
+    def test_it_returns_empty_list_if_origin_not_parseable(self, svc):
+        assert svc.fetch_group_ids_by_scope("not a url") == []
+
+    def test_it_returns_the_ids_of_the_groups_with_matching_scopes(
+        self, svc, document_uri, sample_scopes
+    ):
+        group_ids = svc.fetch_group_ids_by_scope(document_uri)
+
+        assert sorted(group_ids) == sorted(
+            scope.group_id for scope in sample_scopes[:2]
+        )
+
+    @pytest.mark.parametrize(
+        "url",
+        (
+            "http://foo.com",
+            "http://foo.com/bar/baz/foo.html?q=something&wut=how&more",
+            "http://foo.com/ba",
+            "http://foo.com.evil.com/bar/",
+            "https://foo.com/bar/",
+        ),
+    )
+    @pytest.mark.usefixtures("sample_scopes")
+    def test_it_matches_the_same_scopes_as_fetch_by_scope(self, svc, url):
+        group_ids = svc.fetch_group_ids_by_scope(url)
+
+        assert sorted(group_ids) == sorted(
+            scope.group_id for scope in svc.fetch_by_scope(url)
+        )
+
+    def test_it_caches_the_origins_scopes(
+        self, svc, document_uri, sample_scopes, db_session
+    ):
+        svc.fetch_group_ids_by_scope(document_uri)
+        db_session.delete(sample_scopes[0])
+        db_session.flush()
+
+        group_ids = svc.fetch_group_ids_by_scope(document_uri)
+
+        assert sample_scopes[0].group_id in group_ids
+        assert SCOPE_INDEX_CACHE.get("http://foo.com")
+
+
+class TestScopeIndex:
+    def test_it_matches_scopes_the_url_starts_with(self):
+        index = ScopeIndex(
+            [
+                ("http://foo.com", 1),
+                ("http://foo.com/bar", 2),
+                ("http://foo.com/bar", 3),
+                ("http://foo.com/bar/baz.html", 4),
+                ("http://foo.com/baz", 5),
+            ]
+        )
+
+        assert index.match("http://foo.com/bar/") == [1, 2, 3]
+
+    def test_it_matches_nothing_if_there_are_no_scopes(self):
+        assert not ScopeIndex([]).match("http://foo.com")
+
+
 class TestGroupScopeFactory:
     def test_it_returns_group_scope_service_instance(self, pyramid_request):
         svc = group_scope_factory(None, pyramid_request)
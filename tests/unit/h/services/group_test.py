@@ -6,7 +6,12 @@ from h_matchers import Any
 
 from h.models import Group
 from h.models.group import ReadableBy
-from h.services.group import GroupService, groups_factory
+from h.services.group import (
+    READABLE_GROUPS_CACHE,
+    GroupService,
+    ReadableGroupsCache,
+    groups_factory,
+)
 
 
 class TestGroupServiceFetch:
@@ -159,6 +164,59 @@ class TestGroupServiceGroupIds:
         pubids = [group.pubid, "doesnotexist"]
         assert svc.groupids_readable_by(user, group_ids=pubids) == [group.pubid]
 
+    def test_readable_by_sorts_the_pubids(self, svc, db_session, factories):
+        user = factories.User()
+        for _ in range(3):
+            factories.Group(readable_by=ReadableBy.members).members.append(user)
+            factories.Group(readable_by=ReadableBy.world)
+        db_session.flush()
+
+        pubids = svc.groupids_readable_by(user)
+
+        assert pubids == sorted(pubids)
+
+    @pytest.mark.parametrize("with_user", [True, False])
+    def test_readable_by_caches_world_readable_groups(
+        self, with_user, svc, db_session, factories
+    ):
+        user = None
+        if with_user:
+            user = factories.User()
+            db_session.flush()
+        svc.groupids_readable_by(user)
+
+        group = factories.Group(readable_by=ReadableBy.world)
+        db_session.flush()
+
+        assert group.pubid not in svc.groupids_readable_by(user)
+        READABLE_GROUPS_CACHE.invalidate_world()
+        assert group.pubid in svc.groupids_readable_by(user)
+
+    def test_readable_by_caches_memberships_until_they_change(
+        self, svc, db_session, factories
+    ):
+        user = factories.User()
+        db_session.flush()
+        svc.groupids_readable_by(user)
+
+        group = factories.Group(readable_by=ReadableBy.members)
+        group.members.append(user)
+        db_session.flush()
+
+        assert group.pubid not in svc.groupids_readable_by(user)
+        user.memberships_version += 1
+        assert group.pubid in svc.groupids_readable_by(user)
+
+    def test_private_groupids(self, svc, db_session, factories):
+        user = factories.User()
+        group = factories.Group(readable_by=ReadableBy.members)
+        group.members.append(user)
+        factories.Group(readable_by=ReadableBy.members)
+        factories.Group(readable_by=ReadableBy.world).members.append(user)
+        db_session.flush()
+
+        assert svc.private_groupids(user) == [group.pubid]
+
     def test_created_by_includes_created_groups(self, svc, factories):
         user = factories.User()
         group = factories.Group(creator=user)
@@ -178,6 +236,74 @@ class TestGroupServiceGroupIds:
         assert svc.groupids_created_by(None) == []
 
 
+class TestReadableGroupsCache:
+    def test_get_world_returns_None_if_not_cached(self, cache):
+        assert cache.get_world() is None
+
+    def test_get_world_returns_cached_pubids(self, cache):
+        cache.set_world(["__world__"])
+
+        assert cache.get_world() == ["__world__"]
+
+    def test_world_pubids_expire(self, cache, monotonic):
+        cache.set_world(["__world__"])
+
+        monotonic.return_value += 10
+
+        assert cache.get_world() is None
+
+    def test_invalidate_world(self, cache):
+        cache.set_world(["__world__"])
+
+        cache.invalidate_world()
+
+        assert cache.get_world() is None
+
+    def test_get_member_returns_None_for_missing_keys(self, cache):
+        assert cache.get_member((1, 0)) is None
+
+    def test_get_member_returns_cached_pubids(self, cache):
+        cache.set_member((1, 0), ["group"])
+
+        assert cache.get_member((1, 0)) == ["group"]
+
+    def test_member_pubids_expire(self, cache, monotonic):
+        cache.set_member((1, 0), ["group"])
+
+        monotonic.return_value += 5
+
+        assert cache.get_member((1, 0)) is None
+
+    def test_it_removes_the_least_recently_used_members(self, cache):
+        cache.set_member((1, 0), ["first"])
+        cache.set_member((2, 0), ["second"])
+        cache.get_member((1, 0))
+
+        cache.set_member((3, 0), ["third"])
+
+        assert cache.get_member((1, 0)) == ["first"]
+        assert cache.get_member((2, 0)) is None
+        assert cache.get_member((3, 0)) == ["third"]
+
+    def test_world_pubids_outlive_member_pubids(self, cache, monotonic):
+        cache.set_world(["__world__"])
+        cache.set_member((1, 0), ["group"])
+
+        monotonic.return_value += 5
+
+        assert cache.get_world() == ["__world__"]
+        assert cache.get_member((1, 0)) is None
+
+    @pytest.fixture
+    def cache(self, monotonic):  # pylint:disable=unused-argument
+        return ReadableGroupsCache(maxsize=2, ttl=5, world_ttl=10)
+
+    @pytest.fixture
+    def monotonic(self):
+        with mock.patch("h.util.cache.monotonic", return_value=100.0) as monotonic:
+            yield monotonic
+
+
 @pytest.mark.usefixtures("user_service")
 class TestGroupsFactory:
     def test_returns_groups_service(self, pyramid_request):
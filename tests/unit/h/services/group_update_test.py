@@ -3,6 +3,7 @@ from unittest import mock
 import pytest
 from sqlalchemy.exc import SQLAlchemyError
 
+from h.models.group import ReadableBy
 from h.services.exceptions import ConflictError, ValidationError
 from h.services.group_update import GroupUpdateService, group_update_factory
 
@@ -43,6 +44,88 @@ class TestGroupUpdate:
 
         assert updated_group.scopes == updated_scopes
 
+    def test_it_invalidates_the_scope_indexes_of_changed_origins(
+        self, factories, svc, SCOPE_INDEX_CACHE
+    ):
+        group = factories.Group(
+            scopes=[factories.GroupScope(scope="http://old.example.com/")]
+        )
+        updated_scopes = [factories.GroupScope(scope="http://new.example.com/")]
+
+        svc.update(group, scopes=updated_scopes)
+
+        SCOPE_INDEX_CACHE.invalidate.assert_called_once()
+        assert set(SCOPE_INDEX_CACHE.invalidate.call_args.args) == {
+            "http://old.example.com",
+            "http://new.example.com",
+        }
+
+    def test_it_doesnt_invalidate_scope_indexes_if_scopes_arent_updated(
+        self, factories, svc, SCOPE_INDEX_CACHE
+    ):
+        group = factories.Group(scopes=[factories.GroupScope()])
+
+        svc.update(group, name="whatnot")
+
+        SCOPE_INDEX_CACHE.invalidate.assert_called_once_with()
+
+    @pytest.mark.parametrize(
+        "readable_by,new_readable_by",
+        [
+            (ReadableBy.members, ReadableBy.world),
+            (ReadableBy.world, ReadableBy.members),
+        ],
+    )
+    def test_it_invalidates_the_world_readable_groups_if_readable_by_changes(
+        self, factories, svc, READABLE_GROUPS_CACHE, readable_by, new_readable_by
+    ):
+        group = factories.Group(readable_by=readable_by)
+
+        svc.update(group, readable_by=new_readable_by)
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_called_once_with()
+
+    def test_it_invalidates_the_world_readable_groups_if_the_type_changes(
+        self, factories, svc, READABLE_GROUPS_CACHE
+    ):
+        group = factories.OpenGroup()
+
+        svc.update(group, type="private")
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_called_once_with()
+
+    def test_it_doesnt_invalidate_the_world_readable_groups_otherwise(
+        self, factories, svc, READABLE_GROUPS_CACHE
+    ):
+        group = factories.OpenGroup()
+
+        svc.update(group, name="whatnot", readable_by=ReadableBy.world)
+
+        READABLE_GROUPS_CACHE.invalidate_world.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"readable_by": ReadableBy.world}, {"type": "restricted"}]
+    )
+    def test_it_increments_the_members_memberships_versions_if_readable_by_changes(
+        self, factories, svc, kwargs
+    ):
+        members = factories.User.create_batch(2)
+        group = factories.Group(members=members)
+
+        svc.update(group, **kwargs)
+
+        assert [member.memberships_version for member in members] == [1, 1]
+
+    def test_it_doesnt_increment_the_members_memberships_versions_otherwise(
+        self, factories, svc
+    ):
+        member = factories.User()
+        group = factories.Group(members=[member])
+
+        svc.update(group, name="whatnot", readable_by=ReadableBy.members)
+
+        assert not member.memberships_version
+
     @pytest.mark.parametrize("new_group_type", ["restricted", "open"])
     def test_it_updates_the_type_of_a_group(self, factories, svc, new_group_type):
         group = factories.Group()
@@ -110,3 +193,13 @@ class TestFactory:
 @pytest.fixture
 def svc(db_session):
     return GroupUpdateService(session=db_session)
+
+
+@pytest.fixture
+def READABLE_GROUPS_CACHE(patch):
+    return patch("h.services.group_update.READABLE_GROUPS_CACHE")
+
+
+@pytest.fixture
+def SCOPE_INDEX_CACHE(patch):
+    return patch("h.services.group_update.SCOPE_INDEX_CACHE")
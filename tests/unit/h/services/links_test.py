@@ -2,7 +2,12 @@ from unittest import mock
 
 import pytest
 
-from h.services.links import LinksService, add_annotation_link_generator, links_factory
+from h.services.links import (
+    LINK_GENERATORS_KEY,
+    LinksService,
+    add_annotation_link_generator,
+    links_factory,
+)
 
 
 class TestLinksService:
@@ -27,6 +32,16 @@ class TestLinksService:
 
         assert result == "http://donkeys.com/some/path"
 
+    def test_get_passes_generators_request_with_default_authority(self, registry):
+        registry.settings["h.authority"] = "example.org"
+        registry[LINK_GENERATORS_KEY]["test"] = (
+            lambda r, _a: r.default_authority,
+            False,
+        )
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        assert svc.get(mock.sentinel.annotation, "test") == "example.org"
+
     def test_get_passes_generators_annotation(self, registry):
         annotation = mock.Mock(id=12345)
         svc = LinksService(base_url="http://example.com", registry=registry)
@@ -57,6 +72,66 @@ class TestLinksService:
 
         assert "returnsnone" not in result
 
+    @pytest.mark.parametrize(
+        "kwargs,expected",
+        [
+            ({"id": "abc123"}, "http://example.com/annotations/abc123"),
+            # Values are quoted like they are by `route_url()`
+            ({"id": "a b/c{0}"}, "http://example.com/annotations/a%20b/c%7B0%7D"),
+            # Non-string values and extra arguments aren't templated
+            ({"id": 12345}, "http://example.com/annotations/12345"),
+            (
+                {"id": "abc", "_query": {"q": "x"}},
+                "http://example.com/annotations/abc?q=x",
+            ),
+        ],
+    )
+    def test_route_urls(self, registry, kwargs, expected):
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        # The second call is generated from the URL template
+        for _ in range(2):
+            assert self.route_url(svc, "param.route", **kwargs) == expected
+
+    def test_route_urls_with_multiple_arguments(self, registry):
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        for first, second in [("a", "b"), ("c", "d")]:
+            assert (
+                self.route_url(svc, "two.param.route", second=second, first=first)
+                == f"http://example.com/{first}/and/{second}"
+            )
+
+    def test_route_urls_with_elements(self, registry):
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        url = self.route_url(svc, "param.route", "edit", id="abc")
+
+        assert url == "http://example.com/annotations/abc/edit"
+
+    def test_route_urls_for_routes_with_pregenerators(self, registry):
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        for id_ in ["abc", "def"]:
+            assert (
+                self.route_url(svc, "pregenerator.route", id=id_)
+                == f"http://example.com/annotations/{id_}-suffix"
+            )
+
+    def test_route_urls_for_missing_routes(self, registry):
+        svc = LinksService(base_url="http://example.com", registry=registry)
+
+        with pytest.raises(KeyError):
+            self.route_url(svc, "missing.route", id="abc")
+
+    @staticmethod
+    def route_url(svc, *args, **kwargs):
+        svc.registry[LINK_GENERATORS_KEY]["test"] = (
+            lambda r, _a: r.route_url(*args, **kwargs),
+            False,
+        )
+        return svc.get(mock.sentinel.annotation, "test")
+
 
 class TestLinksFactory:
     def test_returns_links_service(self, pyramid_request):
@@ -86,6 +161,12 @@ class TestLinksFactory:
 def registry(pyramid_config):
     pyramid_config.add_route("some.named.route", "/some/path")
     pyramid_config.add_route("param.route", "/annotations/{id}")
+    pyramid_config.add_route("two.param.route", "/{first}/and/{second}")
+    pyramid_config.add_route(
+        "pregenerator.route",
+        "/annotations/{id}",
+        pregenerator=lambda _r, elements, kw: (elements, {"id": kw["id"] + "-suffix"}),
+    )
 
     add_annotation_link_generator(
         pyramid_config, "giraffe", lambda r, a: "http://giraffes.com"
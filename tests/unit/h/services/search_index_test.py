@@ -4,6 +4,7 @@ import pytest
 from h_matchers import Any
 
 from h.events import AnnotationEvent
+from h.search import instrumentation
 from h.services.search_index import SearchIndexService, factory
 from h.services.settings import SettingsService
 
@@ -117,6 +118,19 @@ class TestAddAnnotation:
             refresh=False,
         )
 
+    def test_it_tags_the_request_as_the_indexer(
+        self, search_index, annotation, mock_es_client
+    ):
+        def index(**_kwargs):
+            # pylint:disable=protected-access
+            assert instrumentation._caller.get() == "indexer"
+
+        mock_es_client.conn.index.side_effect = index
+
+        search_index.add_annotation(annotation)
+
+        mock_es_client.conn.index.assert_called_once()
+
     @pytest.mark.usefixtures("with_reindex_in_progress")
     def test_it_calls_elasticsearch_again_for_a_reindex(
         self, search_index, annotation, mock_es_client
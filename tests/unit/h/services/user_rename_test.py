@@ -54,6 +54,15 @@ class TestUserRenameService:
 
         assert db_session.get(models.User, user.id).username == "panda"
 
+    def test_rename_invalidates_the_cached_user_info(
+        self, service, user, USER_INFO_CACHE
+    ):
+        old_userid = user.userid
+
+        service.rename(user, "panda")
+
+        USER_INFO_CACHE.invalidate.assert_called_once_with(old_userid, user.userid)
+
     def test_rename_deletes_auth_tickets(self, service, user, db_session, factories):
         ids = [factories.AuthTicket(user=user).id for _ in range(3)]
 
@@ -102,6 +111,10 @@ class TestUserRenameService:
     def service(self, pyramid_request):
         return UserRenameService(session=pyramid_request.db)
 
+    @pytest.fixture
+    def USER_INFO_CACHE(self, patch):
+        return patch("h.services.user_rename.USER_INFO_CACHE")
+
     @pytest.fixture
     def check(self, patch):
         return patch("h.services.user_rename.UserRenameService.check")
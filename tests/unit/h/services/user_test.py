@@ -1,7 +1,13 @@
 import pytest
 
 from h.models import User
-from h.services.user import UserNotActivated, UserService, user_service_factory
+from h.services.user import (
+    USER_INFO_CACHE,
+    UserInfo,
+    UserNotActivated,
+    UserService,
+    user_service_factory,
+)
 
 
 @pytest.mark.usefixtures("users")
@@ -45,6 +51,54 @@ class TestUserService:
         assert len(result) == 1
         assert result[0].username == "jacqui"
 
+    def test_fetch_user_info(self, svc):
+        assert svc.fetch_user_info("acct:jacqui@foo.com") == UserInfo(
+            "acct:jacqui@foo.com", "foo.com", "Jacqui"
+        )
+
+    def test_fetch_user_info_returns_None_if_the_user_is_not_found(self, svc):
+        assert svc.fetch_user_info("acct:missing@foo.com") is None
+
+    def test_fetch_all_user_info(self, svc, users):
+        steve = users[1]
+
+        result = svc.fetch_all_user_info(
+            ["acct:jacqui@foo.com", "acct:steve@example.com", "acct:missing@foo.com"]
+        )
+
+        assert result == {
+            "acct:jacqui@foo.com": UserInfo("acct:jacqui@foo.com", "foo.com", "Jacqui"),
+            "acct:steve@example.com": UserInfo(
+                "acct:steve@example.com", "example.com", steve.display_name
+            ),
+        }
+
+    def test_fetch_all_user_info_matches_userids_like_the_db(self, svc):
+        result = svc.fetch_all_user_info(["acct:J.acqui@foo.com"])
+
+        assert result["acct:J.acqui@foo.com"].userid == "acct:jacqui@foo.com"
+
+    def test_fetch_all_user_info_caches_across_requests(self, db_session, svc, users):
+        jacqui, _, _, _ = users
+        svc.fetch_all_user_info(["acct:jacqui@foo.com"])
+        db_session.delete(jacqui)
+        db_session.flush()
+
+        # A new service, like the next request would have
+        svc = UserService(default_authority="example.com", session=db_session)
+        result = svc.fetch_all_user_info(["acct:jacqui@foo.com"])
+
+        assert result["acct:jacqui@foo.com"].display_name == "Jacqui"
+
+    def test_fetch_all_user_info_only_looks_for_missing_users_once(
+        self, svc, db_session, factories
+    ):
+        svc.fetch_all_user_info(["acct:missing@foo.com"])
+        factories.User(username="missing", authority="foo.com")
+        db_session.flush()
+
+        assert not svc.fetch_all_user_info(["acct:missing@foo.com"])
+
     def test_fetch_by_identity_finds_by_provider_info(self, svc, users):
         _, _, _, freddo = users
 
@@ -140,6 +194,29 @@ class TestUserService:
         user = svc.fetch("acct:jacqui@foo.com")
         assert user is None
 
+    def test_clears_missing_user_info_on_transaction_end(
+        self, patch, db_session, factories
+    ):
+        funcs = {}
+
+        def on_transaction_end_decorator(session):  # pylint:disable=unused-argument
+            def on_transaction_end(func):
+                funcs["clear_cache"] = func
+
+            return on_transaction_end
+
+        decorator = patch("h.services.user.on_transaction_end")
+        decorator.side_effect = on_transaction_end_decorator
+
+        svc = UserService(default_authority="example.com", session=db_session)
+        svc.fetch_all_user_info(["acct:missing@foo.com"])
+        factories.User(username="missing", authority="foo.com")
+        db_session.flush()
+
+        funcs["clear_cache"]()
+
+        assert svc.fetch_all_user_info(["acct:missing@foo.com"])
+
     @pytest.fixture
     def svc(self, db_session):
         return UserService(default_authority="example.com", session=db_session)
@@ -163,7 +240,10 @@ class TestUserService:
         ]
         users = [
             factories.User(
-                username="jacqui", email="jacqui@jj.com", authority="foo.com"
+                username="jacqui",
+                email="jacqui@jj.com",
+                authority="foo.com",
+                display_name="Jacqui",
             ),
             factories.User(
                 username="steve", email="steve@steveo.com", authority="example.com"
@@ -180,6 +260,30 @@ class TestUserService:
         return users
 
 
+class TestUserInfoCache:
+    @pytest.mark.parametrize(
+        "userid", ("acct:Jacqui@foo.com", "acct:j.a.c.q.u.i@foo.com")
+    )
+    def test_it_matches_usernames_like_the_db(self, userid):
+        USER_INFO_CACHE.set("acct:jacqui@foo.com", self.INFO)
+
+        assert USER_INFO_CACHE.get(userid) == self.INFO
+
+    def test_it_does_not_match_other_authorities(self):
+        USER_INFO_CACHE.set("acct:jacqui@foo.com", self.INFO)
+
+        assert USER_INFO_CACHE.get("acct:jacqui@example.com") is None
+
+    def test_invalidate_matches_usernames_like_the_db(self):
+        USER_INFO_CACHE.set("acct:jacqui@foo.com", self.INFO)
+
+        USER_INFO_CACHE.invalidate("acct:J.acqui@foo.com")
+
+        assert USER_INFO_CACHE.get("acct:jacqui@foo.com") is None
+
+    INFO = UserInfo("acct:jacqui@foo.com", "foo.com", "Jacqui")
+
+
 class TestUserServiceFactory:
     def test_returns_user_service(self, pyramid_request):
         svc = user_service_factory(None, pyramid_request)
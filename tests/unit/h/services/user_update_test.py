@@ -17,6 +17,15 @@ class TestUserUpdate:
         assert user.display_name == "foobar"
         assert user.email == "foobar@example.com"
 
+    def test_it_invalidates_the_cached_user_info(self, factories, svc, USER_INFO_CACHE):
+        user = factories.User(username="old", authority="example.com")
+
+        svc.update(user, username="new")
+
+        USER_INFO_CACHE.invalidate.assert_called_once_with(
+            "acct:old@example.com", "acct:new@example.com"
+        )
+
     def test_it_returns_updated_user_model(self, factories, svc):
         user = factories.User()
         data = {"display_name": "whatnot"}
@@ -103,3 +112,8 @@ class TestFactory:
 @pytest.fixture
 def svc(db_session):
     return UserUpdateService(session=db_session)
+
+
+@pytest.fixture
+def USER_INFO_CACHE(patch):
+    return patch("h.services.user_update.USER_INFO_CACHE")
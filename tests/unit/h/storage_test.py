@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 
 from h import storage
 from h.models.document import Document, DocumentURI
@@ -75,3 +76,171 @@ class TestExpandURI:
         )
 
         assert sorted(uris) == sorted(expected_uris)
+
+    def test_expand_uri_caches_the_document_uris(self, db_session, document):
+        storage.expand_uri(db_session, "http://example.com/")
+        db_session.add(
+            DocumentURI(
+                uri="http://new.example.com/",
+                claimant="http://example.com",
+                document=document,
+            )
+        )
+        db_session.flush()
+
+        uris = storage.expand_uri(db_session, "http://example.com/")
+
+        assert sorted(uris) == ["http://alt.example.com/", "http://example.com/"]
+
+    def test_expand_uri_caches_uris_without_documents(self, db_session):
+        storage.expand_uri(db_session, "http://example.com/")
+
+        assert storage.EXPAND_URI_CACHE.get("httpx://example.com") == ()
+
+    def test_expand_uri_sees_new_uris_after_invalidation(self, db_session, document):
+        storage.expand_uri(db_session, "http://example.com/")
+        db_session.add(
+            DocumentURI(
+                uri="http://new.example.com/",
+                claimant="http://example.com",
+                document=document,
+            )
+        )
+        db_session.flush()
+
+        storage.EXPAND_URI_CACHE.invalidate_tags(document.id)
+        uris = storage.expand_uri(db_session, "http://example.com/")
+
+        assert sorted(uris) == [
+            "http://alt.example.com/",
+            "http://example.com/",
+            "http://new.example.com/",
+        ]
+
+    @pytest.fixture
+    def document(self, db_session):
+        document = Document(
+            document_uris=[
+                DocumentURI(uri="http://example.com/", claimant="http://example.com"),
+                DocumentURI(
+                    uri="http://alt.example.com/", claimant="http://example.com"
+                ),
+            ]
+        )
+        db_session.add(document)
+        db_session.flush()
+        return document
+
+
+@pytest.mark.usefixtures("documents")
+class TestExpandURIs:
+    def test_it(self, db_session):
+        uris = storage.expand_uris(
+            db_session,
+            [
+                "http://example.com/",
+                "http://alt.example.com/",
+                "http://canonical.example.com/",
+                "http://no-document.example.com/",
+            ],
+        )
+
+        assert {uri: sorted(expanded) for uri, expanded in uris.items()} == {
+            "http://example.com/": ["http://alt.example.com/", "http://example.com/"],
+            "http://alt.example.com/": [
+                "http://alt.example.com/",
+                "http://example.com/",
+            ],
+            "http://canonical.example.com/": ["http://canonical.example.com/"],
+            "http://no-document.example.com/": ["http://no-document.example.com/"],
+        }
+
+    def test_it_returns_normalized_uris(self, db_session):
+        uris = storage.expand_uris(
+            db_session, ["http://example.com/", "https://example.com"], normalized=True
+        )
+
+        assert {uri: sorted(expanded) for uri, expanded in uris.items()} == {
+            "http://example.com/": ["httpx://alt.example.com", "httpx://example.com"],
+            "https://example.com": ["httpx://alt.example.com", "httpx://example.com"],
+        }
+
+    def test_it_looks_up_uncached_uris_in_one_query(self, db_session, db_engine):
+        statements = []
+
+        def listener(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", listener)
+        try:
+            storage.expand_uris(
+                db_session,
+                [
+                    "http://example.com/",
+                    "http://canonical.example.com/",
+                    "http://no-document.example.com/",
+                ],
+            )
+        finally:
+            event.remove(db_engine, "before_cursor_execute", listener)
+
+        assert len(statements) == 1
+
+    def test_it_uses_cached_uris(self, db_session):
+        storage.EXPAND_URI_CACHE.set(
+            "httpx://example.com",
+            (("", "http://cached.example.com/", "httpx://cached.example.com"),),
+        )
+
+        uris = storage.expand_uris(db_session, ["http://example.com/"])
+
+        assert uris == {"http://example.com/": ["http://cached.example.com/"]}
+
+    def test_it_caches_the_uris(self, db_session, documents):
+        storage.expand_uris(
+            db_session, ["http://example.com/", "http://no-document.example.com/"]
+        )
+
+        assert sorted(storage.EXPAND_URI_CACHE.get("httpx://example.com")) == sorted(
+            (uri.type, uri.uri, uri.uri_normalized)
+            for uri in documents[0].document_uris
+        )
+        assert storage.EXPAND_URI_CACHE.get("httpx://no-document.example.com") == ()
+
+    def test_it_tags_the_cached_uris_with_their_document(self, db_session, documents):
+        storage.expand_uris(db_session, ["http://example.com/"])
+
+        storage.EXPAND_URI_CACHE.invalidate_tags(documents[0].id)
+
+        assert storage.EXPAND_URI_CACHE.get("httpx://example.com") is None
+
+    @pytest.fixture
+    def documents(self, db_session):
+        documents = [
+            Document(
+                document_uris=[
+                    DocumentURI(
+                        uri="http://example.com/", claimant="http://example.com"
+                    ),
+                    DocumentURI(
+                        uri="http://alt.example.com/", claimant="http://example.com"
+                    ),
+                ]
+            ),
+            Document(
+                document_uris=[
+                    DocumentURI(
+                        uri="http://canonical.example.com/",
+                        type="rel-canonical",
+                        claimant="http://canonical.example.com",
+                    ),
+                    DocumentURI(
+                        uri="http://noise.example.com/",
+                        claimant="http://canonical.example.com",
+                    ),
+                ]
+            ),
+        ]
+        db_session.add_all(documents)
+        db_session.flush()
+        return documents
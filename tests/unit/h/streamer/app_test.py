@@ -4,6 +4,7 @@ import pytest
 from pyramid.config import Configurator
 
 from h.sentry_filters import SENTRY_FILTERS
+from h.settings import SettingError
 from h.streamer.app import create_app
 
 
@@ -19,9 +20,28 @@ class TestIncludeMe:
             }
         )
 
+    @pytest.mark.parametrize("policy", ["drop_oldest", "disconnect"])
+    @pytest.mark.usefixtures("configure")
+    def test_it_accepts_the_slow_consumer_policies(self, config, policy):
+        config.registry.settings["h.streamer.slow_consumer_policy"] = policy
+
+        create_app(None)
+
+    @pytest.mark.parametrize("policy", ["drop_newest", "", None])
+    @pytest.mark.usefixtures("configure")
+    def test_it_raises_if_the_slow_consumer_policy_is_unknown(self, config, policy):
+        config.registry.settings["h.streamer.slow_consumer_policy"] = policy
+
+        with pytest.raises(SettingError, match="unknown slow consumer policy"):
+            create_app(None)
+
     @pytest.fixture
     def config(self):
-        return mock.create_autospec(Configurator, instance=True)
+        config = mock.create_autospec(Configurator, instance=True)
+        config.registry = mock.Mock(
+            settings={"h.streamer.slow_consumer_policy": "drop_oldest"}
+        )
+        return config
 
     @pytest.fixture
     def configure(self, patch, config):
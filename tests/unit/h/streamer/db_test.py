@@ -2,8 +2,9 @@ from unittest import mock
 from unittest.mock import sentinel
 
 import pytest
+from sqlalchemy import create_engine, text
 
-from h.streamer.db import get_session, read_only_transaction
+from h.streamer.db import QueryTimer, get_session, read_only_transaction
 from h.streamer.streamer import UnknownMessageType
 
 
@@ -20,6 +21,30 @@ class TestMakeSession:
         return patch("h.streamer.db.db")
 
 
+class TestQueryTimer:
+    def test_it_adds_up_time_spent_in_queries(self, engine, perf_counter):
+        perf_counter.side_effect = [1.0, 1.5, 2.0, 2.25]
+        query_timer = QueryTimer(engine)
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+        assert query_timer.elapsed == 0.75
+
+    @pytest.fixture
+    def engine(self, db_engine):
+        # Use a separate engine, so the timer's listeners don't stay on the
+        # engine shared by the other tests
+        engine = create_engine(db_engine.url)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def perf_counter(self, patch):
+        return patch("h.streamer.db.perf_counter")
+
+
 class TestReadOnlyTransaction:
     def test_it_starts_a_read_only_transaction(self, session, text):
         with read_only_transaction(session):
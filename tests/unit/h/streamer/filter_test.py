@@ -83,6 +83,28 @@ class TestFilterHandler:
             db_session, annotation.target_uri, normalized=True
         )
 
+    def test_it_uses_already_expanded_uris(self, annotation, storage, db_session):
+        socket = FakeSocket()
+        SocketFilter.set_filter(
+            socket,
+            {
+                "match_policy": "include_any",
+                "actions": {},
+                "clauses": [
+                    {"field": "/uri", "operator": "one_of", "value": "urn:x-pdf:1234"}
+                ],
+            },
+        )
+
+        result = tuple(
+            SocketFilter.matching(
+                [socket], annotation, db_session, expanded_uris=["urn:x-pdf:1234"]
+            )
+        )
+
+        assert result == (socket,)
+        storage.expand_uri.assert_not_called()
+
     def test_it_matches_id(self, factories, filter_matches, annotation):
         other_annotation = factories.Annotation()
 
@@ -128,6 +150,55 @@ class TestFilterHandler:
         result = tuple(SocketFilter.matching([socket], annotation, db_session))
         assert not result
 
+    def test_it_only_matches_the_sockets_passed(self, annotation, db_session):
+        socket, other_socket = FakeSocket(), FakeSocket()
+        for sock in (socket, other_socket):
+            SocketFilter.set_filter(sock, self.group_filter(annotation.groupid))
+
+        result = tuple(SocketFilter.matching([socket], annotation, db_session))
+
+        assert result == (socket,)
+
+    def test_it_does_not_match_after_the_filter_is_replaced(
+        self, factories, annotation, db_session
+    ):
+        socket = FakeSocket()
+        SocketFilter.set_filter(socket, self.group_filter(annotation.groupid))
+
+        SocketFilter.set_filter(socket, self.group_filter("other"))
+
+        assert not tuple(SocketFilter.matching([socket], annotation, db_session))
+        other_annotation = factories.Annotation(groupid="other")
+        assert tuple(SocketFilter.matching([socket], other_annotation, db_session))
+
+    def test_it_does_not_match_after_the_filter_is_removed(
+        self, annotation, db_session
+    ):
+        socket = FakeSocket()
+        SocketFilter.set_filter(socket, self.group_filter(annotation.groupid))
+
+        SocketFilter.remove_filter(socket)
+
+        assert not socket.filter_rows
+        assert not tuple(SocketFilter.matching([socket], annotation, db_session))
+
+    def test_removing_a_filter_does_not_affect_other_sockets(
+        self, annotation, db_session
+    ):
+        socket, other_socket = FakeSocket(), FakeSocket()
+        for sock in (socket, other_socket):
+            SocketFilter.set_filter(sock, self.group_filter(annotation.groupid))
+
+        SocketFilter.remove_filter(socket)
+
+        result = tuple(
+            SocketFilter.matching([socket, other_socket], annotation, db_session)
+        )
+        assert result == (other_socket,)
+
+    def test_remove_filter_does_not_crash_without_filter_rows(self):
+        SocketFilter.remove_filter(FakeSocket())
+
     @pytest.mark.parametrize(
         "field,value,expected",
         (
@@ -149,6 +220,8 @@ class TestFilterHandler:
             ("/uri", ["same", "same"], [("/uri", "same")]),
             ("/group", ["v1", "v2"], [("/group", "v1"), ("/group", "v2")]),
             ("/group", ["same", "same"], [("/group", "same")]),
+            # Unhashable values
+            ("/id", {"not": "valid"}, []),
             # Mapping
             ("/uri", "http://example.com", [("/uri", "httpx://example.com")]),
             # Ignored
@@ -209,6 +282,13 @@ class TestFilterHandler:
         ms = diff.seconds * 1000 + diff.microseconds / 1000
         print(ms, "ms")
 
+    def group_filter(self, groupid):
+        return {
+            "match_policy": "include_any",
+            "actions": {},
+            "clauses": [{"field": "/group", "operator": "equals", "value": groupid}],
+        }
+
     def get_randomized_filter(self):  # pragma: no cover
         return {
             "match_policy": "include_any",
@@ -246,6 +326,10 @@ class TestFilterHandler:
             ],
         }
 
+    @pytest.fixture(autouse=True)
+    def with_empty_index(self):
+        SocketFilter._index.clear()  # pylint:disable=protected-access
+
     @pytest.fixture
     def storage(self, patch):
         return patch("h.streamer.filter.storage")
@@ -33,7 +33,7 @@ class TestHandleAnnotationEventSpeed:  # pragma: no cover
         )
         diff = datetime.utcnow() - start
 
-        assert socket.send_json.count == reps
+        assert socket.send_prepared.count == reps
 
         millis = diff.seconds * 1000 + diff.microseconds / 1000
         print(
@@ -95,6 +95,6 @@ class TestHandleAnnotationEventSpeed:  # pragma: no cover
             fake_send.count += 1
 
         fake_send.count = 0
-        socket.send_json = fake_send
+        socket.send_prepared = fake_send
 
         return socket
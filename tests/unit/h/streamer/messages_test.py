@@ -1,3 +1,5 @@
+import json
+from contextlib import contextmanager
 from unittest import mock
 from unittest.mock import Mock, sentinel
 
@@ -6,8 +8,8 @@ from gevent.queue import Queue
 from h_matchers import Any
 from pyramid.request import Request
 
-from h.security import Permission
 from h.streamer import messages
+from h.streamer.websocket import PreparedMessage
 
 
 class TestProcessMessages:
@@ -33,6 +35,13 @@ class TestProcessMessages:
         assert result.topic == "routing_key"  # Set by _handler fixture
         assert result.payload == {"foo": "bar"}
 
+    def test_it_records_when_the_message_was_queued(
+        self, _handler, work_queue, perf_counter
+    ):
+        _handler({"foo": "bar"})
+
+        assert work_queue.get_nowait().queued_at == perf_counter.return_value
+
     def test_it_handles_a_full_queue(self, _handler, work_queue):
         work_queue.put(messages.Message(topic="queue_is_full", payload={}))
 
@@ -58,6 +67,10 @@ class TestProcessMessages:
     def realtime(self, patch):
         return patch("h.streamer.messages.realtime")
 
+    @pytest.fixture
+    def perf_counter(self, patch):
+        return patch("h.streamer.messages.perf_counter")
+
     @pytest.fixture
     def work_queue(self):
         return Queue(maxsize=1)
@@ -102,6 +115,197 @@ class TestHandleMessage:
         return patch("h.streamer.websocket.WebSocket")
 
 
+class TestHandleMessages:
+    def test_it_calls_handlers_with_runs_of_messages_for_the_same_topic(
+        self, websocket, registry
+    ):
+        foo_handler, bar_handler = Mock(return_value=None), Mock(return_value=None)
+        websocket.instances = [sentinel.socket_1, sentinel.socket_2]
+
+        messages.handle_messages(
+            [
+                messages.Message(topic="foo", payload=sentinel.foo_1),
+                messages.Message(topic="foo", payload=sentinel.foo_2),
+                messages.Message(topic="bar", payload=sentinel.bar),
+                messages.Message(topic="foo", payload=sentinel.foo_3),
+            ],
+            registry,
+            sentinel.db_session,
+            batch_topic_handlers={"foo": foo_handler, "bar": bar_handler},
+        )
+
+        request = Any.object.of_type(Request).with_attrs({"registry": registry})
+        assert foo_handler.call_args_list == [
+            mock.call(
+                [sentinel.foo_1, sentinel.foo_2],
+                websocket.instances,
+                request,
+                sentinel.db_session,
+            ),
+            mock.call(
+                [sentinel.foo_3], websocket.instances, request, sentinel.db_session
+            ),
+        ]
+        bar_handler.assert_called_once_with(
+            [sentinel.bar], websocket.instances, request, sentinel.db_session
+        )
+
+    def test_it_raises_RuntimeError_for_bad_topics(self, registry):
+        with pytest.raises(RuntimeError):
+            messages.handle_messages(
+                [messages.Message(topic="unknown", payload={})],
+                registry,
+                session=sentinel.db_session,
+                batch_topic_handlers={"known": sentinel.handler},
+            )
+
+    @pytest.fixture
+    def registry(self, pyramid_request):
+        return pyramid_request.registry
+
+    @pytest.fixture
+    def websocket(self, patch):
+        return patch("h.streamer.websocket.WebSocket")
+
+
+@pytest.mark.usefixtures("annotation_json_service", "nipsa_service")
+class TestHandleAnnotationEvents:
+    def test_it_loads_the_annotations_together(
+        self, handle_annotation_events, annotation_read_service, annotations
+    ):
+        handle_annotation_events(
+            [self.message(annotation) for annotation in annotations]
+        )
+
+        annotation_read_service.get_annotations_by_id.assert_called_once_with(
+            Any.list.containing([annotation.id for annotation in annotations]).only()
+        )
+
+    def test_it_expands_the_uris_together(
+        self, handle_annotation_events, annotations, storage, db_session
+    ):
+        handle_annotation_events(
+            [self.message(annotation) for annotation in annotations]
+        )
+
+        storage.expand_uris.assert_called_once_with(
+            db_session,
+            {"http://example.com/1", "http://example.com/2"},
+            normalized=True,
+        )
+
+    def test_it_notifies_sockets_of_each_event(
+        self, handle_annotation_events, annotations, socket, SocketFilter
+    ):
+        handle_annotation_events(
+            [self.message(annotation) for annotation in annotations]
+        )
+
+        assert SocketFilter.matching.call_args_list == [
+            mock.call(
+                [socket],
+                annotation,
+                Any(),
+                expanded_uris=[f"expanded {annotation.target_uri}"],
+            )
+            for annotation in annotations
+        ]
+        assert socket.send_prepared.call_count == len(annotations)
+
+    def test_it_coalesces_repeated_events_for_the_same_annotation(
+        self, handle_annotation_events, annotations, socket
+    ):
+        annotation, other_annotation = annotations[:2]
+
+        handle_annotation_events(
+            [
+                self.message(annotation, "create"),
+                self.message(other_annotation, "update"),
+                self.message(annotation, "update", src_client_id="last"),
+                self.message(annotation, "delete"),
+            ]
+        )
+
+        sent = [
+            json.loads(call.args[0].data)
+            for call in socket.send_prepared.call_args_list
+        ]
+        assert [event["options"]["action"] for event in sent] == [
+            "update",
+            "update",
+            "delete",
+        ]
+        assert sent[1]["payload"] == [{"id": annotation.id}]
+
+    def test_it_skips_missing_annotations(self, handle_annotation_events, socket, log):
+        handle_annotation_events(
+            [{"annotation_id": "MISSING", "action": "create", "src_client_id": "1"}]
+        )
+
+        log.warning.assert_called_once_with(Any.string(), "MISSING")
+        socket.send_prepared.assert_not_called()
+
+    def message(self, annotation, action="create", src_client_id="source_socket"):
+        return {
+            "annotation_id": annotation.id,
+            "action": action,
+            "src_client_id": src_client_id,
+        }
+
+    @pytest.fixture
+    def handle_annotation_events(self, socket, pyramid_request, db_session):
+        def handle_annotation_events(messages_):
+            return messages.handle_annotation_events(
+                messages_, [socket], pyramid_request, db_session
+            )
+
+        return handle_annotation_events
+
+    @pytest.fixture
+    def annotations(self):
+        return [
+            Mock(id=f"ANNOTATION_{i}", target_uri=f"http://example.com/{i % 2 + 1}")
+            for i in range(3)
+        ]
+
+    @pytest.fixture
+    def annotation_json_service(self, annotation_json_service):
+        annotation_json_service.present.side_effect = lambda annotation: {
+            "id": annotation.id
+        }
+        return annotation_json_service
+
+    @pytest.fixture(autouse=True)
+    def annotation_read_service(self, annotation_read_service, annotations):
+        annotation_read_service.get_annotations_by_id.return_value = annotations
+        return annotation_read_service
+
+    @pytest.fixture
+    def socket(self, socket):
+        socket.permits_realtime_updates.return_value = True
+        return socket
+
+    @pytest.fixture(autouse=True)
+    def SocketFilter(self, patch):
+        SocketFilter = patch("h.streamer.messages.SocketFilter")
+        SocketFilter.matching.side_effect = (
+            lambda sockets, annotation, db_session, **kwargs: iter(sockets)
+        )
+        return SocketFilter
+
+    @pytest.fixture(autouse=True)
+    def storage(self, patch):
+        storage = patch("h.streamer.messages.storage")
+        storage.expand_uris.side_effect = lambda _session, uris, normalized: {
+            uri: [f"expanded {uri}"] for uri in uris
+        }
+        return storage
+
+    @pytest.fixture
+    def log(self, patch):
+        return patch("h.streamer.messages.log")
+
+
 @pytest.mark.usefixtures(
     "annotation_json_service", "annotation_read_service", "nipsa_service"
 )
@@ -125,7 +329,7 @@ class TestHandleAnnotationEvent:
         annotation = annotation_read_service.get_annotation_by_id.return_value
 
         SocketFilter.matching.assert_called_once_with(
-            [socket], annotation, sentinel.session
+            [socket], annotation, sentinel.session, expanded_uris=None
         )
 
         annotation_json_service.present.assert_called_once_with(annotation)
@@ -152,12 +356,78 @@ class TestHandleAnnotationEvent:
         else:
             expected_payload = annotation_json_service.present.return_value
 
-        socket.send_json.assert_called_once_with(
-            {
-                "payload": [expected_payload],
-                "type": "annotation-notification",
-                "options": {"action": action},
-            }
+        socket.send_prepared.assert_called_once_with(Any.instance_of(PreparedMessage))
+        assert json.loads(socket.send_prepared.call_args[0][0].data) == {
+            "payload": [expected_payload],
+            "type": "annotation-notification",
+            "options": {"action": action},
+        }
+
+    def test_it_serializes_the_notification_once(
+        self, handle_annotation_event, socket, PreparedMessage
+    ):
+        handle_annotation_event(sockets=[socket, socket])
+
+        PreparedMessage.from_json.assert_called_once()
+        assert (
+            socket.send_prepared.call_args_list
+            == [mock.call(PreparedMessage.from_json.return_value)] * 2
+        )
+
+    def test_it_records_metrics(self, handle_annotation_event, socket, metrics):
+        handle_annotation_event(sockets=[socket, socket])
+
+        assert metrics.timed.call_args_list == [
+            mock.call("matching_seconds"),
+            mock.call("send_seconds"),
+        ]
+        metrics.observe.assert_called_once_with(
+            "sockets_matched", 2, buckets=metrics.COUNT_BUCKETS
+        )
+
+    def test_it_times_matching_and_sending_separately(
+        self, handle_annotation_event, socket, SocketFilter, metrics
+    ):
+        events = []
+
+        @contextmanager
+        def timed(name):
+            events.append(f"start {name}")
+            yield
+            events.append(f"end {name}")
+
+        def matching(sockets, *_args, **_kwargs):
+            for socket in sockets:
+                events.append("match")
+                yield socket
+
+        metrics.timed.side_effect = timed
+        SocketFilter.matching.side_effect = matching
+        socket.send_prepared.side_effect = lambda _reply: events.append("send")
+
+        handle_annotation_event(sockets=[socket, socket])
+
+        assert events == [
+            "start matching_seconds",
+            "match",
+            "match",
+            "end matching_seconds",
+            "start send_seconds",
+            "send",
+            "send",
+            "end send_seconds",
+        ]
+
+    def test_it_records_when_no_sockets_match(
+        self, handle_annotation_event, socket, SocketFilter, metrics
+    ):
+        SocketFilter.matching.side_effect = None
+        SocketFilter.matching.return_value = iter(())
+
+        handle_annotation_event(sockets=[socket])
+
+        metrics.observe.assert_called_once_with(
+            "sockets_matched", 0, buckets=metrics.COUNT_BUCKETS
         )
 
     def test_no_send_for_sender_socket(self, handle_annotation_event, socket, message):
@@ -165,7 +435,7 @@ class TestHandleAnnotationEvent:
 
         handle_annotation_event(message=message, sockets=[socket])
 
-        socket.send_json.assert_not_called()
+        socket.send_prepared.assert_not_called()
 
     def test_no_send_if_filter_does_not_match(
         self, handle_annotation_event, socket, SocketFilter
@@ -174,7 +444,7 @@ class TestHandleAnnotationEvent:
         SocketFilter.matching.return_value = iter(())
         handle_annotation_event(sockets=[socket])
 
-        socket.send_json.assert_not_called()
+        socket.send_prepared.assert_not_called()
 
     @pytest.mark.parametrize("user_is_nipsaed", (True, False))
     def test_nipsaed_content_visibility(
@@ -193,32 +463,29 @@ class TestHandleAnnotationEvent:
         )
         handle_annotation_event(sockets=[socket])
 
-        assert bool(socket.send_json.call_count) == user_is_nipsaed
+        assert bool(socket.send_prepared.call_count) == user_is_nipsaed
 
     @pytest.mark.parametrize("can_see", (True, False))
-    def test_visibility_is_based_on_identity(
+    def test_visibility_is_based_on_the_sockets_permissions(
         self,
         handle_annotation_event,
         can_see,
         AnnotationContext,
-        identity_permits,
         annotation_read_service,
         socket,
     ):
-        identity_permits.return_value = can_see
+        socket.permits_realtime_updates.return_value = can_see
 
         handle_annotation_event(sockets=[socket])
 
         AnnotationContext.assert_called_once_with(
             annotation_read_service.get_annotation_by_id.return_value
         )
-        identity_permits.assert_called_once_with(
-            socket.identity,
-            AnnotationContext.return_value,
-            Permission.Annotation.READ_REALTIME_UPDATES,
+        socket.permits_realtime_updates.assert_called_once_with(
+            AnnotationContext.return_value
         )
 
-        assert bool(socket.send_json.call_count) == can_see
+        assert bool(socket.send_prepared.call_count) == can_see
 
     @pytest.fixture
     def handle_annotation_event(self, message, socket, pyramid_request, session):
@@ -247,38 +514,72 @@ class TestHandleAnnotationEvent:
 
     @pytest.fixture
     def message(self, annotation_read_service):
+        annotation = annotation_read_service.get_annotation_by_id.return_value
+        annotation.id = "ANNOTATION_ID"
+
         return {
             # This is a bit backward from how things really work, but it
             # ensures the id we look up gives us an annotation that matches
-            "annotation_id": annotation_read_service.return_value.id,
+            "annotation_id": annotation.id,
             "action": "update",
             "src_client_id": "source_socket",
         }
 
+    @pytest.fixture
+    def annotation_json_service(self, annotation_json_service):
+        annotation_json_service.present.return_value = {"id": "ANNOTATION_ID"}
+        return annotation_json_service
+
+    @pytest.fixture
+    def PreparedMessage(self, patch):
+        return patch("h.streamer.messages.websocket.PreparedMessage")
+
+    @pytest.fixture
+    def metrics(self, patch):
+        return patch("h.streamer.messages.metrics")
+
     @pytest.fixture
     def AnnotationContext(self, patch):
         return patch("h.streamer.messages.AnnotationContext")
 
-    @pytest.fixture(autouse=True)
-    def identity_permits(self, patch):
-        identity_permits = patch("h.streamer.messages.identity_permits")
-        identity_permits.return_value = True
-        return identity_permits
+    @pytest.fixture
+    def socket(self, socket):
+        socket.permits_realtime_updates.return_value = True
+        return socket
 
     @pytest.fixture(autouse=True)
     def SocketFilter(self, patch):
         SocketFilter = patch("h.streamer.messages.SocketFilter")
         SocketFilter.matching.side_effect = (
-            lambda sockets, annotation, db_session: iter(sockets)
+            lambda sockets, annotation, db_session, **kwargs: iter(sockets)
         )
         return SocketFilter
 
 
+class TestHandleUserEvents:
+    def test_it_handles_each_event(self, handle_user_event):
+        messages.handle_user_events(
+            [sentinel.message_1, sentinel.message_2],
+            sentinel.sockets,
+            sentinel.request,
+            sentinel.session,
+        )
+
+        assert handle_user_event.call_args_list == [
+            mock.call(message, sentinel.sockets, sentinel.request, sentinel.session)
+            for message in (sentinel.message_1, sentinel.message_2)
+        ]
+
+    @pytest.fixture
+    def handle_user_event(self, patch):
+        return patch("h.streamer.messages.handle_user_event")
+
+
 class TestHandleUserEvent:
     def test_sends_session_change_when_joining_or_leaving_group(self, socket, message):
         message["userid"] = socket.identity.user.userid
 
-        messages.handle_user_event(message, [socket, socket], None, None)
+        messages.handle_user_event(message, [socket, socket], None, sentinel.db_session)
 
         reply = {
             "type": "session-change",
@@ -299,6 +600,16 @@ class TestHandleUserEvent:
         messages.handle_user_event(message, [socket], None, None)
 
         socket.send_json.assert_not_called()
+        socket.refresh_identity.assert_not_called()
+
+    def test_it_refreshes_the_identity_of_the_event_users_sockets(
+        self, socket, message
+    ):
+        message["userid"] = socket.identity.user.userid
+
+        messages.handle_user_event(message, [socket], None, sentinel.db_session)
+
+        socket.refresh_identity.assert_called_once_with(sentinel.db_session)
 
     @pytest.fixture
     def message(self):
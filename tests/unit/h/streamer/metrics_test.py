@@ -1,3 +1,5 @@
+from collections import Counter
+from unittest import mock
 from unittest.mock import create_autospec
 
 import pytest
@@ -6,6 +8,7 @@ from gevent.queue import Queue
 from h_matchers import Any
 
 from h.security import Identity
+from h.streamer import metrics
 from h.streamer.metrics import websocket_metrics
 from h.streamer.websocket import WebSocket
 
@@ -34,6 +37,23 @@ class TestWebsocketMetrics:
             [("Custom/WebSocket/WorkQueueSize", size)]
         )
 
+    def test_it_records_send_buffer_metrics(self, generate_metrics, sockets, WebSocket):
+        for length, socket in enumerate(sockets):
+            socket.send_buffer_length = length
+        WebSocket.send_buffer_counters = Counter(dropped=5, disconnected=2)
+
+        metrics = generate_metrics()
+
+        assert list(metrics) == Any.list.containing(
+            [
+                ("Custom/WebSocket/SendBuffer/Queued", 3),
+                ("Custom/WebSocket/SendBuffer/Dropped", 5),
+                ("Custom/WebSocket/SendBuffer/Disconnected", 2),
+            ]
+        )
+        # The counters are reset once they have been reported
+        assert not WebSocket.send_buffer_counters
+
     def test_it_records_alive_metric(self, generate_metrics):
         metrics = generate_metrics()
 
@@ -66,6 +86,7 @@ class TestWebsocketMetrics:
         sockets = [create_autospec(WebSocket, instance=True) for _ in range(3)]
         for socket in sockets:
             socket.identity = None
+            socket.send_buffer_length = 0
 
         return sockets
 
@@ -73,6 +94,7 @@ class TestWebsocketMetrics:
     def WebSocket(self, patch, sockets):
         WebSocket = patch("h.streamer.metrics.WebSocket")
         WebSocket.instances = sockets
+        WebSocket.send_buffer_counters = Counter()
 
         return WebSocket
 
@@ -88,3 +110,37 @@ class TestWebsocketMetrics:
         WSGIServer.instances = [server_instance]
 
         return server_instance
+
+
+class TestObserve:
+    def test_it_creates_histograms(self):
+        metrics.observe("new", 3, buckets=metrics.COUNT_BUCKETS)
+
+        histogram = metrics.HISTOGRAMS["new"]
+        assert histogram.buckets == metrics.COUNT_BUCKETS
+        assert histogram.count == 1
+
+    def test_it_adds_to_existing_histograms(self):
+        metrics.observe("existing", 0.1)
+        metrics.observe("existing", 0.2)
+
+        histogram = metrics.HISTOGRAMS["existing"]
+        assert histogram.buckets == metrics.DURATION_BUCKETS
+        assert histogram.count == 2
+
+    def test_timed(self, perf_counter):
+        perf_counter.side_effect = [1.0, 1.5]
+
+        with metrics.timed("timed"):
+            pass
+
+        assert metrics.HISTOGRAMS["timed"].sum == 0.5
+
+    @pytest.fixture(autouse=True)
+    def histograms(self):
+        with mock.patch.dict(metrics.HISTOGRAMS, clear=True):
+            yield
+
+    @pytest.fixture
+    def perf_counter(self, patch):
+        return patch("h.streamer.metrics.perf_counter")
@@ -1,9 +1,10 @@
 from unittest import mock
 
 import pytest
+from gevent.queue import Queue
 
 from h.streamer import messages, streamer, websocket
-from h.streamer.streamer import TOPIC_HANDLERS, UnknownMessageType
+from h.streamer.streamer import BATCH_TOPIC_HANDLERS, TOPIC_HANDLERS, UnknownMessageType
 
 
 class TestProcessWorkQueue:
@@ -47,6 +48,100 @@ class TestProcessWorkQueue:
         assert context_manager.__enter__.call_count == len(messages)
         assert context_manager.__exit__.call_count == len(messages)
 
+    def test_it_handles_waiting_realtime_messages_in_batches(
+        self, process_work_queue, registry, session, db, messages_handle_messages
+    ):
+        registry.settings["h.streamer.batch_size"] = 2
+        realtime_messages = [messages.Message(topic="foo", payload=i) for i in range(3)]
+
+        process_work_queue(queue=self.gevent_queue(realtime_messages))
+
+        assert messages_handle_messages.call_args_list == [
+            mock.call(
+                realtime_messages[:2],
+                registry,
+                session,
+                batch_topic_handlers=BATCH_TOPIC_HANDLERS,
+            ),
+            mock.call(
+                realtime_messages[2:],
+                registry,
+                session,
+                batch_topic_handlers=BATCH_TOPIC_HANDLERS,
+            ),
+        ]
+        context_manager = db.read_only_transaction.return_value
+        assert context_manager.__enter__.call_count == 2
+
+    def test_batches_stop_at_websocket_messages(
+        self,
+        process_work_queue,
+        registry,
+        message,
+        ws_message,
+        session,
+        messages_handle_messages,
+        websocket_handle_message,
+    ):
+        registry.settings["h.streamer.batch_size"] = 10
+
+        process_work_queue(queue=self.gevent_queue([message, ws_message, message]))
+
+        assert (
+            messages_handle_messages.call_args_list
+            == [
+                mock.call(
+                    [message],
+                    registry,
+                    session,
+                    batch_topic_handlers=BATCH_TOPIC_HANDLERS,
+                )
+            ]
+            * 2
+        )
+        websocket_handle_message.assert_called_once_with(ws_message, session)
+
+    def test_it_records_metrics(
+        self,
+        process_work_queue,
+        ws_message,
+        db,
+        session,
+        metrics,
+        perf_counter,
+        messages_handle_message,
+    ):
+        message = messages.Message(topic="foo", payload="bar", queued_at=1.0)
+        perf_counter.return_value = 1.5
+
+        def handle_message(*_args, **_kwargs):
+            db.QueryTimer.return_value.elapsed += 0.25
+
+        messages_handle_message.side_effect = handle_message
+
+        process_work_queue(queue=[message, ws_message])
+
+        db.QueryTimer.assert_called_once_with(session.get_bind.return_value)
+        assert metrics.observe.call_args_list == [
+            mock.call("queue_wait_seconds", 0.5),
+            mock.call("db_seconds", 0.25),
+            # The websocket message doesn't have a queued time
+            mock.call("db_seconds", 0),
+        ]
+        metrics.timed.assert_called_once_with("handler_seconds.websocket")
+
+    def test_batches_stop_when_the_queue_is_empty(self, message):
+        # pylint:disable=protected-access
+        assert streamer._drain_batch(Queue(), message, batch_size=10) == [message]
+
+    def gevent_queue(self, items):
+        queue = Queue()
+        for item in items:
+            queue.put(item)
+        # Stops iteration over the queue
+        queue.put(StopIteration)
+        return queue
+
     @pytest.fixture
     def process_work_queue(self, registry, message):
         def process_work_queue(queue=None):
@@ -68,14 +163,25 @@ class TestProcessWorkQueue:
 
     @pytest.fixture
     def session(self):
-        return mock.Mock(spec_set=["close", "commit", "execute", "rollback"])
+        return mock.Mock(
+            spec_set=["close", "commit", "execute", "get_bind", "rollback"]
+        )
 
     @pytest.fixture(autouse=True)
     def db(self, patch, session):
         db = patch("h.streamer.streamer.db")
         db.get_session.return_value = session
+        db.QueryTimer.return_value.elapsed = 0
         return db
 
+    @pytest.fixture
+    def perf_counter(self, patch):
+        return patch("h.streamer.streamer.perf_counter")
+
+    @pytest.fixture(autouse=True)
+    def metrics(self, patch):
+        return patch("h.streamer.streamer.metrics")
+
     @pytest.fixture(autouse=True)
     def websocket_handle_message(self, patch):
         return patch("h.streamer.websocket.handle_message")
@@ -83,3 +189,7 @@ class TestProcessWorkQueue:
     @pytest.fixture(autouse=True)
     def messages_handle_message(self, patch):
         return patch("h.streamer.messages.handle_message")
+
+    @pytest.fixture(autouse=True)
+    def messages_handle_messages(self, patch):
+        return patch("h.streamer.messages.handle_messages")
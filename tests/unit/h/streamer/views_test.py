@@ -1,7 +1,9 @@
 import pytest
+from pyramid.httpexceptions import HTTPNotFound
 
 from h.security import Identity
 from h.streamer import streamer, views
+from h.streamer.metrics import Histogram
 
 
 class TestWebsocketView:
@@ -19,6 +21,19 @@ class TestWebsocketView:
             pyramid_request.environ["h.ws.streamer_work_queue"] == streamer.WORK_QUEUE
         )
 
+    def test_it_adds_send_buffer_settings_to_environ(self, pyramid_request):
+        pyramid_request.registry.settings.update(
+            {
+                "h.streamer.send_buffer_size": 100,
+                "h.streamer.slow_consumer_policy": "disconnect",
+            }
+        )
+
+        views.websocket_view(pyramid_request)
+
+        assert pyramid_request.environ["h.ws.send_buffer_size"] == 100
+        assert pyramid_request.environ["h.ws.slow_consumer_policy"] == "disconnect"
+
     def test_debug_mode_is_disabled_by_default(self, pyramid_request):
         views.websocket_view(pyramid_request)
         assert pyramid_request.environ["h.ws.debug"] is False
@@ -33,3 +48,26 @@ class TestWebsocketView:
         pyramid_request.get_response = lambda _: None
 
         return pyramid_request
+
+
+class TestMetricsView:
+    def test_it(self, pyramid_request, metrics):
+        pyramid_request.registry.settings["h.streamer.debug_metrics"] = True
+        histogram = metrics.Histogram([1])
+        histogram.observe(0.5)
+        metrics.HISTOGRAMS = {"b": histogram, "a": histogram}
+
+        result = views.metrics_view(pyramid_request)
+
+        assert result == {"a": histogram.asdict(), "b": histogram.asdict()}
+        assert list(result) == ["a", "b"]
+
+    def test_it_is_not_found_unless_enabled(self, pyramid_request):
+        with pytest.raises(HTTPNotFound):
+            views.metrics_view(pyramid_request)
+
+    @pytest.fixture
+    def metrics(self, patch):
+        metrics = patch("h.streamer.views.metrics")
+        metrics.Histogram = Histogram
+        return metrics
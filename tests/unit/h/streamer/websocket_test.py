@@ -2,13 +2,16 @@ import json
 from collections import namedtuple
 from unittest import mock
 
+import gevent
 import pytest
 from gevent.queue import Queue
 from h_matchers import Any
 from jsonschema import ValidationError
 
 from h.security import Identity
+from h.security.identity import LongLivedGroup
 from h.streamer import websocket
+from h.traversal import AnnotationContext
 
 FakeMessage = namedtuple("FakeMessage", ["data"])
 
@@ -57,6 +60,15 @@ class TestMessage:
         assert not socket.send_json.called
 
 
+class TestPreparedMessage:
+    def test_from_json(self):
+        message = websocket.PreparedMessage.from_json({"foo": "bar"})
+
+        assert message.data == '{"foo": "bar"}'
+        # An unmasked, final text frame with a 14 byte payload
+        assert message.frame == b"\x81\x0e" + b'{"foo": "bar"}'
+
+
 class TestWebSocket:
     def test_stores_instance_list(self, fake_environ):
         clients = [
@@ -80,6 +92,11 @@ class TestWebSocket:
         # A second closure (however unusual) should not raise
         client1.closed(1000)
 
+    def test_removes_socket_filter_when_closed(self, client, SocketFilter):
+        client.closed(1000)
+
+        SocketFilter.remove_filter.assert_called_once_with(client)
+
     def test_enqueues_incoming_messages(self, client, queue):
         """Valid messages are pushed onto the queue."""
         message = FakeMessage('{"foo":"bar"}')
@@ -98,6 +115,12 @@ class TestWebSocket:
 
         assert result.socket == client
 
+    def test_enqueued_message_has_queued_time(self, client, queue, perf_counter):
+        client.received_message(FakeMessage('{"foo":"bar"}'))
+        result = queue.get_nowait()
+
+        assert result.queued_at == perf_counter.return_value
+
     def test_enqueued_message_has_parsed_payload(self, client, queue):
         """Valid messages should have a parsed payload."""
         message = FakeMessage('{"foo":"bar"}')
@@ -148,6 +171,157 @@ class TestWebSocket:
 
         assert not fake_socket_send.called
 
+    def test_socket_send_prepared(self, client):
+        message = websocket.PreparedMessage.from_json({"foo": "bar"})
+
+        client.send_prepared(message)
+
+        client.sock.sendall.assert_called_once_with(message.frame)
+
+    def test_socket_send_prepared_skips_when_terminated(
+        self, client, fake_socket_terminated
+    ):
+        fake_socket_terminated.return_value = True
+
+        client.send_prepared(websocket.PreparedMessage.from_json({"foo": "bar"}))
+
+        client.sock.sendall.assert_not_called()
+
+    def test_buffered_sends(self, buffered_client):
+        messages = [websocket.PreparedMessage.from_json({"n": n}) for n in range(2)]
+
+        buffered_client.send_prepared(messages[0])
+        buffered_client.send_json({"n": 1})
+        # Nothing is written until the sender greenlet runs
+        assert buffered_client.send_buffer_length == 2
+        buffered_client.sock.sendall.assert_not_called()
+        gevent.sleep(0)
+
+        assert buffered_client.sock.sendall.call_args_list == [
+            mock.call(message.frame) for message in messages
+        ]
+        assert not buffered_client.send_buffer_length
+
+    def test_buffered_sends_drop_the_oldest_message_when_full(
+        self, buffered_client, send_buffer_counters
+    ):
+        messages = [websocket.PreparedMessage.from_json({"n": n}) for n in range(3)]
+
+        for message in messages:
+            buffered_client.send_prepared(message)
+        gevent.sleep(0)
+
+        assert buffered_client.sock.sendall.call_args_list == [
+            mock.call(message.frame) for message in messages[1:]
+        ]
+        assert send_buffer_counters == {"dropped": 1}
+
+    def test_buffered_sends_disconnect_when_full(
+        self, fake_environ, send_buffer_counters
+    ):
+        fake_environ["h.ws.send_buffer_size"] = 2
+        fake_environ["h.ws.slow_consumer_policy"] = websocket.SLOW_CONSUMER_DISCONNECT
+        sock = mock.Mock(spec_set=["sendall", "shutdown", "close"])
+        buffered_client = websocket.WebSocket(sock, environ=fake_environ)
+
+        for n in range(3):
+            buffered_client.send_json({"n": n})
+        gevent.sleep(0)
+
+        sock.sendall.assert_not_called()
+        assert buffered_client.sock is None
+        assert not buffered_client.send_buffer_length
+        assert send_buffer_counters == {"disconnected": 1}
+
+        # Sending after being disconnected does nothing
+        buffered_client.send_json({"n": 3})
+        assert not buffered_client.send_buffer_length
+
+    @pytest.mark.parametrize("debug", (True, False))
+    def test_buffered_sends_stop_on_errors(self, buffered_client, debug):
+        buffered_client.debug = debug
+        buffered_client.sock.sendall.side_effect = OSError
+
+        for n in range(2):
+            buffered_client.send_json({"n": n})
+        gevent.sleep(0)
+
+        buffered_client.sock.sendall.assert_called_once()
+        assert not buffered_client.send_buffer_length
+
+    @pytest.mark.parametrize("shared", (True, False))
+    def test_permits_realtime_updates(self, client, factories, shared):
+        user = factories.User()
+        client.identity = Identity.from_models(user=user)
+        annotation = factories.Annotation(userid=user.userid, shared=shared)
+
+        assert client.permits_realtime_updates(AnnotationContext(annotation))
+
+    def test_permits_realtime_updates_denies_private_groups(self, client, factories):
+        client.identity = Identity.from_models(user=factories.User())
+        annotation = factories.Annotation(shared=True, group=factories.Group())
+
+        assert not client.permits_realtime_updates(AnnotationContext(annotation))
+
+    @pytest.mark.parametrize("permitted", (True, False))
+    def test_permits_realtime_updates_caches_by_group(
+        self, client, factories, identity_permits, permitted
+    ):
+        identity_permits.return_value = permitted
+        group = factories.Group()
+        annotations = factories.Annotation.create_batch(2, shared=True, group=group)
+
+        for annotation in annotations:
+            assert (
+                client.permits_realtime_updates(AnnotationContext(annotation))
+                == permitted
+            )
+
+        identity_permits.assert_called_once()
+
+    def test_permits_realtime_updates_checks_groups_again_once_cached_answers_expire(
+        self, client, factories, identity_permits
+    ):
+        annotation = factories.Annotation(shared=True, group=factories.Group())
+        with mock.patch("h.util.cache.monotonic", return_value=100.0) as monotonic:
+            client.permits_realtime_updates(AnnotationContext(annotation))
+            identity_permits.return_value = False
+
+            monotonic.return_value += websocket.READABLE_GROUPS_TTL
+
+            assert not client.permits_realtime_updates(AnnotationContext(annotation))
+        assert identity_permits.call_count == 2
+
+    def test_refresh_identity_reloads_groups(self, client, factories, db_session):
+        user = factories.User()
+        db_session.flush()
+        client.identity = Identity.from_models(user=user)
+        annotation = factories.Annotation(shared=True, group=factories.Group())
+        assert not client.permits_realtime_updates(AnnotationContext(annotation))
+
+        user.groups.append(annotation.group)
+        db_session.flush()
+        client.refresh_identity(db_session)
+
+        assert client.identity.user.groups == [
+            LongLivedGroup.from_model(annotation.group)
+        ]
+        assert client.permits_realtime_updates(AnnotationContext(annotation))
+
+    def test_refresh_identity_without_a_user(self, client, db_session):
+        client.identity = None
+
+        client.refresh_identity(db_session)
+
+    def test_refresh_identity_with_a_deleted_user(self, client, factories, db_session):
+        user = factories.User.build(id=999999, groups=[factories.Group.build()])
+        client.identity = Identity.from_models(user=user)
+        groups = client.identity.user.groups
+
+        client.refresh_identity(db_session)
+
+        assert client.identity.user.groups == groups
+
     def test_debug_mode(self, fake_environ, log):
         sock = mock.Mock(spec_set=["sendall"])
         fake_environ["h.ws.debug"] = True
@@ -158,9 +332,10 @@ class TestWebSocket:
 
         client.received_message(message)
         client.send_json({"type": "whoyouare", "ok": True, "reply_to": 1})
+        client.send_prepared(websocket.PreparedMessage.from_json({"type": "foo"}))
         client.closed(code=1006, reason="Client went away")
 
-        assert len(log.info.mock_calls) == 3
+        assert len(log.info.mock_calls) == 4
 
     @pytest.fixture(autouse=True)
     def with_no_socket_instances(self):
@@ -173,6 +348,23 @@ class TestWebSocket:
         sock = mock.Mock(spec_set=["sendall"])
         return websocket.WebSocket(sock, environ=fake_environ)
 
+    @pytest.fixture
+    def perf_counter(self, patch):
+        return patch("h.streamer.websocket.perf_counter")
+
+    @pytest.fixture
+    def buffered_client(self, fake_environ):
+        fake_environ["h.ws.send_buffer_size"] = 2
+        sock = mock.Mock(spec_set=["sendall", "shutdown", "close"])
+        return websocket.WebSocket(sock, environ=fake_environ)
+
+    @pytest.fixture
+    def send_buffer_counters(self):
+        counters = websocket.WebSocket.send_buffer_counters
+        counters.clear()
+        yield counters
+        counters.clear()
+
     @pytest.fixture
     def queue(self):
         return Queue()
@@ -198,6 +390,16 @@ class TestWebSocket:
     def fake_socket_terminated(self, patch):
         return patch("h.streamer.websocket.WebSocket.terminated")
 
+    @pytest.fixture
+    def SocketFilter(self, patch):
+        return patch("h.streamer.websocket.SocketFilter")
+
+    @pytest.fixture
+    def identity_permits(self, patch):
+        identity_permits = patch("h.streamer.websocket.identity_permits")
+        identity_permits.return_value = True
+        return identity_permits
+
 
 @pytest.mark.usefixtures("handlers")
 class TestHandleMessage:
@@ -7,6 +7,8 @@ from transaction import TransactionManager
 from h import __version__, subscribers
 from h.events import AnnotationEvent
 from h.exceptions import RealtimeMessageQueueError
+from h.search import cache
+from h.search.cache import COUNT_CACHE, SEARCH_RESULT_CACHE
 
 
 @pytest.mark.usefixtures("routes")
@@ -107,6 +109,64 @@ class TestPublishAnnotationEvent:
         return event
 
 
+class TestInvalidateSearchResults:
+    def test_it_invalidates_the_annotations_uri(
+        self, event, annotation_read_service, factories
+    ):
+        annotation = factories.Annotation.build()
+        annotation_read_service.get_annotation_by_id.return_value = annotation
+        SEARCH_RESULT_CACHE.set(
+            "key", mock.sentinel.result, tags=[annotation.target_uri_normalized]
+        )
+        SEARCH_RESULT_CACHE.set(
+            "other_key", mock.sentinel.other_result, tags=["httpx://example.org"]
+        )
+        COUNT_CACHE.set("key", 1, tags=[annotation.target_uri_normalized])
+
+        subscribers.invalidate_search_results(event)
+
+        annotation_read_service.get_annotation_by_id.assert_called_once_with(
+            event.annotation_id
+        )
+        assert SEARCH_RESULT_CACHE.get("key") is None
+        assert SEARCH_RESULT_CACHE.get("other_key") == mock.sentinel.other_result
+        assert COUNT_CACHE.get("key") is None
+
+    def test_it_stops_searches_which_are_running_from_being_cached(
+        self, event, annotation_read_service, factories
+    ):
+        annotation = factories.Annotation.build()
+        annotation_read_service.get_annotation_by_id.return_value = annotation
+        as_of = cache.index_as_of()
+
+        subscribers.invalidate_search_results(event)
+        SEARCH_RESULT_CACHE.set(
+            "key",
+            mock.sentinel.result,
+            tags=[annotation.target_uri_normalized],
+            since=as_of,
+        )
+
+        assert SEARCH_RESULT_CACHE.get("key") is None
+
+    def test_it_does_nothing_if_the_annotation_doesnt_exist(
+        self, event, annotation_read_service
+    ):
+        annotation_read_service.get_annotation_by_id.return_value = None
+        SEARCH_RESULT_CACHE.set(
+            "key", mock.sentinel.result, tags=["httpx://example.com"]
+        )
+
+        subscribers.invalidate_search_results(event)
+
+        assert SEARCH_RESULT_CACHE.get("key") == mock.sentinel.result
+
+    @pytest.fixture
+    def event(self, pyramid_request):
+        pyramid_request.tm = mock.MagicMock()
+        return AnnotationEvent(pyramid_request, "test_annotation_id", "update")
+
+
 @pytest.mark.usefixtures("annotation_read_service")
 class TestSendReplyNotifications:
     def test_it_sends_emails(
@@ -0,0 +1,161 @@
+from unittest import mock
+
+import pytest
+
+from h.util.cache import TTLCache, clear_all
+
+
+class TestTTLCache:
+    def test_get_returns_None_for_missing_keys(self, cache):
+        assert cache.get("missing") is None
+
+    def test_get_returns_cached_values(self, cache):
+        cache.set("key", mock.sentinel.value)
+
+        assert cache.get("key") == mock.sentinel.value
+
+    def test_entries_expire(self, cache, monotonic):
+        cache.set("key", mock.sentinel.value)
+
+        monotonic.return_value += 5
+
+        assert cache.get("key") is None
+        assert not cache
+
+    def test_it_removes_the_least_recently_used_entries(self, cache):
+        cache.set("first", mock.sentinel.first)
+        cache.set("second", mock.sentinel.second)
+        cache.get("first")
+
+        cache.set("third", mock.sentinel.third)
+
+        assert len(cache) == 2
+        assert cache.get("first") == mock.sentinel.first
+        assert cache.get("second") is None
+        assert cache.get("third") == mock.sentinel.third
+
+    def test_set_replaces_existing_entries(self, cache):
+        cache.set("key", mock.sentinel.old, tags=["tag"])
+        cache.set("key", mock.sentinel.new, tags=["other_tag"])
+
+        cache.invalidate_tags("tag")
+
+        assert cache.get("key") == mock.sentinel.new
+
+    @pytest.mark.usefixtures("monotonic")
+    def test_it_uses_the_key_function(self):
+        cache = TTLCache(maxsize=2, ttl=5, key=str.lower)
+        cache.set("KEY", mock.sentinel.value)
+
+        assert cache.get("key") == mock.sentinel.value
+        cache.invalidate("Key")
+        assert cache.get("KEY") is None
+
+    def test_invalidate(self, cache):
+        cache.set("key", mock.sentinel.value)
+        cache.set("other_key", mock.sentinel.other_value)
+
+        cache.invalidate("key", "missing")
+
+        assert cache.get("key") is None
+        assert cache.get("other_key") == mock.sentinel.other_value
+
+    def test_invalidate_tags_after_invalidating_keys(self, cache):
+        cache.set("key", mock.sentinel.value, tags=["tag"])
+        cache.set("other_key", mock.sentinel.other_value, tags=["tag"])
+        cache.invalidate("key")
+
+        cache.invalidate_tags("tag")
+
+        assert not cache
+
+    def test_invalidate_tags(self, cache):
+        cache.set("key", mock.sentinel.value, tags=["tag", "alt_tag"])
+        cache.set("other_key", mock.sentinel.other_value, tags=["other_tag"])
+
+        cache.invalidate_tags("alt_tag", "missing")
+
+        assert cache.get("key") is None
+        assert cache.get("other_key") == mock.sentinel.other_value
+
+    def test_invalidate_tags_removes_entries_for_all_their_tags(self, cache):
+        cache.set("key", mock.sentinel.value, tags=["tag", "alt_tag"])
+        cache.invalidate_tags("tag")
+        cache.set("other_key", mock.sentinel.other_value, tags=["alt_tag"])
+
+        cache.invalidate_tags("tag")
+
+        assert cache.get("other_key") == mock.sentinel.other_value
+
+    def test_it_doesnt_cache_values_looked_up_before_their_tags_were_invalidated(
+        self, cache, monotonic
+    ):
+        since = monotonic.return_value
+        monotonic.return_value += 1
+        cache.invalidate_tags("tag")
+
+        cache.set("key", mock.sentinel.value, tags=["tag"], since=since)
+
+        assert cache.get("key") is None
+
+    def test_it_caches_values_looked_up_after_their_tags_were_invalidated(
+        self, cache, monotonic
+    ):
+        cache.invalidate_tags("tag")
+        monotonic.return_value += 1
+
+        cache.set(
+            "key", mock.sentinel.value, tags=["tag"], since=monotonic.return_value
+        )
+
+        assert cache.get("key") == mock.sentinel.value
+
+    def test_it_caches_values_looked_up_before_other_tags_were_invalidated(
+        self, cache, monotonic
+    ):
+        since = monotonic.return_value
+        monotonic.return_value += 1
+        cache.invalidate_tags("other_tag")
+
+        cache.set("key", mock.sentinel.value, tags=["tag"], since=since)
+
+        assert cache.get("key") == mock.sentinel.value
+
+    def test_it_doesnt_cache_values_looked_up_longer_ago_than_the_ttl(
+        self, cache, monotonic
+    ):
+        since = monotonic.return_value
+        cache.invalidate_tags("tag")
+        monotonic.return_value += 10
+        # Invalidations from longer ago than the TTL are forgotten
+        cache.invalidate_tags("other_tag")
+
+        cache.set("key", mock.sentinel.value, tags=["tag"], since=since)
+
+        assert cache.get("key") is None
+
+    def test_clear(self, cache, monotonic):
+        cache.set("key", mock.sentinel.value, tags=["tag"])
+        since = monotonic.return_value
+        cache.invalidate_tags("tag")
+
+        cache.clear()
+        cache.set("key", mock.sentinel.value, tags=["tag"], since=since)
+
+        assert cache.get("key") == mock.sentinel.value
+
+    def test_clear_all(self, cache):
+        cache.set("key", mock.sentinel.value)
+
+        clear_all()
+
+        assert not cache
+
+    @pytest.fixture
+    def cache(self, monotonic):  # pylint:disable=unused-argument
+        return TTLCache(maxsize=2, ttl=5)
+
+    @pytest.fixture
+    def monotonic(self):
+        with mock.patch("h.util.cache.monotonic", return_value=100.0) as monotonic:
+            yield monotonic
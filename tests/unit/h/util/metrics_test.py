@@ -39,3 +39,17 @@ class TestRecordSearchQueryParams:
 @pytest.fixture
 def newrelic_agent(patch):
     return patch("h.util.metrics.newrelic.agent")
+
+
+class TestHistogram:
+    def test_it(self):
+        histogram = metrics.Histogram([1, 5])
+
+        for value in (0.5, 1, 3, 10, 20):
+            histogram.observe(value)
+
+        assert histogram.asdict() == {
+            "count": 5,
+            "sum": 34.5,
+            "buckets": {"1": 2, "5": 3, "+Inf": 5},
+        }
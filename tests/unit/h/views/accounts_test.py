@@ -783,8 +783,10 @@ class TestEditProfileController:
             }
         }
 
-    def test_post_sets_user_properties(self, form_validating_to, pyramid_request):
-        pyramid_request.user = mock.Mock()
+    def test_post_sets_user_properties(
+        self, form_validating_to, pyramid_request, USER_INFO_CACHE
+    ):
+        pyramid_request.user = mock.Mock(userid="acct:jim@example.com")
         user = pyramid_request.user
 
         ctrl = views.EditProfileController(pyramid_request)
@@ -804,6 +806,11 @@ class TestEditProfileController:
         assert user.orcid == "ORCID ID"
         assert user.uri == "http://foo.org"
         assert user.location == "Paris"
+        USER_INFO_CACHE.invalidate.assert_called_once_with("acct:jim@example.com")
+
+    @pytest.fixture
+    def USER_INFO_CACHE(self, patch):
+        return patch("h.views.accounts.USER_INFO_CACHE")
 
 
 @pytest.mark.usefixtures("authenticated_userid", "developer_token_service")
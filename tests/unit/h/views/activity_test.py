@@ -64,7 +64,16 @@ class TestSearchController:
 
         controller.search()
 
-        paginate.assert_called_once_with(pyramid_request, Any(), page_size=100)
+        paginate.assert_called_once_with(
+            pyramid_request, Any(), page_size=100, cursors=Any()
+        )
+
+    def test_search_passes_the_cursors_to_paginate(self, controller, paginate, query):
+        controller.search()
+
+        assert (
+            paginate.call_args.kwargs["cursors"] == query.execute.return_value.cursors
+        )
 
     def test_search_generates_tag_links(self, controller):
         result = controller.search()
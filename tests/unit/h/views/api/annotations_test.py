@@ -1,3 +1,4 @@
+import json
 from unittest import mock
 
 import pytest
@@ -15,13 +16,48 @@ class TestSearch:
         views.search(pyramid_request)
 
         search = search_lib.Search.return_value
-        search_lib.Search.assert_called_with(pyramid_request, separate_replies=False)
+        search_lib.Search.assert_called_with(
+            pyramid_request,
+            separate_replies=False,
+            combine_replies_search=True,
+            replies_limit=200,
+            replies_search_after=None,
+            cache_results=True,
+        )
 
         expected_params = MultiDict(
             [("sort", "updated"), ("limit", 20), ("order", "desc"), ("offset", 0)]
         )
         search.run.assert_called_once_with(expected_params)
 
+    def test_it_pages_replies(self, pyramid_request, search_lib):
+        pyramid_request.params = NestedMultiDict(
+            MultiDict(
+                {
+                    "_separate_replies": "1",
+                    "_replies_limit": "10",
+                    "_replies_search_after": "2018-01-01",
+                }
+            )
+        )
+
+        views.search(pyramid_request)
+
+        assert search_lib.Search.call_args.kwargs["replies_limit"] == 10
+        assert (
+            search_lib.Search.call_args.kwargs["replies_search_after"] == "2018-01-01"
+        )
+
+    @pytest.mark.parametrize("enabled", (True, False))
+    def test_it_combines_the_replies_search_if_the_feature_is_enabled(
+        self, pyramid_request, search_lib, fake_feature, enabled
+    ):
+        fake_feature.flags["search_combined_replies"] = enabled
+
+        views.search(pyramid_request)
+
+        assert search_lib.Search.call_args.kwargs["combine_replies_search"] == enabled
+
     def test_it_presents_search_results(
         self, pyramid_request, search_run, annotation_json_service
     ):
@@ -61,7 +97,15 @@ class TestSearch:
         self, pyramid_request, search_run, annotation_json_service
     ):
         pyramid_request.params = NestedMultiDict(MultiDict({"_separate_replies": "1"}))
-        search_run.return_value = SearchResult(1, ["row-1"], ["reply-1", "reply-2"], {})
+        search_run.return_value = SearchResult(
+            1,
+            ["row-1"],
+            ["reply-1", "reply-2"],
+            {},
+            5,
+            ["1,row-1"],
+            ["2,reply-1", "1,reply-2"],
+        )
 
         expected = {
             "total": 1,
@@ -71,10 +115,20 @@ class TestSearch:
             "replies": annotation_json_service.present_all_for_user(
                 annotation_ids=["reply-1", "reply-2"], user=pyramid_request.user
             ),
+            "replies_total": 5,
+            "replies_search_after": "1,reply-2",
         }
 
         assert views.search(pyramid_request) == expected
 
+    def test_it_returns_no_replies_cursor_if_there_are_no_replies(
+        self, pyramid_request, search_run
+    ):
+        pyramid_request.params = NestedMultiDict(MultiDict({"_separate_replies": "1"}))
+        search_run.return_value = SearchResult(1, ["row-1"], [], {})
+
+        assert views.search(pyramid_request)["replies_search_after"] is None
+
     @pytest.fixture
     def search_lib(self, patch):
         return patch("h.views.api.annotations.search_lib")
@@ -84,6 +138,195 @@ class TestSearch:
         return search_lib.Search.return_value.run
 
 
+@pytest.mark.usefixtures("annotation_json_service", "search_lib")
+class TestSearchNDJSON:
+    def test_it_streams_the_presented_annotations(
+        self, pyramid_request, search_run, annotation_json_service
+    ):
+        search_run.return_value = SearchResult(2, ["row-1", "row-2"], [], {})
+        annotation_json_service.present_all_for_user.return_value = [
+            {"id": "row-1"},
+            {"id": "row-2"},
+        ]
+
+        response = views.search_ndjson(pyramid_request)
+
+        annotation_json_service.present_all_for_user.assert_called_once_with(
+            annotation_ids=["row-1", "row-2"], user=pyramid_request.user
+        )
+        assert response.content_type == "application/x-ndjson"
+        assert [json.loads(line) for line in response.app_iter] == [
+            {"id": "row-1"},
+            {"id": "row-2"},
+        ]
+
+    def test_it_searches_a_page_at_a_time(self, pyramid_request, search_lib):
+        pyramid_request.params = NestedMultiDict(
+            MultiDict(
+                {
+                    "limit": "5",
+                    "offset": "10",
+                    "search_after": "2018-01-01",
+                    "_separate_replies": "1",
+                    "_replies_search_after": "2018-01-01",
+                }
+            )
+        )
+
+        views.search_ndjson(pyramid_request)
+
+        search_lib.Search.assert_called_once_with(pyramid_request)
+        search_lib.Search.return_value.run.assert_called_once_with(
+            MultiDict(
+                [
+                    ("sort", "updated"),
+                    ("order", "desc"),
+                    ("limit", 3),
+                    ("search_after", "2018-01-01"),
+                ]
+            )
+        )
+
+    def test_it_returns_an_empty_response_if_nothing_matches(self, pyramid_request):
+        response = views.search_ndjson(pyramid_request)
+
+        assert not list(response.app_iter)
+
+    @pytest.mark.parametrize(
+        "order,index,search_afters",
+        (
+            (
+                "desc",
+                [("g", 5), ("f", 4), ("e", 3), ("d", 3), ("c", 3), ("b", 2), ("a", 1)],
+                [None, "3,e", "2,b"],
+            ),
+            (
+                "asc",
+                [("a", 1), ("b", 2), ("c", 3), ("d", 3), ("e", 3), ("f", 4), ("g", 5)],
+                [None, "3,c", "4,f"],
+            ),
+        ),
+    )
+    def test_it_pages_through_all_the_results(
+        self, pyramid_request, search_index, search_run, order, index, search_afters
+    ):
+        pyramid_request.params = NestedMultiDict(MultiDict({"order": order}))
+        # Annotations updated in the same millisecond fall either side of the
+        # page boundaries
+        search_index(order, index)
+
+        response = views.search_ndjson(pyramid_request)
+
+        assert self.ids(response) == [id_ for id_, _ in index]
+        assert [
+            call.args[0].get("search_after") for call in search_run.call_args_list
+        ] == search_afters
+
+    def test_it_pages_through_annotations_all_updated_at_once(
+        self, pyramid_request, search_index, search_run
+    ):
+        index = [("e", 2), ("d", 2), ("c", 2), ("b", 2), ("a", 2)]
+        search_index("desc", index)
+
+        response = views.search_ndjson(pyramid_request)
+
+        assert self.ids(response) == ["e", "d", "c", "b", "a"]
+        assert search_run.call_count == 2
+
+    def test_it_stops_after_a_page_which_isnt_full(
+        self, pyramid_request, search_index, search_run
+    ):
+        search_index("desc", [("c", 3), ("b", 2), ("a", 1)])
+
+        response = views.search_ndjson(pyramid_request)
+
+        assert self.ids(response) == ["c", "b", "a"]
+        # The first page was full so there might have been more
+        assert search_run.call_count == 2
+
+    def test_it_searches_later_pages_in_their_own_transaction(
+        self, pyramid_request, search_index
+    ):
+        search_index("desc", [("d", 4), ("c", 3), ("b", 2), ("a", 1)])
+
+        response = views.search_ndjson(pyramid_request)
+
+        pyramid_request.tm.__enter__.assert_not_called()
+        self.ids(response)
+        pyramid_request.tm.__enter__.assert_called_once()
+        pyramid_request.tm.__exit__.assert_called_once()
+
+    def test_it_adds_the_user_back_to_the_db_session_for_later_pages(
+        self, pyramid_request, search_index, db_session, factories
+    ):
+        pyramid_request.user = factories.User()
+        search_index("desc", [("d", 4), ("c", 3), ("b", 2), ("a", 1)])
+        response = views.search_ndjson(pyramid_request)
+        # The request's session is closed once the view has returned
+        db_session.expunge(pyramid_request.user)
+
+        self.ids(response)
+
+        assert pyramid_request.user in db_session
+
+    @staticmethod
+    def ids(response):
+        return [json.loads(line)["id"] for line in response.app_iter]
+
+    @pytest.fixture
+    def search_index(self, search_run, annotation_json_service):
+        """Fake searching annotations updated at the given milliseconds."""
+
+        def search_index(order, index):
+            def run(params):
+                hits = index
+                if "search_after" in params:
+                    ms, _, id_ = params["search_after"].partition(",")
+                    after = (int(ms), id_)
+                    hits = [
+                        hit
+                        for hit in index
+                        if (
+                            (hit[1], hit[0]) < after
+                            if order == "desc"
+                            else (hit[1], hit[0]) > after
+                        )
+                    ]
+                hits = hits[: params["limit"]]
+                return SearchResult(
+                    len(hits),
+                    [id_ for id_, _ in hits],
+                    [],
+                    {},
+                    cursors=[f"{ms},{id_}" for id_, ms in hits],
+                )
+
+            search_run.side_effect = run
+            annotation_json_service.present_all_for_user.side_effect = (
+                lambda annotation_ids, user: [{"id": id_} for id_ in annotation_ids]
+            )
+
+        return search_index
+
+    @pytest.fixture(autouse=True)
+    def LIMIT_MAX(self, monkeypatch):
+        monkeypatch.setattr(views, "LIMIT_MAX", 3)
+
+    @pytest.fixture
+    def pyramid_request(self, pyramid_request):
+        pyramid_request.tm = mock.MagicMock()
+        return pyramid_request
+
+    @pytest.fixture
+    def search_run(self, search_lib):
+        search_lib.Search.return_value.run.return_value = SearchResult(0, [], [], {})
+        return search_lib.Search.return_value.run
+
+    @pytest.fixture
+    def search_lib(self, patch):
+        return patch("h.views.api.annotations.search_lib")
+
+
 class TestCreate:
     def test_it(
         self,
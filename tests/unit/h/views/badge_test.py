@@ -2,6 +2,7 @@ from datetime import datetime
 from unittest import mock
 
 import pytest
+from h_matchers import Any
 from pyramid import httpexceptions
 from webob.multidict import MultiDict
 
@@ -94,10 +95,13 @@ class TestBadge:
     def test_it_returns_number_from_search(self, badge_request, search_run):
         result = badge_request("http://example.com", annotated=True, blocked=False)
 
-        search_run.assert_called_once_with(
-            MultiDict({"uri": "http://example.com", "limit": 0})
-        )
-        assert result == {"total": search_run.return_value.total}
+        search_run.assert_called_once_with(MultiDict({"uri": "http://example.com"}))
+        assert result == {"total": search_run.return_value}
+
+    def test_it_counts_the_annotations_as_the_badge(self, badge_request, search_lib):
+        badge_request("http://example.com", annotated=True, blocked=False)
+
+        search_lib.Count.assert_called_once_with(Any(), caller="badge")
 
     def test_it_raises_if_no_uri(self):
         with pytest.raises(httpexceptions.HTTPBadRequest):
@@ -122,9 +126,11 @@ class TestBadge:
         return patch("h.views.badge.Blocklist")
 
     @pytest.fixture(autouse=True)
-    def search_run(self, patch):
-        search_lib = patch("h.views.badge.search")
+    def search_lib(self, patch):
+        return patch("h.views.badge.search")
 
-        search_run = search_lib.Search.return_value.run
-        search_run.return_value = mock.Mock(total=29)
+    @pytest.fixture(autouse=True)
+    def search_run(self, search_lib):
+        search_run = search_lib.Count.return_value.run
+        search_run.return_value = 29
         return search_run
@@ -1,9 +1,9 @@
 from unittest import mock
 
 import pytest
-from pyramid.httpexceptions import HTTPInternalServerError
+from pyramid.httpexceptions import HTTPInternalServerError, HTTPNotFound
 
-from h.views.status import status
+from h.views.status import elasticsearch_metrics, status
 
 
 @pytest.mark.usefixtures("db")
@@ -50,6 +50,25 @@ class TestStatus:
         return db
 
 
+class TestElasticsearchMetrics:
+    def test_it(self, pyramid_request, instrumentation):
+        pyramid_request.registry.settings["es.debug_metrics"] = True
+
+        result = elasticsearch_metrics(pyramid_request)
+
+        assert result == instrumentation.report.return_value
+
+    def test_it_is_not_found_unless_enabled(self, pyramid_request, instrumentation):
+        with pytest.raises(HTTPNotFound):
+            elasticsearch_metrics(pyramid_request)
+
+        instrumentation.report.assert_not_called()
+
+    @pytest.fixture
+    def instrumentation(self, patch):
+        return patch("h.views.status.instrumentation")
+
+
 @pytest.fixture(autouse=True)
 def capture_message(patch):
     return patch("h.views.status.capture_message")